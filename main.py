@@ -18,12 +18,16 @@ import cv2
 from PyQt6.QtCore import QSettings
 from PyQt6.QtWidgets import QApplication
 
-from src.params import ROOT_DIR
+from src.params import ROOT_DIR, CAPTURED_FRAMES_DIR
+from src.frame_source import FrameSource, ReplayFrameSource, ReplayPacing
 from src.main_window import MainWindow
 
 # Change this to False for release mode
 DEBUG_MODE: bool = True
 USE_EMULATION: bool = False
+# Directory of full belt frames or video file replayed in emulation mode,
+# recorded with scripts/capture_video.py
+EMULATION_PATH: str = str(CAPTURED_FRAMES_DIR)
 
 # Set logging level based on a debug flag
 logging.basicConfig(
@@ -55,7 +59,10 @@ def main() -> None:
     app.setApplicationVersion("1.0")
     app.setOrganizationName("The University of Western Ontario")
     app.setOrganizationDomain("uwo.ca")
-    window: MainWindow = MainWindow()
+    frame_source: FrameSource | None = None
+    if USE_EMULATION:
+        frame_source = ReplayFrameSource(EMULATION_PATH, ReplayPacing.REALTIME)
+    window: MainWindow = MainWindow(frame_source=frame_source)
     window.resize(1280, 940)
     window.show()
     sys.exit(app.exec())
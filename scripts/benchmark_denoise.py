@@ -0,0 +1,111 @@
+"""
+Benchmark the denoising backends standing in for the median blurs of the detection.
+Runs the detection of every image of a directory with each backend in the segmentation,
+then in the local defect check, and reports its time and the detection decisions it
+changes with respect to the median blur: capsules found by only one of them and capsules
+judged defective by only one of them.
+
+Run from the project root on frames recorded by scripts/capture_video.py:
+    python -m scripts.benchmark_denoise data/captured_frames
+    python -m scripts.benchmark_denoise data/captured_frames --backends median box --repeat 5
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.background import BackgroundClassifier
+from src.detection import detect_frame
+from src.frame_source import IMAGE_SUFFIXES
+from src.parameter import DefectDetectionParams
+from utils.denoise import DENOISE_BACKENDS, denoise
+from utils.transform import DENOISE_KERNEL_PX
+
+# === Settings ===
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("path", help="image directory")
+parser.add_argument("--backends", nargs="+", choices=list(DENOISE_BACKENDS),
+                    default=list(DENOISE_BACKENDS), help="backends to compare with the median")
+parser.add_argument("--repeat", type=int, default=3,
+                    help="runs of every frame, the fastest one is kept")
+parser.add_argument("--tolerance", type=float, default=2.0,
+                    help="distance in pixels under which two centers are the same capsule")
+args = parser.parse_args()
+
+params = DefectDetectionParams()
+classifier = BackgroundClassifier.from_params(params)
+frames: list[np.ndarray] = []
+for file in sorted(Path(args.path).iterdir()):
+    if file.suffix.lower() not in IMAGE_SUFFIXES:
+        continue
+    image = cv2.imread(str(file), cv2.IMREAD_COLOR)
+    if image is not None:
+        frames.append(classifier.remove_background(image))
+
+
+def detect(image: np.ndarray, segmentation: str, defect: str) -> tuple[float, list, list]:
+    """
+    Fastest of the detection runs of a frame with the given backends, and its result.
+    """
+    best: float = float("inf")
+    for _ in range(max(args.repeat, 1)):
+        start_time: float = time.perf_counter()
+        _, centers, abnormal = detect_frame(
+            image, params, background_removed=True, skip_empty=False,
+            denoise_backend=segmentation, defect_denoise_backend=defect)
+        best = min(best, time.perf_counter() - start_time)
+    return best, centers, abnormal
+
+
+def changes(expected: tuple[list, list], found: tuple[list, list]) -> tuple[int, int, int]:
+    """
+    Capsules missed, capsules found in excess and matched capsules judged differently.
+    """
+    unmatched = list(found[0])
+    missed, flipped = 0, 0
+    for center in expected[0]:
+        distances = [np.hypot(center[0] - c[0], center[1] - c[1]) for c in unmatched]
+        if not distances or min(distances) > args.tolerance:
+            missed += 1
+            continue
+        match = unmatched.pop(int(np.argmin(distances)))
+        flipped += (center in expected[1]) != (match in found[1])
+    return missed, len(unmatched), flipped
+
+
+def filter_time(backend: str) -> float:
+    """
+    Median over the frames of the fastest filter run on the grayscale frame.
+    """
+    times: list[float] = []
+    for image in frames:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        dst = np.empty_like(gray)
+        best: float = float("inf")
+        for _ in range(max(args.repeat, 1)):
+            start_time: float = time.perf_counter()
+            denoise(gray, DENOISE_KERNEL_PX, backend, dst=dst)
+            best = min(best, time.perf_counter() - start_time)
+        times.append(best)
+    return float(np.median(times)) if times else 0.0
+
+
+# === Compare ===
+reference: list[tuple[float, list, list]] = [detect(image, "median", "median") for image in frames]
+print(f"Compared {len(frames)} frames, {sum(len(r[1]) for r in reference)} capsules, "
+      f"{sum(len(r[2]) for r in reference)} defective with the median blur")
+print(f"{'stage':<13}{'backend':<13}{'filter ms':>10}{'detect ms':>10}"
+      f"{'missed':>8}{'extra':>7}{'flipped':>9}")
+for stage in ("segmentation", "defect"):
+    for backend in args.backends:
+        results = [
+            detect(image, backend, "median") if stage == "segmentation"
+            else detect(image, "median", backend) for image in frames]
+        totals = np.sum([changes(r[1:], f[1:]) for r, f in zip(reference, results)], axis=0) \
+            if frames else np.zeros(3, dtype=int)
+        detect_time: float = float(np.median([f[0] for f in results])) if results else 0.0
+        print(f"{stage:<13}{backend:<13}{1000 * filter_time(backend):>10.2f}"
+              f"{1000 * detect_time:>10.1f}{totals[0]:>8}{totals[1]:>7}{totals[2]:>9}")
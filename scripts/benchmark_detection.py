@@ -0,0 +1,102 @@
+"""
+Benchmark the full detection loop without a camera.
+Replays an image directory or a video file through the camera thread pipeline and reports
+the achieved throughput and the pipeline metrics.
+
+Run from the project root on frames recorded by scripts/capture_video.py:
+    python -m scripts.benchmark_detection data/captured_frames --pacing fastest --frames 200
+    python -m scripts.benchmark_detection data/captured_frames --workers 6
+"""
+
+import argparse
+import sys
+import time
+
+# pylint: disable=no-name-in-module
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+from src.camera_thread import CameraThread
+from src.frame_source import ReplayFrameSource, ReplayPacing
+from src.incremental import IncrementalSegmenter
+from src.parameter import DefectDetectionParams
+from src.pipeline import DropPolicy
+from src.params import INIT_FRAME_RATE, DETECTION_WORKERS, INCREMENTAL_MARGIN_PX
+from src.params import PREPROCESS_THREADS, PROCESSING_SCALE
+from src.scaling import ProcessingScale
+
+
+def main() -> None:
+    """
+    Replay the frames through the camera thread and report the throughput.
+    """
+    # === Settings ===
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="image directory or video file to replay")
+    parser.add_argument("--pacing", choices=[p.value for p in ReplayPacing],
+                        default=ReplayPacing.FASTEST.value)
+    parser.add_argument("--frame-rate", type=float, default=INIT_FRAME_RATE,
+                        help="frame rate used by the fixed pacing")
+    parser.add_argument("--frames", type=int, default=200,
+                        help="number of rendered frames to wait for")
+    parser.add_argument("--incremental", action="store_true",
+                        help="segment only the strip that entered since the previous frame")
+    parser.add_argument("--workers", type=int, default=DETECTION_WORKERS,
+                        help="number of detection worker processes, 0 detects in-thread")
+    parser.add_argument("--pixel-mode", choices=["bgr", "mono", "bayer"], default="bgr",
+                        help="replay BGR images or the single channel planes of a camera")
+    parser.add_argument("--threads", type=int, default=PREPROCESS_THREADS,
+                        help="number of threads preprocessing each frame by stripes")
+    parser.add_argument("--scale", type=float, default=PROCESSING_SCALE,
+                        help="resolution the frames are processed at, e.g. 0.5")
+    args = parser.parse_args()
+
+    # === Build the pipeline ===
+    app = QCoreApplication(sys.argv)
+    source = ReplayFrameSource(
+        args.path, ReplayPacing(args.pacing), args.frame_rate, pixel_mode=args.pixel_mode)
+    thread = CameraThread(
+        DefectDetectionParams(), source=source, scale=ProcessingScale(args.scale))
+    thread.detection_workers = args.workers
+    thread.preprocess_threads = args.threads
+    if args.incremental:
+        thread.segmenter = IncrementalSegmenter(
+            pixel_speed=thread.tracker.pixel_speed,
+            margin=thread.scale.length(INCREMENTAL_MARGIN_PX), scale=thread.scale)
+    if source.pacing is ReplayPacing.FASTEST:
+        # Measure the maximum throughput: the replay waits for the detector instead of
+        # spinning and dropping frames
+        thread.detect_drop_policy = DropPolicy.BLOCK
+    processing_times: list[float] = []
+    start_time: float = time.perf_counter()
+
+    def on_frame(
+        _image, count: int, _timestamp: float, processing_time: float, _fps: float
+    ) -> None:
+        """
+        Record the processing time of every rendered frame and stop after enough frames.
+        """
+        processing_times.append(processing_time)
+        if count >= args.frames:
+            thread.requestInterruption()
+
+    thread.frame_signal.connect(on_frame)
+    thread.finished.connect(app.quit)
+    QTimer.singleShot(0, thread.start)
+    app.exec()
+    elapsed: float = time.perf_counter() - start_time
+
+    # === Report ===
+    print(f"Rendered {len(processing_times)} frames in {elapsed:.2f} s "
+          f"({len(processing_times) / elapsed:.2f} fps)")
+    if processing_times:
+        processing_times.sort()
+        print(f"Detection time: median "
+              f"{1000 * processing_times[len(processing_times) // 2]:.1f} ms, "
+              f"max {1000 * processing_times[-1]:.1f} ms")
+    for name, metrics in thread.pipeline_metrics().items():
+        print(f"{name}: {metrics}")
+
+
+if __name__ == "__main__":
+    # The detection workers are spawned and import this module, which must not run again
+    main()
@@ -9,7 +9,8 @@ import time
 import os
 
 # === Settings ===
-output_dir: str = "captured_frames"
+# Replayed by the emulation mode of main.py and by the benchmark scripts
+output_dir: str = os.path.join("data", "captured_frames")
 video_output_path: str = "output_video.avi"
 frame_rate: int = 15  # frames per second
 duration_sec: int = 5  # duration of the capture in seconds
@@ -0,0 +1,83 @@
+"""
+Compare the coarse-to-fine segmentation with the full frame segmentation.
+Runs both on every image of a directory and reports the capsules found by only one of
+them, the largest deviation of the matched centers and sizes, and the time of each mode.
+
+Run from the project root on frames recorded by scripts/capture_video.py:
+    python -m scripts.compare_pyramid data/captured_frames --scale 4
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.background import BackgroundClassifier
+from src.contours import locate_capsules
+from src.frame_source import IMAGE_SUFFIXES
+from src.parameter import DefectDetectionParams
+from utils.transform import get_img_opened, get_img_opened_pyramid
+
+# === Settings ===
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+parser.add_argument("path", help="image directory")
+parser.add_argument("--scale", type=int, default=4,
+                    help="reduction factor of the coarse image")
+parser.add_argument("--tolerance", type=float, default=1.0,
+                    help="distance in pixels under which two centers are the same capsule")
+args = parser.parse_args()
+
+params = DefectDetectionParams()
+classifier = BackgroundClassifier.from_params(params)
+length_range: tuple[int, int] = (params.normal_length_lower, params.normal_length_upper)
+
+# === Compare ===
+full_times: list[float] = []
+pyramid_times: list[float] = []
+missing: int = 0
+extra: int = 0
+matched: int = 0
+center_error: float = 0.0
+size_error: float = 0.0
+differing_pixels: int = 0
+for file in sorted(Path(args.path).iterdir()):
+    if file.suffix.lower() not in IMAGE_SUFFIXES:
+        continue
+    image = cv2.imread(str(file), cv2.IMREAD_COLOR)
+    if image is None:
+        continue
+    image = classifier.remove_background(image)
+
+    start_time: float = time.perf_counter()
+    full = get_img_opened(image)
+    full_times.append(time.perf_counter() - start_time)
+    start_time = time.perf_counter()
+    pyramid = get_img_opened_pyramid(image, args.scale)
+    pyramid_times.append(time.perf_counter() - start_time)
+    differing_pixels += int(np.count_nonzero(full != pyramid))
+
+    expected = locate_capsules(full, length_range, image.shape[1])
+    found = locate_capsules(pyramid, length_range, image.shape[1])
+    unmatched = list(found)
+    for rect in expected:
+        distances = [np.hypot(rect[0][0] - r[0][0], rect[0][1] - r[0][1]) for r in unmatched]
+        if not distances or min(distances) > args.tolerance:
+            missing += 1
+            continue
+        best = unmatched.pop(int(np.argmin(distances)))
+        matched += 1
+        center_error = max(center_error, min(distances))
+        size_error = max(size_error, float(np.max(np.abs(
+            np.sort(rect[1]) - np.sort(best[1])))))
+    extra += len(unmatched)
+
+# === Report ===
+print(f"Compared {len(full_times)} frames at scale 1/{args.scale}")
+print(f"Capsules: {matched} matched, {missing} missed, {extra} extra")
+print(f"Largest deviation: center {center_error:.2f} px, size {size_error:.2f} px, "
+      f"{differing_pixels} differing pixels")
+if full_times:
+    print(f"Denoising time: full {1000 * np.median(full_times):.1f} ms, "
+          f"pyramid {1000 * np.median(pyramid_times):.1f} ms (median)")
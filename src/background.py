@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Background classification of the belt frames.
+
+A pixel is background when its colour lies within the background bounds of
+`DefectDetectionParams`. The recipes were tuned against RGB frames with the bounds in the
+order B, G, R, so the bound labelled B applies to the red channel and the one labelled R
+to the blue channel: the bounds are reversed here to classify BGR frames identically.
+
+The classifier is built once per set of bounds: BGR frames are classified by a single
+`cv2.inRange` pass against the prepared bound arrays, without the RGB copy and the
+per-range masks of `utils.transform.remove_background`, and Mono8 planes by a 256 entry
+lookup table that gives the foreground mask directly.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+import cv2
+import numpy as np
+from numpy.typing import NDArray
+
+from src.parameter import DefectDetectionParams
+from utils.transform import bayer_superpixels
+
+# Weights of the B, G and R channels in the luma of a Mono8 sensor (ITU-R BT.601)
+LUMA_WEIGHTS: tuple[float, float, float] = (0.114, 0.587, 0.299)
+
+
+class BackgroundClassifier:
+    """
+    Separates the capsules from the belt background by colour.
+
+    Example:
+        >>> classifier = BackgroundClassifier((0, 30, 60), (120, 190, 220))
+        >>> image = np.array([[[100, 100, 100], [250, 250, 250]]], dtype=np.uint8)
+        >>> classifier.foreground_mask(image).tolist()
+        [[0, 255]]
+        >>> classifier.remove_background(image)[0].tolist()
+        [[0, 0, 0], [250, 250, 250]]
+        >>> classifier.foreground_mask(np.array([[100, 250]], dtype=np.uint8)).tolist()
+        [[0, 255]]
+    """
+
+    # Bounds in the channel order of the frames
+    lower: NDArray[np.uint8]
+    upper: NDArray[np.uint8]
+    luma_table: NDArray[np.uint8]
+
+    def __init__(self, lower: tuple[int, int, int], upper: tuple[int, int, int]) -> None:
+        """
+        Initialize the classifier.
+
+        Args:
+            lower (tuple[int, int, int]): Lower B, G and R bounds of the background,
+                as labelled in the recipes.
+            upper (tuple[int, int, int]): Upper B, G and R bounds of the background,
+                as labelled in the recipes.
+        """
+        # Bounds of the B, G and R channels of the frames, see the module docstring
+        self.lower = np.array(lower[::-1], dtype=np.uint8)
+        self.upper = np.array(upper[::-1], dtype=np.uint8)
+        levels: NDArray = np.arange(256)
+        luma_lower: float = round(float(np.dot(LUMA_WEIGHTS, self.lower)))
+        luma_upper: float = round(float(np.dot(LUMA_WEIGHTS, self.upper)))
+        self.luma_table = np.where(
+            (luma_lower <= levels) & (levels <= luma_upper), 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def from_params(params: DefectDetectionParams) -> "BackgroundClassifier":
+        """
+        The classifier of the background bounds of the parameters, built on first use.
+
+        Args:
+            params (DefectDetectionParams): Defect detection parameters.
+
+        Returns:
+            BackgroundClassifier: The classifier, shared by equal bounds.
+        """
+        return _classifier(
+            (params.B_val_lower, params.G_val_lower, params.R_val_lower),
+            (params.B_val_upper, params.G_val_upper, params.R_val_upper))
+
+    def foreground_mask(
+        self, image: NDArray[np.uint8], cfa_pattern: Optional[str] = None,
+        dst: Optional[NDArray[np.uint8]] = None
+    ) -> NDArray[np.uint8]:
+        """
+        Classify the pixels of a frame.
+
+        Args:
+            image (NDArray[np.uint8]): BGR image, Mono8 plane or raw Bayer plane.
+            cfa_pattern (Optional[str]): Colour filter array layout of a raw Bayer plane.
+            dst (Optional[NDArray[np.uint8]]): Single channel array receiving the mask.
+
+        Returns:
+            NDArray[np.uint8]: 255 on the foreground, 0 on the background.
+        """
+        if image.ndim == 3:
+            background: NDArray[np.uint8] = cv2.inRange(image, self.lower, self.upper, dst=dst)
+            return cv2.bitwise_not(background, dst=background)
+        if cfa_pattern is None:
+            return cv2.LUT(image, self.luma_table, dst=dst)
+        # Bayer pixels are classified by the three channels of their 2x2 tile
+        background = cv2.inRange(
+            bayer_superpixels(image, cfa_pattern), self.lower, self.upper)
+        if dst is None:
+            dst = np.empty(image.shape, dtype=np.uint8)
+        # Each tile covers exactly 2x2 pixels, a last odd row or column takes the tile before
+        tiles: NDArray[np.uint8] = dst[:2 * background.shape[0], :2 * background.shape[1]]
+        cv2.resize(cv2.bitwise_not(background, dst=background),
+                   (tiles.shape[1], tiles.shape[0]), dst=tiles, interpolation=cv2.INTER_NEAREST)
+        if image.shape[0] % 2:
+            dst[-1] = dst[-2]
+        if image.shape[1] % 2:
+            dst[:, -1] = dst[:, -2]
+        return dst
+
+    def remove_background(
+        self, image: NDArray[np.uint8], cfa_pattern: Optional[str] = None,
+        dst: Optional[NDArray[np.uint8]] = None, mask: Optional[NDArray[np.uint8]] = None
+    ) -> NDArray[np.uint8]:
+        """
+        Set the background pixels of a frame to black.
+
+        Args:
+            image (NDArray[np.uint8]): BGR image, Mono8 plane or raw Bayer plane.
+            cfa_pattern (Optional[str]): Colour filter array layout of a raw Bayer plane.
+            dst (Optional[NDArray[np.uint8]]): Array receiving the result, shaped like image.
+            mask (Optional[NDArray[np.uint8]]): Single channel array receiving the foreground
+                mask.
+
+        Returns:
+            NDArray[np.uint8]: The frame with the background set to black.
+        """
+        foreground: NDArray[np.uint8] = self.foreground_mask(image, cfa_pattern, dst=mask)
+        # Pixels outside the mask are left untouched in a reused array
+        if dst is not None:
+            dst[...] = 0
+        return cv2.bitwise_and(image, image, dst=dst, mask=foreground)
+
+
+@lru_cache(maxsize=8)
+def _classifier(
+    lower: tuple[int, int, int], upper: tuple[int, int, int]
+) -> BackgroundClassifier:
+    """
+    Classifier of a set of bounds, shared by every frame detected with them.
+    """
+    return BackgroundClassifier(lower, upper)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
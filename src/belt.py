@@ -80,6 +80,43 @@ class Belt:
         effective_time = travel_time - processing_delay - actuator_response_time
         return effective_time
 
+    def calculate_actuation_timestamps(
+            self, exposure_time: float, centers_x: list[float],
+            frame_width: int, length_per_pixel: float
+    ) -> list[float]:
+        """
+        Calculate the absolute actuation timestamps of capsules seen in a frame.
+
+        Each capsule travels from its position in the frame to the edge of the field of view
+        and then along the belt to the actuator. The travel is counted from the exposure
+        instant of the frame, so the result does not depend on how long the frame took
+        to process.
+
+        Parameters:
+            exposure_time (float): Host time at which the frame was exposed in seconds.
+            centers_x (list[float]): Horizontal pixel position of each capsule center.
+            frame_width (int): Width of the frame in pixels.
+            length_per_pixel (float): Belt length covered by one pixel,
+                in the same unit as distance_to_actuator.
+
+        Returns:
+            list[float]: Absolute actuation timestamp of each capsule in seconds.
+
+        >>> belt = Belt(rotating_speed=100.0, distance_to_actuator=300.0)
+        >>> belt.calculate_actuation_timestamps(10.0, [1000.0], 2000, 0.1)
+        [14.0]
+        """
+        if self.rotating_speed <= 0:
+            logging.error("Belt speed must be greater than 0.")
+            raise ValueError("Belt speed must be greater than 0.")
+
+        return [
+            exposure_time +
+            ((frame_width - center_x) * length_per_pixel +
+             self.distance_to_actuator) / self.rotating_speed
+            for center_x in centers_x
+        ]
+
 
 if __name__ == "__main__":
     # Create a Belt object with an actuator 0.5m away from the detection point.
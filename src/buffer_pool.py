@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Preallocated image buffers reused from frame to frame.
+
+Every step of the detection chain used to allocate its full-frame output. A pool hands
+out the same named arrays on every frame instead, to be passed as the `dst` of the OpenCV
+calls, so that steady-state operation does not allocate per-frame memory.
+A pool is not thread-safe: each stage or worker process owns its own pool.
+"""
+
+from typing import Optional
+
+import numpy as np
+from numpy.typing import DTypeLike, NDArray
+
+from src.params import INIT_HEIGHT, INIT_WIDTH
+
+
+class BufferPool:
+    """
+    Named arrays sized from the frame shape, allocated once and reused.
+
+    A buffer handed over to another stage must not be overwritten while that stage may
+    still read it: such buffers are requested with a depth, and the pool rotates through
+    `depth` arrays of that name.
+
+    Example:
+        >>> pool = BufferPool(height=4, width=6)
+        >>> mask = pool.get("mask", channels=1)
+        >>> mask.shape, pool.get("mask", channels=1) is mask
+        ((4, 6), True)
+        >>> first = pool.get("frame", depth=2)
+        >>> pool.get("frame", depth=2) is first, pool.get("frame", depth=2) is first
+        (False, True)
+        >>> pool.allocations
+        3
+    """
+
+    height: int
+    width: int
+    allocations: int
+
+    def __init__(self, height: int = INIT_HEIGHT, width: int = INIT_WIDTH) -> None:
+        """
+        Initialize an empty pool.
+
+        Args:
+            height (int): Height of the frames in pixels.
+            width (int): Width of the frames in pixels.
+        """
+        self.height = height
+        self.width = width
+        self.allocations = 0
+        self._buffers: dict[str, list[NDArray]] = {}
+        self._next: dict[str, int] = {}
+
+    def get(
+        self, name: str, shape: Optional[tuple[int, ...]] = None, channels: int = 3,
+        dtype: DTypeLike = np.uint8, depth: int = 1
+    ) -> NDArray:
+        """
+        Get the buffer of a name, allocating it on first use or when its shape changes.
+        The content of the buffer is left from its previous use.
+
+        Args:
+            name (str): Name of the buffer.
+            shape (Optional[tuple[int, ...]]): Shape of the buffer,
+                the frame shape with `channels` channels by default.
+            channels (int): Number of channels of the default shape, 1 for a plane.
+            dtype (DTypeLike): Data type of the buffer.
+            depth (int): Number of arrays the name rotates through.
+
+        Returns:
+            NDArray: The buffer.
+        """
+        if shape is None:
+            shape = (self.height, self.width) if channels == 1 \
+                else (self.height, self.width, channels)
+        ring: list[NDArray] = self._buffers.setdefault(name, [])
+        index: int = self._next.get(name, 0) % depth
+        self._next[name] = index + 1
+        if index < len(ring) and ring[index].shape == shape and ring[index].dtype == dtype:
+            return ring[index]
+        buffer: NDArray = np.empty(shape, dtype=dtype)
+        self.allocations += 1
+        if index < len(ring):
+            ring[index] = buffer
+        else:
+            ring.append(buffer)
+        return buffer
+
+    def get_like(self, name: str, array: NDArray, depth: int = 1) -> NDArray:
+        """
+        Get the buffer of a name with the shape and data type of an array.
+
+        Args:
+            name (str): Name of the buffer.
+            array (NDArray): Array whose shape and data type the buffer takes.
+            depth (int): Number of arrays the name rotates through.
+
+        Returns:
+            NDArray: The buffer.
+        """
+        return self.get(name, array.shape, dtype=array.dtype, depth=depth)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -8,28 +8,44 @@ Uses a new thread and event to collaborate with PyQt framework.
 """
 
 import logging
-import os
 import time
+from dataclasses import asdict
+from typing import Optional
 
 import cv2
 import numpy as np
 from numpy.typing import NDArray
-from pypylon import pylon
 # pylint: disable=no-name-in-module
 from PyQt6.QtCore import QSettings, QThread, pyqtSignal
 
-from src.contours import find_contours_img
-from src.defects import detect_capsule_defects
-
+from src.belt import Belt
+from src.buffer_pool import BufferPool
+from src.clock import CameraClockMapper
+from src.detection import MASK_BIN, DetectionResult, FramePacket
+from src.detection import belt_empty, detect_frame, inspection_view
+from src.detection_farm import DetectionFarm, FarmResult
+from src.frame_loss import FrameLossCounter, FrameLossStats
+from src.frame_source import FrameSource, GrabbedFrame, PylonFrameSource
+from src.inspection_band import InspectionBand, clear_outside
+from src.incremental import IncrementalSegmenter
 from src.parameter import DefectDetectionParams
-
-from src.params import ROOT_DIR
-from src.params import INIT_WIDTH, INIT_HEIGHT, INIT_FRAME_RATE
-from src.params import INIT_GAIN, INIT_EXPOSURE_TIME, GRABBING_TIMEOUT_MS
-from src.params import MM_PER_PIXEL, BELT_LENGTH_MM, BELT_SPEED_MM_S
-
-from utils.transform import remove_background, get_img_opened, remove_zero_rows
-from utils.visualize import cvimshow
+from src.pipeline import BoundedQueue, DropPolicy, PipelineStage
+from src.rate_controller import FrameRateController
+from src.scaling import ProcessingScale
+from src.snapshot import DetectionSnapshot
+from src.striping import StripedExecutor
+from src.telemetry import TelemetrySampler, TelemetrySnapshot
+from src.tracker import CapsuleTracker
+
+from src.params import INIT_WIDTH, INIT_HEIGHT, BELT_LENGTH_MM, BELT_SPEED_MM_S
+from src.params import CLOCK_SYNC_INTERVAL_S, PROCESSING_SCALE, TRACK_GATE_PX
+from src.params import INCREMENTAL_MARGIN_PX, INSPECTION_BAND, EMPTY_BELT_SKIP
+from src.params import DETECT_QUEUE_SIZE, RENDER_QUEUE_SIZE
+from src.params import DETECT_DROP_POLICY, RENDER_DROP_POLICY, METRICS_INTERVAL_S
+from src.params import DETECTION_WORKERS, INCREMENTAL_SEGMENTATION, PREPROCESS_THREADS
+from src.params import ADAPTIVE_FRAME_RATE, INIT_FRAME_RATE
+
+from utils.transform import plane_to_bgr
 
 # Change this to False for release mode
 settings: QSettings = QSettings("MinLab", "CapAOI")
@@ -42,14 +58,6 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s",
 )
 
-# Initialize the constant variables
-MASK_IMG_PATH: str = os.path.join(
-    ROOT_DIR, "data", "Figs_14", "Capsule_1_mask_binary.png")
-# pylint: disable=no-member
-# MASK_RAW: cv2.typing.MatLike = cv2.imread(MASK_IMG_PATH, cv2.IMREAD_UNCHANGED)
-MASK_BIN: cv2.typing.MatLike = cv2.imread(MASK_IMG_PATH, cv2.IMREAD_GRAYSCALE)
-MASK_BIN = remove_zero_rows(MASK_BIN)
-
 
 class CameraThread(QThread):
     """
@@ -81,215 +89,537 @@ class CameraThread(QThread):
     # Signal to send the timestamp to actuate the relay
     relay_signal: pyqtSignal = pyqtSignal(list)
 
-    camera: pylon.InstantCamera
+    source: FrameSource
     camera_temperature_signal: pyqtSignal = pyqtSignal(str)
+    # Camera telemetry sampled off the grab loop
+    telemetry_signal: pyqtSignal = pyqtSignal(dict)
+    telemetry: TelemetrySampler
 
-    detection_params: DefectDetectionParams = DefectDetectionParams()
+    # Detection parameters with their derived constants, replaced as a whole when the
+    # parameters change and read once per frame
+    snapshot: DetectionSnapshot
     # Feedback signal to main window
     param_update_signal: pyqtSignal = pyqtSignal(DefectDetectionParams)
 
-    def __init__(self, params: DefectDetectionParams) -> None:
+    # Signal to send the pipeline occupancy counters
+    metrics_signal: pyqtSignal = pyqtSignal(dict)
+    last_metrics_time: float = 0.0
+
+    # Bounded queues and worker threads of the detection and presentation stages
+    detect_queue: BoundedQueue
+    render_queue: BoundedQueue
+    detect_drop_policy: DropPolicy = DropPolicy(DETECT_DROP_POLICY)
+    render_drop_policy: DropPolicy = DropPolicy(RENDER_DROP_POLICY)
+    stages: list[PipelineStage] = []
+    # Worker processes running the detection when detection_workers is greater than 0
+    detection_workers: int = DETECTION_WORKERS
+    farm: Optional[DetectionFarm] = None
+    # Intermediate buffers of the in-thread detection stage
+    buffers: BufferPool
+    # Colour copies of the single channel planes, owned by the presentation stage
+    display_buffers: BufferPool
+    # Resolution the frames are processed at, relative to INIT_WIDTH x INIT_HEIGHT
+    scale: ProcessingScale
+    # Lane of the inspected capsule centers, the rest of the frame is not processed
+    band: InspectionBand = InspectionBand(*INSPECTION_BAND)
+    # Threads preprocessing each frame by stripes in the in-thread detection stage
+    preprocess_threads: int = PREPROCESS_THREADS
+    striper: Optional[StripedExecutor] = None
+    # Segmenter of the in-thread detection stage re-processing only the newly entered strip
+    segmenter: Optional[IncrementalSegmenter] = None
+
+    # Acquisition frame rate following the belt speed and the detection latency
+    rate_signal: pyqtSignal = pyqtSignal(dict)
+    rate_controller: Optional[FrameRateController] = None
+    frame_rate: float = INIT_FRAME_RATE
+
+    # Frames exposed but never inspected
+    frame_loss: FrameLossCounter
+    inspected_count: int = 0
+
+    # Frames of an empty belt, passed on without detection
+    skip_empty: bool = EMPTY_BELT_SKIP
+    empty_count: int = 0
+    empty_belt_time: float = 0.0
+    empty_processing_time: float = 0.0
+    last_exposure_time: Optional[float] = None
+
+    # Mapping from the camera timestamp counter to the host monotonic clock
+    clock: CameraClockMapper
+    clock_latch_supported: bool = True
+    last_clock_sync_time: float = 0.0
+    belt: Belt
+    # Persistent capsule IDs across frames, so that each defective capsule is actuated once
+    tracker: CapsuleTracker
+
+    def __init__(
+        self, params: DefectDetectionParams, source: Optional[FrameSource] = None,
+        scale: Optional[ProcessingScale] = None
+    ) -> None:
+        """
+        Initialize the camera thread.
+
+        Args:
+            params (DefectDetectionParams): Defect detection parameters.
+            source (Optional[FrameSource]): Source of the frames,
+                the first Basler camera found by pylon by default.
+            scale (Optional[ProcessingScale]): Resolution the frames are processed at,
+                PROCESSING_SCALE by default.
+        """
         super().__init__()
-        self.detection_params = params
         self.frame_count = 0
-        # Create an instance of the camera camera_threadect
-        try:
-            self.camera = pylon.InstantCamera(
-                pylon.TlFactory.GetInstance().CreateFirstDevice())
-            logging.debug(self.camera.GetDeviceInfo().GetFriendlyName())
-        except (pylon.GenericException, RuntimeError) as e:
-            logging.error("Error retrieving frame %s", e)
+        self.belt = Belt(
+            rotating_speed=BELT_SPEED_MM_S, distance_to_actuator=BELT_LENGTH_MM)
+        self.source = source if source is not None else PylonFrameSource()
+        self.clock = CameraClockMapper(tick_frequency=self.source.tick_frequency)
+        self.telemetry = TelemetrySampler(self.source)
+        self.buffers = BufferPool()
+        self.display_buffers = BufferPool()
+        self.frame_loss = FrameLossCounter()
+        self.scale = scale if scale is not None else ProcessingScale(PROCESSING_SCALE)
+        self.snapshot = DetectionSnapshot.build(params, self.scale)
+        if ADAPTIVE_FRAME_RATE:
+            self.rate_controller = FrameRateController()
+        # Positions and speeds are in pixels of the processed frames
+        self.tracker = CapsuleTracker(
+            pixel_speed=BELT_SPEED_MM_S / self.scale.mm_per_pixel,
+            gate=TRACK_GATE_PX * self.scale.factor,
+            frame_width=self.scale.length(INIT_WIDTH))
+        if INCREMENTAL_SEGMENTATION:
+            self.segmenter = IncrementalSegmenter(
+                pixel_speed=BELT_SPEED_MM_S / self.scale.mm_per_pixel,
+                margin=self.scale.length(INCREMENTAL_MARGIN_PX), scale=self.scale)
 
-        try:
-            self.camera.Open()
-        except UnboundLocalError as e:
-            logging.error("Error opening camera %s", e)
-
-        # Set camera related paramters
-        self.camera.UserSetSelector.SetValue("Default")
-        self.camera.UserSetLoad.Execute()
-        # self.camera.ExposureTimeMode.SetValue("Common")
-        # self.camera.ExposureTime.SetValue(INIT_EXPOSURE_TIME)
-        self.camera.AcquisitionFrameRateEnable.SetValue(True)
-        self.camera.AcquisitionFrameRate.SetValue(INIT_FRAME_RATE)
-        self.camera.AcquisitionMode.SetValue("Continuous")
-        # self.camera.Gain.SetValue(INIT_GAIN)
-        self.camera.Width.SetValue(INIT_WIDTH)
-        self.camera.Height.SetValue(INIT_HEIGHT)
-        # Set the X axis offset such that it only looks at the horizontal centric pixels
-        self.camera.OffsetX.SetValue(
-            (self.camera.Width.GetMax() - INIT_WIDTH) // 2)
-        # Set the Y axis offset such that it only looks at the vertical centric pixels
-        self.camera.OffsetY.SetValue(
-            (self.camera.Height.GetMax() - INIT_HEIGHT) // 2)
-        self.camera.Close()
-
-    # pylint: disable=too-many-locals
     def run(self) -> None:
         """
         The main function to run the camera feed.
         Overwrites the run method of QThread.
+
+        The thread itself only acquires frames. Detection and presentation run on their
+        own stages, fed through bounded queues, so that grabbing never waits on OpenCV
+        work or GUI drawing.
         """
 
-        converter: pylon.ImageFormatConverter = pylon.ImageFormatConverter()
+        # Explicitly declaring an array helps reducing processing time in blocking polling loop
+        frame: Optional[GrabbedFrame]
+        grab_count: int = 0
+
+        # Frames dropped by the detection queue hand their grab buffer back immediately
+        self.detect_queue = BoundedQueue(
+            "detect", DETECT_QUEUE_SIZE, self.detect_drop_policy,
+            on_drop=lambda packet: packet.frame.release())
+        self.render_queue = BoundedQueue(
+            "render", RENDER_QUEUE_SIZE, self.render_drop_policy)
+        if self.detection_workers > 0:
+            # Frames are detected by worker processes and collected back in frame order
+            self.farm = DetectionFarm(
+                self.detection_workers, (INIT_HEIGHT, INIT_WIDTH, 3),
+                output_size=RENDER_QUEUE_SIZE)
+            self.stages = [
+                PipelineStage("submit", self.submit_stage, self.detect_queue),
+                PipelineStage("collect", self.collect_stage,
+                              self.farm.output, self.render_queue)
+            ]
+        else:
+            self.farm = None
+            if self.preprocess_threads > 0:
+                self.striper = StripedExecutor(self.preprocess_threads)
+            self.stages = [
+                PipelineStage("detect", self.detect_stage,
+                              self.detect_queue, self.render_queue)
+            ]
+        self.stages.append(
+            PipelineStage("render", self.render_stage, self.render_queue))
+        for stage in self.stages:
+            stage.start()
+
+        self.source.start()
+        self.frame_loss.reset()
+        self.frame_loss.update_stream(self.source.stream_statistics())
+        self.inspected_count = 0
+        self.empty_count = 0
+        self.empty_belt_time = 0.0
+        self.empty_processing_time = 0.0
+        self.last_exposure_time = None
+        # The sampler thread can only be started once
+        self.telemetry = TelemetrySampler(self.source, on_sample=self.publish_telemetry)
+        self.telemetry.start()
+        self.clock.reset()
+        self.tracker.reset()
+        if self.rate_controller is not None:
+            self.frame_rate = INIT_FRAME_RATE
+            self.rate_controller.reset(self.frame_rate)
+            self.rate_controller.parallelism = max(1, self.detection_workers)
+        if self.segmenter is not None:
+            self.segmenter.reset()
+        self.clock_latch_supported = self.synchronize_clock()
+
+        # Loop until the source stops grabbing, throws an exception or an interruption is requested
+        try:
+            while self.source.is_grabbing() and not self.isInterruptionRequested():
+                # Obtain the latest frame and hand it over to the detection stage
+                frame = self.source.grab()
+                if frame is not None:
+                    grab_count += 1
+                    if self.frame_loss.record(frame) > 0:
+                        logging.debug("Frames missing before block %s", frame.block_id)
+                    self.detect_queue.put(FramePacket(
+                        frame_id=grab_count, frame=frame,
+                        exposure_time=self.exposure_time(
+                            frame.camera_timestamp, frame.arrival_time),
+                        camera_timestamp=frame.camera_timestamp))
+        finally:
+            # Let the downstream stages drain and exit in order
+            self.detect_queue.close()
+            for stage in self.stages:
+                stage.join()
+                # The farm publishes its last results once every submitted frame is detected
+                if stage.name == "submit" and self.farm is not None:
+                    self.farm.close()
+            for packet in self.detect_queue.drain():
+                packet.frame.release()
+            if self.striper is not None:
+                self.striper.close()
+                self.striper = None
+            self.telemetry.stop()
+            self.source.stop()
+
+    def detect_stage(self, packet: FramePacket) -> DetectionResult:
+        """
+        Detection stage: run the detection chain on a frame and emit the actuation timestamps.
 
-        # The output pixel format for the converter
-        # The default pixel format is RGB8packed
-        # Converting to opencv bgr format
-        converter.OutputPixelFormat = pylon.PixelType_BGR8packed
-        converter.OutputBitAlignment = pylon.OutputBitAlignment_MsbAligned
+        Args:
+            packet (FramePacket): The grabbed frame.
 
-        # Explicitly declaring an array helps reducing processing time in blocking polling loop
-        grab_result: pylon.GrabResult
-        pylon_image: pylon.PylonImage
-        image: NDArray[np.uint8]
-        grab_time: float
-        capsule_centers_abnormal: list[tuple[int, int]]
-        abs_actuation_timestamps: list[float] = []
-
-        # self.camera.StopGrabbing()
-        # Only grab the latest image
-        # Blocks till the image is processed
-        self.camera.StartGrabbing(pylon.GrabStrategy_LatestImageOnly)
-        # camera.StartGrabbing(pylon.GrabStrategy_OneByOne)
-
-        # Loop until the camera stops grabbing, throws an exception or an interruption is requested
-        while self.camera.IsGrabbing() and not self.isInterruptionRequested():
-            self.camera_temperature_signal.emit(
-                self.camera.BslTemperatureStatus.GetValue())
-
-            # Wait for an image and then retrieve it. A timeout of 5000 ms is used.
-            # Obtain the latest frame and process it
-            # timeoutMs: 5000
-            # timeoutHandling: pylon.TimeoutHandling_ThrowException
-            grab_result = self.camera.RetrieveResult(
-                GRABBING_TIMEOUT_MS, pylon.TimeoutHandling_ThrowException)
-
-            if grab_result.GrabSucceeded():
-                pylon_image = converter.Convert(grab_result)
-                image = pylon_image.GetArray()
-                # cv2.imwrite("Fig_0507_raw.png", image)
-
-                # Remove background colour
-                bgc_ranges: dict[str, tuple[list[int], list[int]]] = {
-                    "bgc": (
-                        [
-                            self.detection_params.B_val_lower,
-                            self.detection_params.G_val_lower,
-                            self.detection_params.R_val_lower
-                        ],
-                        [
-                            self.detection_params.B_val_upper,
-                            self.detection_params.G_val_upper,
-                            self.detection_params.R_val_upper
-                        ]
-                    )
-                }
-                start_processing_time: float = time.time()
-
-                # Remove the background colour from the image
-                image = remove_background(image, bgc_ranges)
-
-                # Obtain the morphologically processed copy of the image
-                image_opened: cv2.typing.MatLike = get_img_opened(image)
-                # cv2.imwrite("Fig_0505_opened.png", image_opened)
-
-                # Find the contours in the image
-                capsule_set_raw, capsule_set_opened, \
-                    capsule_centers, capsule_size, capsule_area, capsule_similarity \
-                    = find_contours_img(
-                        image, image_opened, MASK_BIN,
-                        normal_length_range=(
-                            self.detection_params.normal_length_lower,
-                            self.detection_params.normal_length_upper
-                        )
-                    )
-
-                # Detect the defective capsules
-                capsule_centers_abnormal = detect_capsule_defects(
-                    capsule_images_raw=capsule_set_raw,
-                    capsule_masks=capsule_set_opened,
-                    capsule_centers=capsule_centers,
-                    capsule_sizes=capsule_size,
-                    capsule_areas=capsule_area,
-                    capsule_similarities=capsule_similarity,
-                    normal_length_range=(
-                        self.detection_params.normal_length_lower,
-                        self.detection_params.normal_length_upper
-                    ),
-                    normal_width_range=(100, 150),
-                    normal_area_range=(
-                        self.detection_params.normal_area_lower,
-                        self.detection_params.normal_area_upper
-                    ),
-                    similarity_threshold_overall=self.detection_params.similarity_threshold_overall,
-                    similarity_threshold_head=self.detection_params.similarity_threshold_head,
-                    local_defect_length=self.detection_params.local_defect_length
-                )
-
-                # Get current timestamp in seconds
-                grab_time: float = time.time()
-
-                # Calculate absolute actuation timestamps
-                abs_actuation_timestamps = [
-                    grab_time +
-                    ((INIT_WIDTH - center[0]) * MM_PER_PIXEL +
-                     BELT_LENGTH_MM) / BELT_SPEED_MM_S
-                    for center in capsule_centers_abnormal
-                ]
-                self.relay_signal.emit(abs_actuation_timestamps)
-
-                points: list[tuple[int, int]] = [
-                    (int(x), int(y)) for x, y in capsule_centers
-                ]
-                for index, point in enumerate(points):
-                    cv2.putText(
-                        img=image, text=str(index+1), org=(point[0], point[1]),
-                        fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                        # Draw a green filled circle
-                        fontScale=2, color=(255, 0, 0), thickness=2
-                    )
-
-                points = [
-                    (int(x), int(y))
-                    for x, y in capsule_centers_abnormal
-                ]
-                for index, point in enumerate(points):
-                    cv2.circle(
-                        img=image, center=point, radius=5,
-                        # Draw a red filled circle
-                        color=(0, 0, 255), thickness=5)
-
-                self.frame_count += 1
-                self.frame_signal.emit(
-                    image, self.frame_count, grab_time, grab_time - start_processing_time, self.camera.ResultingFrameRate.GetValue())
-
-            grab_result.Release()
-
-        self.camera.StopGrabbing()
-        self.camera.Close()
+        Returns:
+            DetectionResult: The detection outcome handed to the presentation stage.
+        """
+        start_processing_time: float = time.perf_counter()
+        # Background removal is the only step reading the raw frame,
+        # the grab buffer is handed back as soon as it is done
+        # The image goes on to the presentation stage and the UI, so it rotates through
+        # more buffers than the frames that can be queued or displayed at once
+        # The whole frame is detected with the parameters current at its start
+        snapshot: DetectionSnapshot = self.snapshot
+        cfa_pattern: Optional[str] = packet.frame.cfa_pattern
+        try:
+            with packet.frame.view() as raw_image:
+                raw_image, cfa_pattern = self.scale.prepare(
+                    raw_image, cfa_pattern, self.source.binning, self.buffers)
+                image: NDArray[np.uint8] = self.buffers.get_like(
+                    "background_removed", raw_image, depth=RENDER_QUEUE_SIZE + 3)
+                # Frames of an empty belt are only copied for display
+                empty: bool = self.skip_empty and belt_empty(
+                    raw_image, snapshot, cfa_pattern, band=self.band)
+                if empty:
+                    np.copyto(image, raw_image)
+                else:
+                    self.remove_background(raw_image, cfa_pattern, image, snapshot)
+                del raw_image
+        finally:
+            # The grabber gets its buffer back even if the frame could not be processed
+            packet.frame.release()
+        capsule_centers: list = []
+        capsule_centers_abnormal: list = []
+        if not empty:
+            image, capsule_centers, capsule_centers_abnormal = detect_frame(
+                image, snapshot, MASK_BIN, background_removed=True,
+                segmenter=self.segmenter, exposure_time=packet.exposure_time,
+                buffers=self.buffers, cfa_pattern=cfa_pattern, striper=self.striper,
+                band=self.band, skip_empty=False)
+        processing_time: float = time.perf_counter() - start_processing_time
+
+        result: DetectionResult = DetectionResult(
+            frame_id=packet.frame_id, image=image, exposure_time=packet.exposure_time,
+            processing_time=processing_time,
+            capsule_centers=capsule_centers, abnormal_centers=capsule_centers_abnormal,
+            cfa_pattern=cfa_pattern, empty=empty)
+        self.emit_actuation_timestamps(result)
+        return result
+
+    def remove_background(
+        self, raw_image: NDArray[np.uint8], cfa_pattern: Optional[str],
+        image: NDArray[np.uint8], snapshot: DetectionSnapshot
+    ) -> None:
+        """
+        Remove the background of the view of a frame processed by the detection,
+        the rest of the image is black.
+
+        Args:
+            raw_image (NDArray[np.uint8]): BGR image or single channel plane of the frame.
+            cfa_pattern (Optional[str]): Colour filter array layout of a raw Bayer plane.
+            image (NDArray[np.uint8]): Array receiving the result, shaped like raw_image.
+            snapshot (DetectionSnapshot): Detection parameters of the frame.
+        """
+        left, top, right, bottom = view = inspection_view(raw_image.shape, snapshot, self.band)
+        clear_outside(image, view)
+        mask: NDArray[np.uint8] = self.buffers.get(
+            "mask", raw_image.shape[:2])[top:bottom, left:right]
+        if self.striper is not None:
+            self.striper.remove_background(
+                snapshot.classifier, raw_image[top:bottom, left:right], cfa_pattern,
+                dst=image[top:bottom, left:right], mask=mask)
+        else:
+            snapshot.classifier.remove_background(
+                raw_image[top:bottom, left:right], cfa_pattern,
+                dst=image[top:bottom, left:right], mask=mask)
+
+    def submit_stage(self, packet: FramePacket) -> None:
+        """
+        Submission stage: copy a frame into the detection farm and release its grab buffer.
+        Once every worker process has exited no frame can be detected any more, and the
+        acquisition is stopped.
+
+        Args:
+            packet (FramePacket): The grabbed frame.
+        """
+        try:
+            with packet.frame.view() as raw_image:
+                raw_image, cfa_pattern = self.scale.prepare(
+                    raw_image, packet.frame.cfa_pattern, self.source.binning, self.buffers)
+                self.farm.submit(
+                    raw_image, self.snapshot,
+                    (packet.frame_id, packet.exposure_time, cfa_pattern),
+                    cfa_pattern=cfa_pattern)
+                del raw_image
+        except RuntimeError as e:
+            if self.farm.alive:
+                raise
+            # Stop once instead of failing every frame still grabbed or queued
+            if not self.isInterruptionRequested():
+                logging.error("Stopping the acquisition: %s", e)
+                self.requestInterruption()
+        finally:
+            packet.frame.release()
+
+    def collect_stage(self, farm_result: FarmResult) -> Optional[DetectionResult]:
+        """
+        Collection stage: emit the actuation timestamps of a frame detected by the farm.
+        Results arrive in frame order, each with the exposure time of its own frame.
+
+        Args:
+            farm_result (FarmResult): The detection outcome of a worker process.
+
+        Returns:
+            Optional[DetectionResult]: The detection outcome handed to the presentation stage,
+                None if the detection failed.
+        """
+        if farm_result.image is None:
+            return None
+        frame_id, exposure_time, cfa_pattern = farm_result.metadata
+        result: DetectionResult = DetectionResult(
+            frame_id=frame_id, image=farm_result.image, exposure_time=exposure_time,
+            processing_time=farm_result.processing_time,
+            capsule_centers=farm_result.capsule_centers,
+            abnormal_centers=farm_result.abnormal_centers, cfa_pattern=cfa_pattern,
+            empty=farm_result.empty)
+        self.emit_actuation_timestamps(result)
+        return result
+
+    def emit_actuation_timestamps(self, result: DetectionResult) -> None:
+        """
+        Track the capsules of a frame and calculate the absolute actuation timestamps of the
+        capsules flagged as defective for the first time. Timestamps are based on the
+        exposure instant, so that they do not depend on the processing time.
+        Frames must be passed in exposure order.
+
+        Args:
+            result (DetectionResult): The detection outcome of a frame.
+        """
+        self.inspected_count += 1
+        if result.empty:
+            self.empty_count += 1
+            self.empty_processing_time += result.processing_time
+            if self.last_exposure_time is not None:
+                self.empty_belt_time += result.exposure_time - self.last_exposure_time
+        self.last_exposure_time = result.exposure_time
+        result.track_ids, new_defects = self.tracker.update(
+            result.exposure_time, result.capsule_centers, result.abnormal_centers)
+        abs_actuation_timestamps: list[float] = self.belt.calculate_actuation_timestamps(
+            exposure_time=result.exposure_time,
+            centers_x=[center[0] for center in new_defects],
+            frame_width=self.scale.length(INIT_WIDTH),
+            length_per_pixel=self.scale.mm_per_pixel)
+        self.relay_signal.emit(abs_actuation_timestamps)
+
+    def render_stage(self, result: DetectionResult) -> None:
+        """
+        Presentation stage: annotate the frame and send it to the UI.
+
+        Args:
+            result (DetectionResult): The detection outcome of a frame.
+        """
+        image: NDArray[np.uint8] = result.image
+        # Single channel planes are converted to colour for display only
+        if image.ndim == 2:
+            image = plane_to_bgr(
+                image, result.cfa_pattern,
+                dst=self.display_buffers.get("display", image.shape[:2] + (3,), depth=3))
+        points: list[tuple[int, int]] = [
+            (int(x), int(y)) for x, y in result.capsule_centers
+        ]
+        labels: list[int] = result.track_ids or list(range(1, len(points) + 1))
+        for label, point in zip(labels, points):
+            cv2.putText(
+                img=image, text=str(label), org=(point[0], point[1]),
+                fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+                # Draw a green filled circle
+                fontScale=2, color=(255, 0, 0), thickness=2
+            )
+
+        points = [
+            (int(x), int(y))
+            for x, y in result.abnormal_centers
+        ]
+        for index, point in enumerate(points):
+            cv2.circle(
+                img=image, center=point, radius=5,
+                # Draw a red filled circle
+                color=(0, 0, 255), thickness=5)
+
+        self.frame_count += 1
+        self.frame_signal.emit(
+            image, self.frame_count, result.exposure_time, result.processing_time,
+            self.telemetry.latest.resulting_frame_rate)
+
+        current_time: float = time.monotonic()
+        # The latency of an empty frame says nothing about the detection of capsules
+        if self.rate_controller is not None and not result.empty:
+            self.control_frame_rate(result.processing_time, current_time)
+        if current_time - self.last_metrics_time >= METRICS_INTERVAL_S:
+            self.last_metrics_time = current_time
+            metrics: dict = self.pipeline_metrics()
+            logging.debug("Pipeline metrics: %s", metrics)
+            self.metrics_signal.emit(metrics)
+
+    def control_frame_rate(self, processing_time: float, current_time: float) -> None:
+        """
+        Feed the detection latency of a frame to the rate controller, apply its frame rate
+        to the source when it changes and send the operating point to the UI.
+
+        Args:
+            processing_time (float): Detection time of the frame in seconds.
+            current_time (float): Host monotonic time in seconds.
+        """
+        point = self.rate_controller.observe(processing_time, current_time)
+        if point is None:
+            return
+        if abs(point.frame_rate - self.frame_rate) > 0.05 * self.frame_rate:
+            applied: float = self.source.set_frame_rate(point.frame_rate)
+            if applied > 0:
+                self.frame_rate = applied
+            logging.debug("Frame rate set to %.2f fps: %s", self.frame_rate, point)
+        self.rate_signal.emit({**asdict(point), "applied_rate": self.frame_rate})
+
+    def publish_telemetry(self, snapshot: TelemetrySnapshot) -> None:
+        """
+        Send a telemetry sample to the UI. Runs on the sampler thread.
+
+        Args:
+            snapshot (TelemetrySnapshot): The sampled telemetry.
+        """
+        self.camera_temperature_signal.emit(snapshot.temperature_status)
+        self.frame_loss.update_stream(snapshot.stream_statistics)
+        self.telemetry_signal.emit(asdict(snapshot))
+
+    def synchronize_clock(self) -> bool:
+        """
+        Latch the camera timestamp counter and pair it with the host monotonic clock.
+
+        Returns:
+            bool: True if the camera supports latching its timestamp counter.
+        """
+        self.last_clock_sync_time = time.monotonic()
+        host_before: float = time.monotonic()
+        camera_ticks: Optional[int] = self.source.latch_timestamp()
+        host_after: float = time.monotonic()
+        if camera_ticks is None:
+            return False
+        self.clock.add_sample(camera_ticks, (host_before + host_after) / 2)
+        return True
+
+    def exposure_time(self, camera_timestamp: int, arrival_time: float) -> float:
+        """
+        Convert the camera timestamp of a grab result to host monotonic time.
+
+        The mapping is refreshed by latching the camera counter every CLOCK_SYNC_INTERVAL_S.
+        Cameras without a latch feed the mapping from frame arrivals instead, which biases
+        the result by the mean transfer latency but keeps it independent of processing time.
+
+        Args:
+            camera_timestamp (int): Camera timestamp counter value of the grab result.
+            arrival_time (float): Host monotonic time at which the grab result was retrieved.
+
+        Returns:
+            float: Host monotonic time of the exposure.
+        """
+        if camera_timestamp <= 0:
+            return arrival_time
+        if not self.clock_latch_supported:
+            self.clock.add_sample(camera_timestamp, arrival_time)
+        elif arrival_time - self.last_clock_sync_time >= CLOCK_SYNC_INTERVAL_S:
+            self.synchronize_clock()
+        return self.clock.to_host(camera_timestamp)
+
+    def frame_loss_stats(self) -> FrameLossStats:
+        """
+        Count the frames exposed since the start of the acquisition and where they were lost.
+        Frames dropped by the render queue were inspected, only detection queue drops count.
+
+        Returns:
+            FrameLossStats: The frame counters.
+        """
+        return self.frame_loss.stats(
+            inspected=self.inspected_count,
+            dropped_by_queues=self.detect_queue.stats().dropped)
+
+    def pipeline_metrics(self) -> dict:
+        """
+        Collect the occupancy counters of every pipeline stage and the frame loss counters.
+
+        Returns:
+            dict: Stage name to a dict of its queue counters, processed frames and busy time,
+                "frames" to the frame loss counters, and "empty" to the number of empty belt
+                frames, the belt time they covered and the time spent on them in seconds.
+        """
+        metrics: dict = {}
+        for stage in self.stages:
+            metrics[stage.name] = {
+                **asdict(stage.inbox.stats()),
+                "processed": stage.processed,
+                "busy_time": stage.busy_time
+            }
+        stats: FrameLossStats = self.frame_loss_stats()
+        metrics["frames"] = {**asdict(stats), "lost": stats.lost}
+        metrics["empty"] = {
+            "frames": self.empty_count,
+            "belt_time": self.empty_belt_time,
+            "processing_time": self.empty_processing_time
+        }
+        return metrics
 
     def stop(self) -> None:
         """
-        Stops the camera feed by interrupting the thread and closing the camera connection.
+        Stops the camera feed by interrupting the thread and closing the frame source.
 
         This method:
         - Requests the thread to stop.
         - Waits for the thread to finish execution.
-        - Stops the camera from grabbing new frames.
-        - Closes the camera connection.
+        - Stops the frame source and closes the camera connection.
         """
         self.frame_count = 0
         self.requestInterruption()
         self.wait()
-        self.camera.StopGrabbing()
-        self.camera.Close()
+        self.telemetry.stop()
+        self.source.stop()
 
     def set_detection_params(self, params: DefectDetectionParams) -> None:
         """
         Set the defect detection parameters.
 
         This method updates the internal defect detection parameters used by the AOI system.
+        A new snapshot of the parameters and of their derived constants is built, the frames
+        already being detected finish with the previous one.
 
         Args:
             params (DefectDetectionParams): An instance of `DefectDetectionParams` containing
@@ -299,18 +629,25 @@ class CameraThread(QThread):
             None
 
         Example:
-            >>> class MockParams:
-            ...     threshold = 0.8
-            ...     max_defects = 5
-            >>> params = MockParams()
-            >>> camera_thread = CameraThread()
-            >>> camera_thread.set_detection_params(params)
-            >>> camera_thread.detection_params.threshold
-            0.8
-            >>> camera_thread.detection_params.max_defects
-            5
-        """
-        self.detection_params = params
+            >>> from src.frame_source import ReplayFrameSource
+            >>> thread = CameraThread(
+            ...     DefectDetectionParams(), source=ReplayFrameSource("data/Figs_14"))
+            >>> previous = thread.snapshot
+            >>> thread.set_detection_params(DefectDetectionParams(normal_length_lower=300))
+            >>> thread.snapshot is previous, thread.snapshot.version - previous.version
+            (False, 1)
+            >>> thread.detection_params.normal_length_lower, previous.params.normal_length_lower
+            (300, 310)
+        """
+        # A single reference assignment: a frame in progress keeps its own snapshot
+        self.snapshot = DetectionSnapshot.build(params, self.scale, self.snapshot.version + 1)
+
+    @property
+    def detection_params(self) -> DefectDetectionParams:
+        """
+        The defect detection parameters of the current snapshot.
+        """
+        return self.snapshot.params
 
 
 if __name__ == "__main__":
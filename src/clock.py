@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Mapping between the camera timestamp counter and the host monotonic clock.
+
+The camera stamps every frame with the value of its free-running counter at the start of
+exposure. Pairs of (camera ticks, host time) are collected either by latching the counter
+(`TimestampLatch`) or from frame arrivals, and a least squares line over a sliding window
+estimates both the offset and the relative drift between the two clocks.
+"""
+
+import threading
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+
+class CameraClockMapper:
+    """
+    Continuously estimated linear mapping from camera ticks to host monotonic seconds.
+
+    Example:
+        >>> mapper = CameraClockMapper(tick_frequency=1e9)
+        >>> mapper.is_synchronized
+        False
+        >>> for i in range(4):
+        ...     mapper.add_sample(camera_ticks=5_000_000_000 + i * 1_000_000_000,
+        ...                       host_time=100.0 + i * 1.00001)
+        >>> round(mapper.to_host(7_000_000_000), 5)
+        102.00002
+        >>> round(mapper.drift_ppm, 3)
+        10.0
+    """
+
+    tick_frequency: float
+    window: int
+
+    def __init__(self, tick_frequency: float = 1e9, window: int = 64) -> None:
+        """
+        Initialize the mapper.
+
+        Args:
+            tick_frequency (float): Frequency of the camera timestamp counter in Hz.
+            window (int): Number of most recent samples used for the estimate.
+        """
+        if tick_frequency <= 0:
+            raise ValueError("Tick frequency must be greater than 0.")
+        self.tick_frequency = tick_frequency
+        self.window = window
+        self._samples: deque = deque(maxlen=window)
+        self._origin: Optional[tuple[int, float]] = None
+        self._slope: float = 1.0
+        self._intercept: float = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_synchronized(self) -> bool:
+        """
+        Whether at least one sample has been collected.
+        """
+        return self._origin is not None
+
+    @property
+    def drift_ppm(self) -> float:
+        """
+        Estimated drift of the camera clock relative to the host clock in parts per million.
+        """
+        return float((self._slope - 1.0) * 1e6)
+
+    def add_sample(self, camera_ticks: int, host_time: float) -> None:
+        """
+        Add a (camera ticks, host time) correspondence and update the estimate.
+
+        Args:
+            camera_ticks (int): Value of the camera timestamp counter.
+            host_time (float): Host monotonic time in seconds at the same instant.
+        """
+        with self._lock:
+            if self._origin is None:
+                self._origin = (camera_ticks, host_time)
+            origin_ticks, origin_time = self._origin
+            self._samples.append((
+                (camera_ticks - origin_ticks) / self.tick_frequency,
+                host_time - origin_time))
+            camera_s, host_s = np.array(self._samples).T
+            if len(self._samples) >= 2 and np.ptp(camera_s) > 0:
+                self._slope, self._intercept = np.polyfit(camera_s, host_s, 1)
+            else:
+                self._slope = 1.0
+                self._intercept = float(np.mean(host_s - camera_s))
+
+    def to_host(self, camera_ticks: int) -> float:
+        """
+        Convert a camera timestamp to host monotonic seconds.
+
+        Args:
+            camera_ticks (int): Value of the camera timestamp counter.
+
+        Raises:
+            RuntimeError: If no sample has been collected yet.
+
+        Returns:
+            float: The corresponding host monotonic time in seconds.
+        """
+        with self._lock:
+            if self._origin is None:
+                raise RuntimeError("The camera clock is not synchronized.")
+            origin_ticks, origin_time = self._origin
+            camera_s: float = (camera_ticks - origin_ticks) / self.tick_frequency
+            return float(origin_time + self._intercept + self._slope * camera_s)
+
+    def reset(self) -> None:
+        """
+        Forget every sample, e.g. after the camera counter has been reset.
+        """
+        with self._lock:
+            self._samples.clear()
+            self._origin = None
+            self._slope, self._intercept = 1.0, 0.0
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
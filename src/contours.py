@@ -5,39 +5,56 @@
 Module for contour detection and extraction.
 """
 
+from typing import Optional
+
 import cv2
 import numpy as np
 from imutils import grab_contours
-from utils.transform import remove_zero_rows
-from utils.transform import cut_image_by_box
+
+from src.blobs import Blobs
+from src.buffer_pool import BufferPool
+from src.inspection_band import InspectionBand
+from src.params import INSPECTION_BAND
+from utils.rle import RunLengthMask
+from utils.transform import upright_crop_transform, warp_crop
 
 
-CONTOURS_DETECTION_DEBUG: bool = True
+# Draw the located capsules on a copy of every frame, which allocates it per frame
+CONTOURS_DETECTION_DEBUG: bool = False
+# Number of points of the contour of a capsule at full resolution
+CONTOUR_POINTS_RANGE: tuple[int, int] = (400, 1500)
+# Tolerance on the normal capsule length when locating capsules at full resolution
+LENGTH_MARGIN_PX: int = 20
+# Number of capsule crop slots allocated for a frame, more are allocated when needed
+CROP_SLOT_COUNT: int = 16
 
 
-def slice_head_tail_capsule_opened(target_opened: cv2.typing.MatLike) -> tuple[np.ndarray, np.ndarray]:
+def slice_head_tail_capsule_opened(
+    target_opened: cv2.typing.MatLike, widths: Optional[np.ndarray] = None
+) -> tuple[np.ndarray, np.ndarray]:
     """
     Slice the morphologically opened capsule image to head and tail ends for accurate detection.
 
     Args:
         target_opened (cv2.typing.MatLike): morphological opened image of the capsule target.
+        widths (Optional[np.ndarray]): Span of the foreground of every row of target_opened,
+            as given by `RunLengthMask.row_spans`, computed here if None.
 
     Returns:
         tuple[np.ndarray, np.ndarray]: Head and tail of the morphological opened capsule.
+
+    >>> target = np.zeros((8, 6), dtype=np.uint8)
+    >>> target[:4, 2:4] = target[4:, 1:5] = 255
+    >>> head, tail = slice_head_tail_capsule_opened(target)
+    >>> head.shape, bool(head[0, 1]), bool(tail[0, 1])
+    ((2, 6), True, False)
     """
+    if widths is None:
+        widths = RunLengthMask.from_image(target_opened).row_spans()
     # Calculate the max width for both tips
-    h, w = target_opened.shape
-    top_width, bottom_width = 0, 0
-    for row in target_opened[:int(0.35 * h), :]:
-        indices = np.where(row > 0)[0]
-        if len(indices) > 0:
-            width = indices[-1] - indices[0]
-            top_width = max(top_width, width)
-    for row in target_opened[-int(0.65 * h):, :]:
-        indices = np.where(row > 0)[0]
-        if len(indices) > 0:
-            width = indices[-1] - indices[0]
-            bottom_width = max(bottom_width, width)
+    h = target_opened.shape[0]
+    top_width: int = int(widths[:int(0.35 * h)].max(initial=0))
+    bottom_width: int = int(widths[-int(0.65 * h):].max(initial=0))
     # The tip with larger width is considered to be the top tip
     # the other end is considered as the bottom tip
     if top_width < bottom_width:
@@ -48,7 +65,207 @@ def slice_head_tail_capsule_opened(target_opened: cv2.typing.MatLike) -> tuple[n
         target_head_opened = target_opened[:int(0.25 * h), :]
     return target_head_opened, target_tail_opened
 
+
 # pylint: disable=too-many-locals
+def locate_capsules(
+    img_opened: cv2.typing.MatLike,
+    normal_length_range: tuple[int, int],
+    frame_width: Optional[int] = None,
+    points_range: tuple[int, int] = CONTOUR_POINTS_RANGE,
+    length_margin: int = LENGTH_MARGIN_PX,
+    center_bounds: Optional[tuple[float, float, float, float]] = None
+) -> list[cv2.typing.RotatedRect]:
+    """
+    Locate the capsules in a denoised binary image.
+
+    :param img_opened: Denoised binary image, or a left part of it.
+    :param normal_length_range: Normal range of capsule lengths.
+    :param frame_width: Width of the full frame, the width of img_opened by default.
+    :param points_range: Range of the number of points of a capsule contour.
+    :param length_margin: Tolerance on the normal range of capsule lengths.
+    :param center_bounds: Left, right, top and bottom bounds of the inspected centers in
+        img_opened, the default InspectionBand of the frame if None.
+    :return: Minimum enclosing rectangles of the capsules, sorted from right to left.
+
+    >>> img_opened = np.zeros((150, 300), dtype=np.uint8)
+    >>> _ = cv2.rectangle(img_opened, (100, 20), (229, 119), 255, -1)
+    >>> [tuple(map(float, rect[0])) for rect in locate_capsules(img_opened, (100, 140))]
+    [(164.5, 69.5)]
+    """
+    if frame_width is None:
+        frame_width = img_opened.shape[1]
+    if center_bounds is None:
+        center_bounds = InspectionBand(*INSPECTION_BAND).centers(frame_width, img_opened.shape[0])
+    left, right, top, bottom = center_bounds
+
+    # Step 1: Label the blobs of the denoised image with their bounding boxes
+    blobs = Blobs.extract(img_opened)
+
+    # Step 2: Discard the blobs which cannot be capsules from their bounding boxes alone
+    # A contour of n points spans at most n / 2 + 1 pixels, the longer side of the minimum
+    # rectangle lies between the larger side and the diagonal of the bounding box, and the
+    # center of the rectangle lies in the bounding box
+    x, y, w, h = blobs.boxes.T
+    span = np.maximum(w, h)
+    blobs = blobs.select(
+        (2 * (span - 1) < points_range[1]) &
+        (np.hypot(w, h) >= normal_length_range[0] - length_margin) &
+        (span - 1 <= np.sqrt(2) * (normal_length_range[1] + length_margin)) &
+        (x <= right) & (left <= x + w) & (y <= bottom) & (top <= y + h))
+    # Retreive the rectangular bounding box, x coordinates decreasing order (from right to left)
+    # and y coordinates increasing order (from bottom to top)
+    blobs = blobs.right_to_left()
+
+    # Step 3: Trace the remaining blobs, filter them on their number of contour points and
+    # extract the minimum bounding rectangle and its parameters
+    rects = []
+    for index in range(len(blobs)):
+        contour = blobs.contour(index)
+        if contour is None or not points_range[0] < len(contour) < points_range[1]:
+            continue
+        rect = cv2.minAreaRect(contour)
+        (center_x, center_y), length = rect[0], max(rect[1])
+        # remove the background noise and the capsules outside the inspection band
+        if length < normal_length_range[0] - length_margin or \
+                normal_length_range[1] + length_margin < length or \
+                not left <= center_x <= right or not top <= center_y <= bottom:
+            continue
+        # else:
+        rects.append(rect)
+    return rects
+
+
+def crop_capsules(
+    img_raw: cv2.typing.MatLike,
+    img_opened: cv2.typing.MatLike,
+    rects: list[cv2.typing.RotatedRect],
+    cfa_pattern: Optional[str] = None,
+    buffers: Optional[BufferPool] = None,
+    slot_length: int = 0
+) -> tuple[list, list]:
+    """
+    Cut the upright crops of the located capsules from the raw and denoised images.
+
+    Each capsule gets one affine transform, the quarter turn bringing it upright included,
+    applied to both images. With a pool, the crops are views into fixed-size slots shared
+    by the whole frame, overwritten by the next frame: they must not be kept beyond it.
+
+    :param img_raw: Original image.
+    :param img_opened: Denoised binary image.
+    :param rects: Minimum enclosing rectangles of the capsules.
+    :param cfa_pattern: Colour filter array layout if img_raw is a raw Bayer plane,
+        the crops are then demosaiced to BGR.
+    :param buffers: Pool holding the crop slots, the crops are allocated if None.
+    :param slot_length: Side of the square crop slots, enlarged to the longest crop.
+    :return: Tuple containing:
+        - capsule_set_raw: Cropped raw images of capsules.
+        - capsule_set_opened: Cropped denoised images of capsules.
+
+    >>> img_opened = np.zeros((150, 300), dtype=np.uint8)
+    >>> _ = cv2.rectangle(img_opened, (100, 20), (229, 119), 255, -1)
+    >>> rects = locate_capsules(img_opened, (100, 140))
+    >>> pool = BufferPool()
+    >>> raw, opened = crop_capsules(img_opened, img_opened, rects, buffers=pool)
+    >>> len(raw), raw[0].shape == opened[0].shape, raw[0].shape[0] > raw[0].shape[1]
+    (1, True, True)
+    >>> _ = crop_capsules(img_opened, img_opened, rects, buffers=pool)
+    >>> pool.allocations
+    2
+    """
+    boxes: list[np.ndarray] = []
+    transforms: list[tuple[np.ndarray, tuple[int, int]]] = []
+    for rect in rects:
+        # Expand the rectangle slightly for cropping
+        new_rect_size = (1.1 * rect[1][0], 1.2 * rect[1][1])
+        expanded_rect = (rect[0], new_rect_size, rect[2])
+        boxes.append(cv2.boxPoints(expanded_rect))
+        transforms.append(upright_crop_transform(boxes[-1]))
+
+    raw_slots: Optional[np.ndarray] = None
+    opened_slots: Optional[np.ndarray] = None
+    if buffers is not None and rects:
+        slot_length = max([slot_length] + [max(size) for _, size in transforms])
+        count: int = max(len(rects), CROP_SLOT_COUNT)
+        channels: tuple[int, ...] = (3,) if cfa_pattern is not None or img_raw.ndim == 3 else ()
+        raw_slots = buffers.get("crops_raw", (count, slot_length, slot_length) + channels)
+        opened_slots = buffers.get("crops_opened", (count, slot_length, slot_length))
+
+    capsule_set_raw: list[cv2.typing.MatLike] = []
+    capsule_set_opened: list[cv2.typing.MatLike] = []
+    for index, (box, (matrix, (width, height))) in enumerate(zip(boxes, transforms)):
+        raw_dst = raw_slots[index, :height, :width] if raw_slots is not None else None
+        opened_dst = opened_slots[index, :height, :width] if opened_slots is not None else None
+        capsule_set_raw.append(warp_crop(
+            img_raw, box, matrix, (width, height), cfa_pattern, dst=raw_dst))
+        capsule_set_opened.append(warp_crop(
+            img_opened, box, matrix, (width, height), dst=opened_dst))
+    return capsule_set_raw, capsule_set_opened
+
+
+def measure_capsules(
+    img_raw: cv2.typing.MatLike,
+    img_opened: cv2.typing.MatLike,
+    mask_binary: cv2.typing.MatLike,
+    rects: list[cv2.typing.RotatedRect],
+    cfa_pattern: Optional[str] = None,
+    buffers: Optional[BufferPool] = None,
+    slot_length: int = 0
+) -> tuple[list, list, list, list, list]:
+    """
+    Crop and measure the located capsules.
+
+    :param img_raw: Original image.
+    :param img_opened: Denoised binary image.
+    :param mask_binary: Binary mask of the standard capsule contour.
+    :param rects: Minimum enclosing rectangles of the capsules.
+    :param cfa_pattern: Colour filter array layout if img_raw is a raw Bayer plane,
+        the crops are then demosaiced to BGR.
+    :param buffers: Pool holding the crop slots, see `crop_capsules`.
+    :param slot_length: Side of the crop slots, see `crop_capsules`.
+    :return: Tuple containing:
+        - capsule_set_raw: Cropped raw images of capsules.
+        - capsule_set_opened: Cropped denoised images of capsules.
+        - capsule_size: Dimensions of the capsules (length, width).
+        - capsule_area: Areas of the capsule contours.
+        - capsule_similarity: Similarity scores to the standard mask.
+    """
+    # Step 4: Import the mask of the standard capsule
+    mask_opened_overall, mask_opened_head, mask_opened_tail \
+        = mask_binary, mask_binary[:int(0.25 * mask_binary.shape[0]), :], mask_binary[int(0.75 * mask_binary.shape[0]):, :]
+
+    # Step 5: Segment and analyze capsules
+    capsule_size, capsule_area, capsule_similarity = [], [], []
+
+    capsule_set_raw, capsule_set_opened = crop_capsules(
+        img_raw, img_opened, rects, cfa_pattern, buffers, slot_length)
+
+    for rect, target_opened in zip(rects, capsule_set_opened):
+        # Analyze contours in the cropped denoised image
+        length, width = max(rect[1]), min(rect[1])
+        # The runs of the crop give the rows of the capsule and their spans without
+        # rescanning the crop
+        rle = RunLengthMask.from_image(target_opened)
+        top, bottom = rle.row_range()
+        target_opened = target_opened[top:bottom]
+        target_head_opened, target_tail_opened = slice_head_tail_capsule_opened(
+            target_opened, rle.row_spans()[top:bottom])
+        main_contour, similarity_overall = calculate_contours_similarity(
+            target_opened, mask_opened_overall)
+        if main_contour is not None:
+            _, similarity_head = calculate_contours_similarity(
+                target_head_opened, mask_opened_head)
+            _, similarity_tail = calculate_contours_similarity(
+                target_tail_opened, mask_opened_tail)
+            area: float = cv2.contourArea(main_contour)
+
+            capsule_size.append(np.array([length, width]))
+            capsule_area.append(area)
+            capsule_similarity.append(
+                [similarity_overall, similarity_head, similarity_tail])
+        else:
+            raise ValueError("No main_contour exist.")
+
+    return capsule_set_raw, capsule_set_opened, capsule_size, capsule_area, capsule_similarity
 
 
 def find_contours_img(
@@ -56,6 +273,11 @@ def find_contours_img(
     img_opened: cv2.typing.MatLike,
     mask_binary: cv2.typing.MatLike,
     normal_length_range: tuple[int, int],
+    cfa_pattern: Optional[str] = None,
+    points_range: tuple[int, int] = CONTOUR_POINTS_RANGE,
+    length_margin: int = LENGTH_MARGIN_PX,
+    center_bounds: Optional[tuple[float, float, float, float]] = None,
+    buffers: Optional[BufferPool] = None
 ) -> tuple[list, list, list, list, list, list]:
     """
     Process images to detect capsule contours and extract relevant information.
@@ -63,6 +285,13 @@ def find_contours_img(
     :param img_raw: Original image.
     :param img_opened: Denoised binary image.
     :param mask_binary: Binary mask of the standard capsule contour.
+    :param cfa_pattern: Colour filter array layout if img_raw is a raw Bayer plane.
+    :param points_range: Range of the number of points of a capsule contour.
+    :param length_margin: Tolerance on the normal range of capsule lengths.
+    :param center_bounds: Left, right, top and bottom bounds of the inspected centers,
+        the default InspectionBand of the image if None.
+    :param buffers: Pool holding the crop slots of the frame, the crops are allocated
+        if None.
     :return: Tuple containing:
         - new_contours: Refined contours for cropped capsules.
         - capsule_set_raw: Cropped raw images of capsules.
@@ -85,36 +314,14 @@ def find_contours_img(
     >>> len(result[3]) == len(result[4]) == len(result[5])  # Size, area, similarity data
     True
     """
-    # Step 1: Detect contours in the denoised image
-    contours = cv2.findContours(
-        img_opened, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-    contours = grab_contours(contours)
-
-    # Step 2: Filter valid contours based on size threshold
-    # Sort the contours of the capsules in the list （x, y, w, h
-    # Retreive the rectangular bounding box, x coordinates decreasing order (from right to left)
-    # and y coordinates increasing order (from bottom to top)
-    contours = [c for c in contours if 400 < len(c) < 1500]
-    contours = sorted(
-        contours, key=lambda c: (-cv2.boundingRect(c)[0], cv2.boundingRect(c)[1]))
-
-    # Step 3: Extracting the minimum bounding rectangle and its parameters for each contour
-    rects, boxs, capsule_centers = [], [], []
-    for contour in contours:
-        rect = cv2.minAreaRect(contour)
-        center_x, length = rect[0][0], max(rect[1])
-        # remove the background noise
-        if length < normal_length_range[0] - 20 or normal_length_range[1] + 20 < length or \
-            center_x < 0.10 * img_raw.shape[1] or 0.90 * img_raw.shape[1] < center_x:
-            continue
-        # else:
-        capsule_centers.append(rect[0])
-        rects.append(rect)
-        box = np.int64(cv2.boxPoints(rect))
-        boxs.append(box)
+    rects = locate_capsules(
+        img_opened, normal_length_range, img_raw.shape[1], points_range, length_margin,
+        center_bounds)
+    capsule_centers = [rect[0] for rect in rects]
 
     # Visualization (optional)
     if CONTOURS_DETECTION_DEBUG:
+        boxs = [np.int64(cv2.boxPoints(rect)) for rect in rects]
         draw_img = img_raw.copy()
         draw_img = cv2.drawContours(draw_img, boxs, -1, (0, 0, 255), 2)
         for index, center in enumerate(capsule_centers):
@@ -124,53 +331,11 @@ def find_contours_img(
                 center[1])), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 0, 0), 2)
         # cv2.imwrite("Fig_0505_contours.png", draw_img)
 
-    # Step 4: Import the mask of the standard capsule
-    mask_opened_overall, mask_opened_head, mask_opened_tail \
-        = mask_binary, mask_binary[:int(0.25 * mask_binary.shape[0]), :], mask_binary[int(0.75 * mask_binary.shape[0]):, :]
-
-    # Step 5: Segment and analyze capsules
-    capsule_set_raw: list[cv2.typing.MatLike] = []
-    capsule_set_opened: list[cv2.typing.MatLike] = []
-    capsule_size, capsule_area, capsule_similarity = [], [], []
-
-    for rect in rects:
-        # Expand the rectangle slightly for cropping
-        new_rect_size = (1.1 * rect[1][0], 1.2 * rect[1][1])
-        expanded_rect = (rect[0], new_rect_size, rect[2])
-        cut_box = np.int64(cv2.boxPoints(expanded_rect))
-
-        # Crop images
-        target_raw = cut_image_by_box(img_raw, cut_box)  # type: ignore
-        target_opened = cut_image_by_box(img_opened, cut_box)  # type: ignore
-
-        # Ensure vertical alignment
-        if target_raw.shape[0] < target_raw.shape[1]:
-            target_raw = cv2.rotate(target_raw, cv2.ROTATE_90_COUNTERCLOCKWISE)
-            target_opened = cv2.rotate(
-                target_opened, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        capsule_set_raw.append(target_raw)
-        capsule_set_opened.append(target_opened)
-
-        # Analyze contours in the cropped denoised image
-        length, width = max(rect[1]), min(rect[1])
-        target_opened = remove_zero_rows(target_opened)
-        target_head_opened, target_tail_opened = slice_head_tail_capsule_opened(
-            target_opened)
-        main_contour, similarity_overall = calculate_contours_similarity(
-            target_opened, mask_opened_overall)
-        if main_contour is not None:
-            _, similarity_head = calculate_contours_similarity(
-                target_head_opened, mask_opened_head)
-            _, similarity_tail = calculate_contours_similarity(
-                target_tail_opened, mask_opened_tail)
-            area: float = cv2.contourArea(main_contour)
-
-            capsule_size.append(np.array([length, width]))
-            capsule_area.append(area)
-            capsule_similarity.append(
-                [similarity_overall, similarity_head, similarity_tail])
-        else:
-            raise ValueError("No main_contour exist.")
+    capsule_set_raw, capsule_set_opened, capsule_size, capsule_area, capsule_similarity \
+        = measure_capsules(
+            img_raw, img_opened, mask_binary, rects, cfa_pattern, buffers,
+            # The crops of the longest capsules are 1.2 times their length
+            int(1.2 * (normal_length_range[1] + length_margin)) + 1)
 
     return (
         capsule_set_raw, capsule_set_opened,
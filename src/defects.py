@@ -8,15 +8,18 @@ Module containing functions to detect defects in the given capsule in an image.
 
 import logging
 # pylint: disable=no-name-in-module
-from cv2 import absdiff, arcLength, bitwise_and, cvtColor, findContours, medianBlur, threshold
+from cv2 import absdiff, arcLength, bitwise_and, cvtColor, findContours, threshold
 from cv2 import COLOR_BGR2GRAY, CHAIN_APPROX_NONE, RETR_EXTERNAL, THRESH_BINARY
 from cv2.typing import MatLike
 
 from PyQt6.QtCore import QSettings
 
-from src.params import INIT_WIDTH
+from src.params import INIT_WIDTH, DEFECT_DENOISE
+from utils.denoise import denoise
 
 MIN_BINARY_THRESH: int = 6
+# Size of the median blur revealing local defects at full resolution
+DEFECT_MEDIAN_KERNEL_PX: int = 15
 MAX_LENGTH: int = 0
 
 settings: QSettings = QSettings("MinLab", "CapAOI")
@@ -31,15 +34,19 @@ logging.basicConfig(
 def detect_defects(
     raw_image: MatLike,
     mask: MatLike,
-    local_defect_length: int
+    local_defect_length: int,
+    median_kernel: int = DEFECT_MEDIAN_KERNEL_PX,
+    denoise_backend: str = DEFECT_DENOISE
 ) -> tuple[bool, float]:
     """
     Detect defects in the given capsule image based on the mask.
 
     Args:
-        raw_image (MatLike): Original capsule image.
+        raw_image (MatLike): Original capsule image, BGR or single channel.
         mask (MatLike): Binary mask for the capsule.
         local_defect_length (int): Length threshold for detecting local defects.
+        median_kernel (int): Odd size of the median blur the capsule is compared with.
+        denoise_backend (str): Filter standing in for the median blur, see utils.denoise.
 
     Returns:
         tuple[bool, float]: True if a defect is detected, False otherwise.
@@ -49,14 +56,14 @@ def detect_defects(
     # Focus on the central region of the capsule
     width_range: tuple[int, int] = (
         int(0.40 * masked_image.shape[1]), int(0.60 * masked_image.shape[1]))
-    central_region = masked_image[:, width_range[0]:width_range[1], :]
+    central_region = masked_image[:, width_range[0]:width_range[1]]
 
     # Perform median filtering and difference computation
-    filtered = medianBlur(central_region, 15)
+    filtered = denoise(central_region, median_kernel, denoise_backend)
     difference = absdiff(filtered, central_region)
 
     # Convert to grayscale and threshold
-    gray_diff = cvtColor(difference, COLOR_BGR2GRAY)
+    gray_diff = cvtColor(difference, COLOR_BGR2GRAY) if difference.ndim == 3 else difference
 
     _, binary_diff = threshold(
         gray_diff, MIN_BINARY_THRESH, 255, THRESH_BINARY)
@@ -90,7 +97,10 @@ def detect_capsule_defects(
     normal_area_range: tuple[int, int] = (30500, 35000),
     similarity_threshold_overall: float = 0.1,
     similarity_threshold_head: float = 0.3,
-    local_defect_length: int = 75
+    local_defect_length: int = 75,
+    frame_width: int = INIT_WIDTH,
+    median_kernel: int = DEFECT_MEDIAN_KERNEL_PX,
+    denoise_backend: str = DEFECT_DENOISE
 ) -> list[tuple[int, int]]:
     """
     Detect defects in capsules based on multiple criteria.
@@ -106,6 +116,9 @@ def detect_capsule_defects(
     :param similarity_threshold_overall: Threshold for contour similarity.
     :param similarity_threshold_head: 头部相似度阈值（低于阈值为正常）
     :param local_defect_length: Length threshold for detecting local defects.
+    :param frame_width: Width of the frame, the area is checked in its central part.
+    :param median_kernel: Odd size of the median blur revealing local defects.
+    :param denoise_backend: Filter standing in for the median blur, see utils.denoise.
     :return: List of centers of capsules flagged as abnormal.
     """
     # list of abnormal capsule centers, each indicated in the form of a point (x, y)
@@ -132,7 +145,7 @@ def detect_capsule_defects(
                 continue
 
         # Step 2 >> Check if the capsule has the proper area
-        if 0.40 * INIT_WIDTH < center[0] < 0.60 * INIT_WIDTH:
+        if 0.40 * frame_width < center[0] < 0.60 * frame_width:
             if not normal_area_range[0] <= area <= normal_area_range[1] and \
                     center not in abnormal_capsule_centers:
                 abnormal_capsule_centers.append(center)
@@ -154,7 +167,8 @@ def detect_capsule_defects(
                 continue
 
         # Step 4 >> Defect detection
-        partial_defect, max_length = detect_defects(raw_image, mask, local_defect_length)
+        partial_defect, max_length = detect_defects(
+            raw_image, mask, local_defect_length, median_kernel, denoise_backend)
         if partial_defect and center not in abnormal_capsule_centers:
             abnormal_capsule_centers.append(center)
             if not DEFECTS_DETECTION_DEBUG:
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module running the capsule detection chain on a single frame.
+Background removal, segmentation, contour extraction and defect detection are kept
+together here so that every pipeline stage or worker shares the same implementation.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+import cv2
+import numpy as np
+from numpy.typing import NDArray
+
+from src.buffer_pool import BufferPool
+from src.contours import find_contours_img
+from src.defects import detect_capsule_defects
+from src.frame_source import GrabbedFrame
+from src.incremental import IncrementalSegmenter
+from src.inspection_band import InspectionBand, clear_outside
+from src.parameter import DefectDetectionParams
+from src.params import ROOT_DIR, PROCESSING_SCALE, SEGMENTATION_PYRAMID_SCALE
+from src.params import INSPECTION_BAND, EMPTY_BELT_SKIP, EMPTY_BELT_STEP_PX
+from src.params import SEGMENTATION_DENOISE, DEFECT_DENOISE
+from src.scaling import ProcessingScale
+from src.snapshot import DetectionSnapshot
+from src.striping import StripedExecutor
+
+from utils.transform import gray_plane, sample_tiles
+from utils.transform import get_img_opened, get_img_opened_pyramid, remove_zero_rows
+
+# Initialize the constant variables
+MASK_IMG_PATH: str = os.path.join(
+    ROOT_DIR, "data", "Figs_14", "Capsule_1_mask_binary.png")
+# pylint: disable=no-member
+MASK_BIN: cv2.typing.MatLike = cv2.imread(MASK_IMG_PATH, cv2.IMREAD_GRAYSCALE)
+MASK_BIN = remove_zero_rows(MASK_BIN)
+
+
+@dataclass(slots=True)
+class FramePacket:
+    """
+    A grabbed frame travelling from the acquisition stage to the detection stage.
+
+    Attributes:
+        frame_id (int): Sequence number of the grabbed frame.
+        frame (GrabbedFrame): The frame, owning its image or holding the grab buffer.
+        exposure_time (float): Host monotonic time at which the frame was exposed.
+        camera_timestamp (int): Camera timestamp counter value of the exposure.
+    """
+    frame_id: int
+    frame: GrabbedFrame
+    exposure_time: float
+    camera_timestamp: int = 0
+
+
+@dataclass(slots=True)
+class DetectionResult:
+    """
+    The outcome of the detection stage for one frame, consumed by the presentation stage.
+
+    Attributes:
+        frame_id (int): Sequence number of the grabbed frame.
+        image (NDArray[np.uint8]): BGR image or single channel plane with the background removed.
+        exposure_time (float): Host monotonic time of the exposure, base of the actuation
+            timestamps.
+        processing_time (float): Time spent in the detection chain in seconds.
+        capsule_centers (list[tuple[float, float]]): Centers of every detected capsule.
+        abnormal_centers (list[tuple[float, float]]): Centers of the defective capsules.
+        track_ids (list[int]): Persistent capsule ID of every center, set by the tracker.
+        cfa_pattern (Optional[str]): Colour filter array layout if the image is a raw
+            Bayer plane.
+        empty (bool): Whether the belt was empty and the detection skipped, the image is
+            then the frame as it was grabbed.
+    """
+    frame_id: int
+    image: NDArray[np.uint8]
+    exposure_time: float
+    processing_time: float = 0.0
+    capsule_centers: list = field(default_factory=list)
+    abnormal_centers: list = field(default_factory=list)
+    track_ids: list = field(default_factory=list)
+    cfa_pattern: Optional[str] = None
+    empty: bool = False
+
+
+def inspection_view(
+    shape: tuple[int, ...], params: Union[DefectDetectionParams, DetectionSnapshot],
+    band: InspectionBand = InspectionBand(*INSPECTION_BAND),
+    scale: ProcessingScale = ProcessingScale(PROCESSING_SCALE)
+) -> tuple[int, int, int, int]:
+    """
+    View of a frame processed by `detect_frame`.
+
+    It holds the crops of the capsules centered in the band, which extend to 0.55 times the
+    longest capsule length from their center, and the pixels affecting their segmentation.
+
+    Args:
+        shape (tuple[int, ...]): Shape of the frame.
+        params (Union[DefectDetectionParams, DetectionSnapshot]): Defect detection
+            parameters tuned at full resolution, or their snapshot.
+        band (InspectionBand): Lane of the inspected capsule centers.
+        scale (ProcessingScale): Processing scale of the frame, that of the snapshot if
+            params is one.
+
+    Returns:
+        tuple[int, int, int, int]: Left, top, right and bottom bounds of the view.
+
+    >>> inspection_view((1440, 2160), DefectDetectionParams())
+    (0, 0, 2160, 1440)
+    >>> inspection_view((1440, 2160), DefectDetectionParams(), InspectionBand(0.3, 0.7, 0.25, 0.75))
+    (432, 144, 1728, 1296)
+    """
+    return band.view(shape[1], shape[0], DetectionSnapshot.of(params, scale).view_reach)
+
+
+def belt_empty(
+    image: NDArray[np.uint8], params: Union[DefectDetectionParams, DetectionSnapshot],
+    cfa_pattern: Optional[str] = None, background_removed: bool = False,
+    band: InspectionBand = InspectionBand(*INSPECTION_BAND),
+    scale: ProcessingScale = ProcessingScale(PROCESSING_SCALE)
+) -> bool:
+    """
+    Cheap occupancy test of a frame, run before the detection chain.
+
+    The foreground area of the view processed by `detect_frame` is estimated on tiles
+    sampled every EMPTY_BELT_STEP_PX pixels. A capsule centered in the band lies entirely in
+    the view, so a frame is empty when the estimate is well below the area of a capsule.
+
+    Args:
+        image (NDArray[np.uint8]): BGR image or single channel plane of the frame.
+        params (Union[DefectDetectionParams, DetectionSnapshot]): Defect detection
+            parameters tuned at full resolution, or their snapshot.
+        cfa_pattern (Optional[str]): Colour filter array layout of a raw Bayer plane.
+        background_removed (bool): Whether the background was already removed from the image.
+        band (InspectionBand): Lane of the inspected capsule centers.
+        scale (ProcessingScale): Processing scale of the frame, that of the snapshot if
+            params is one.
+
+    Returns:
+        bool: True if no capsule can be inspected in the frame.
+
+    >>> image = np.full((1440, 2160, 3), (90, 100, 110), np.uint8)
+    >>> belt_empty(image, DefectDetectionParams())
+    True
+    >>> _ = cv2.ellipse(image, ((1000, 700), (320, 120), 0), (235, 240, 245), -1)
+    >>> belt_empty(image, DefectDetectionParams())
+    False
+    """
+    snapshot: DetectionSnapshot = DetectionSnapshot.of(params, scale)
+    left, top, right, bottom = inspection_view(image.shape, snapshot, band)
+    sample: NDArray[np.uint8] = sample_tiles(
+        image[top:bottom, left:right], EMPTY_BELT_STEP_PX)
+    if sample.size == 0:
+        return True
+    if background_removed:
+        foreground: int = cv2.countNonZero(
+            sample if sample.ndim == 2 else cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY))
+    else:
+        foreground = cv2.countNonZero(snapshot.classifier.foreground_mask(sample, cfa_pattern))
+    area: float = foreground / (sample.shape[0] * sample.shape[1]) \
+        * (bottom - top) * (right - left)
+    return area < snapshot.empty_area
+
+
+def detect_frame(
+    image: NDArray[np.uint8],
+    params: Union[DefectDetectionParams, DetectionSnapshot],
+    mask_binary: cv2.typing.MatLike = MASK_BIN,
+    background_removed: bool = False,
+    segmenter: Optional[IncrementalSegmenter] = None,
+    exposure_time: float = 0.0,
+    buffers: Optional[BufferPool] = None,
+    cfa_pattern: Optional[str] = None,
+    pyramid_scale: int = SEGMENTATION_PYRAMID_SCALE,
+    scale: ProcessingScale = ProcessingScale(PROCESSING_SCALE),
+    striper: Optional[StripedExecutor] = None,
+    band: InspectionBand = InspectionBand(*INSPECTION_BAND),
+    skip_empty: bool = EMPTY_BELT_SKIP,
+    denoise_backend: str = SEGMENTATION_DENOISE,
+    defect_denoise_backend: str = DEFECT_DENOISE
+) -> tuple[NDArray[np.uint8], list, list]:
+    """
+    Run the full detection chain on a frame.
+
+    The frame is converted once to a grayscale plane, which is segmented and from which
+    the capsules are cropped for the defect detection. A raw Bayer plane is segmented as it
+    is, its background pixels are exactly black.
+
+    Args:
+        image (NDArray[np.uint8]): BGR image or single channel plane of the frame.
+        params (Union[DefectDetectionParams, DetectionSnapshot]): Defect detection
+            parameters tuned at full resolution, or the snapshot taken for the frame.
+        mask_binary (cv2.typing.MatLike): Binary mask of the standard capsule contour.
+        background_removed (bool): Whether the background was already removed from the image.
+        segmenter (Optional[IncrementalSegmenter]): Segmenter re-processing only the strip
+            that entered since the previous frame, the full frame is segmented if None.
+        exposure_time (float): Exposure time of the frame, used by the segmenter.
+        buffers (Optional[BufferPool]): Pool of the full-frame intermediates. The returned
+            image is then one of its buffers, overwritten by the next call.
+        cfa_pattern (Optional[str]): Colour filter array layout if the image is a raw
+            Bayer plane.
+        pyramid_scale (int): Reduction factor of the coarse image locating the capsules
+            before the full frame is denoised around them, 0 denoises the full frame.
+        scale (ProcessingScale): Processing scale the frame was brought to, from which
+            the pixel thresholds and kernel sizes of the full resolution are derived,
+            that of the snapshot if params is one.
+        striper (Optional[StripedExecutor]): Thread pool removing the background and
+            denoising the full frame by stripes, in the calling thread if None.
+        band (InspectionBand): Lane of the inspected capsule centers, the frame is only
+            processed within the reach of its capsules.
+        skip_empty (bool): Return the frame as it is, without any capsule, when
+            `belt_empty` finds no capsule to inspect.
+        denoise_backend (str): Filter standing in for the median blur of the segmentation,
+            not used by the segmenter which has its own.
+        defect_denoise_backend (str): Filter standing in for the median blur of the local
+            defect check.
+
+    Returns:
+        tuple[NDArray[np.uint8], list, list]: The image with the background removed,
+        black outside of the processed view, the centers of every capsule and the centers
+        of the defective capsules, in the coordinates of the frame.
+    """
+    # Only the view of the frame reached by the capsules of the inspection band is processed
+    snapshot: DetectionSnapshot = DetectionSnapshot.of(params, scale)
+    height, width = image.shape[:2]
+    left, top, right, bottom = view = inspection_view(image.shape, snapshot, band)
+    if skip_empty and belt_empty(image, snapshot, cfa_pattern, background_removed, band):
+        return image, [], []
+
+    # Remove the background colour from the image
+    if not background_removed:
+        frame: NDArray[np.uint8] = image[top:bottom, left:right]
+        image = buffers.get_like("background_removed", image) if buffers is not None \
+            else np.empty_like(image)
+        clear_outside(image, view)
+        mask: Optional[NDArray[np.uint8]] = None if buffers is None \
+            else buffers.get("mask", (height, width))[top:bottom, left:right]
+        if striper is not None:
+            striper.remove_background(
+                snapshot.classifier, frame, cfa_pattern, dst=image[top:bottom, left:right],
+                mask=mask)
+        else:
+            snapshot.classifier.remove_background(
+                frame, cfa_pattern, dst=image[top:bottom, left:right], mask=mask)
+    image_view: NDArray[np.uint8] = image[top:bottom, left:right]
+
+    kernel_size: int = snapshot.kernel_size
+    normal_length_range: tuple[int, int] = snapshot.normal_length_range
+    center_bounds: tuple[float, float, float, float] = band.centers(width, height, (left, top))
+    # Grayscale plane shared by the segmentation and the defect detection
+    gray: NDArray[np.uint8] = gray_plane(
+        image_view, cfa_pattern,
+        dst=buffers.get("gray", image_view.shape[:2]) if buffers is not None else None)
+    plane: NDArray[np.uint8] = image_view if cfa_pattern is not None else gray
+    if segmenter is not None:
+        capsule_set_raw, capsule_set_opened, \
+            capsule_centers, capsule_size, capsule_area, capsule_similarity \
+            = segmenter.segment(
+                plane, exposure_time, mask_binary, normal_length_range, gray, center_bounds)
+    else:
+        # Obtain the morphologically processed copy of the image
+        if pyramid_scale > 0 and buffers is not None:
+            image_opened: cv2.typing.MatLike = get_img_opened_pyramid(
+                plane, pyramid_scale, dst=buffers.get("opened", plane.shape[:2]),
+                kernel_size=kernel_size, denoise_backend=denoise_backend)
+        elif pyramid_scale > 0:
+            image_opened = get_img_opened_pyramid(
+                plane, pyramid_scale, kernel_size=kernel_size, denoise_backend=denoise_backend)
+        elif striper is not None:
+            image_opened = striper.get_img_opened(
+                plane, dst=buffers.get("opened", plane.shape[:2]) if buffers else None,
+                kernel_size=kernel_size, denoise_backend=denoise_backend)
+        elif buffers is not None:
+            image_opened = get_img_opened(
+                plane, dst=buffers.get("opened", plane.shape[:2]),
+                img_blurred=buffers.get("blurred", plane.shape[:2]), kernel_size=kernel_size,
+                denoise_backend=denoise_backend)
+        else:
+            image_opened = get_img_opened(
+                plane, kernel_size=kernel_size, denoise_backend=denoise_backend)
+
+        # Find the contours in the image
+        capsule_set_raw, capsule_set_opened, \
+            capsule_centers, capsule_size, capsule_area, capsule_similarity \
+            = find_contours_img(
+                gray, image_opened, mask_binary,
+                normal_length_range=normal_length_range,
+                points_range=snapshot.points_range,
+                length_margin=snapshot.length_margin,
+                center_bounds=center_bounds,
+                buffers=buffers
+            )
+    # Back to the coordinates of the frame
+    capsule_centers = [(x + left, y + top) for x, y in capsule_centers]
+
+    # Detect the defective capsules
+    capsule_centers_abnormal = detect_capsule_defects(
+        capsule_images_raw=capsule_set_raw,
+        capsule_masks=capsule_set_opened,
+        capsule_centers=capsule_centers,
+        capsule_sizes=capsule_size,
+        capsule_areas=capsule_area,
+        capsule_similarities=capsule_similarity,
+        normal_length_range=normal_length_range,
+        normal_width_range=snapshot.normal_width_range,
+        normal_area_range=snapshot.normal_area_range,
+        similarity_threshold_overall=snapshot.scaled.similarity_threshold_overall,
+        similarity_threshold_head=snapshot.scaled.similarity_threshold_head,
+        local_defect_length=snapshot.scaled.local_defect_length,
+        frame_width=snapshot.frame_width,
+        median_kernel=snapshot.defect_median_kernel,
+        denoise_backend=defect_denoise_backend
+    )
+    return image, capsule_centers, capsule_centers_abnormal
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Multi-process detection backend.
+
+Frames are copied into slots of a shared memory block and detected by a pool of worker
+processes, so the OpenCV calls and the Python loops around them scale with the number of
+cores. Results come back out of order and are reassembled in submission order before
+they are handed to the next pipeline stage, together with the metadata of their frame
+(e.g. the exposure time used as the base of the actuation timestamps).
+"""
+
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.parameter import DefectDetectionParams
+from src.params import EMPTY_BELT_SKIP, PROCESSING_SCALE
+from src.pipeline import BoundedQueue, DropPolicy
+from src.scaling import ProcessingScale
+from src.snapshot import DetectionSnapshot
+
+
+@dataclass(slots=True)
+class FarmResult:
+    """
+    Detection outcome of one frame, delivered in submission order.
+
+    Attributes:
+        sequence (int): Submission sequence number of the frame.
+        metadata (Any): Object passed to `DetectionFarm.submit` with the frame.
+        image (Optional[NDArray[np.uint8]]): BGR image with the background removed,
+            None if the detection failed.
+        processing_time (float): Time spent in the detection chain by the worker.
+        capsule_centers (list): Centers of every detected capsule.
+        abnormal_centers (list): Centers of the defective capsules.
+        empty (bool): Whether the belt was empty and the detection skipped.
+    """
+    sequence: int
+    metadata: Any
+    image: Optional[NDArray[np.uint8]]
+    processing_time: float = 0.0
+    capsule_centers: list = field(default_factory=list)
+    abnormal_centers: list = field(default_factory=list)
+    empty: bool = False
+
+
+# pylint: disable=too-many-arguments
+def _worker_main(
+    shm_name: str, slot_bytes: int, tasks: mp.Queue, results: mp.Queue
+) -> None:
+    """
+    Entry point of a worker process: detect the frames of the tasks until None is received.
+    The image with the background removed is written back into the slot of the frame.
+    """
+    # Imported here so that the parent does not pay for it when the farm is not used
+    # pylint: disable=import-outside-toplevel
+    from src.buffer_pool import BufferPool
+    from src.detection import belt_empty, detect_frame
+
+    buffers: BufferPool = BufferPool()
+    shm = SharedMemory(name=shm_name)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            sequence, slot, shape, snapshot, cfa_pattern = task
+            frame: NDArray[np.uint8] = np.ndarray(
+                shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            start_time: float = time.perf_counter()
+            try:
+                # Frames of an empty belt are left in the slot as they are
+                empty: bool = EMPTY_BELT_SKIP and belt_empty(
+                    frame, snapshot, cfa_pattern)
+                capsule_centers, abnormal_centers = [], []
+                if not empty:
+                    image, capsule_centers, abnormal_centers = detect_frame(
+                        frame, snapshot, buffers=buffers, cfa_pattern=cfa_pattern,
+                        skip_empty=False)
+                    np.copyto(frame, image)
+                results.put((
+                    sequence, slot, time.perf_counter() - start_time,
+                    [tuple(map(float, c)) for c in capsule_centers],
+                    [tuple(map(float, c)) for c in abnormal_centers], empty, None))
+            # pylint: disable=broad-except
+            except Exception as e:
+                results.put((sequence, slot, 0.0, [], [], False, str(e)))
+            del frame
+    finally:
+        shm.close()
+
+
+class DetectionFarm:
+    """
+    A pool of detection worker processes fed through shared memory.
+
+    Example:
+        >>> farm = DetectionFarm(workers=1, frame_shape=(4, 4, 3))
+        >>> farm.submit(np.zeros((4, 4, 3), np.uint8), DefectDetectionParams(), "frame 1")
+        >>> result = farm.output.get(timeout=60.0)
+        >>> result.sequence, result.metadata, result.abnormal_centers
+        (1, 'frame 1', [])
+        >>> farm.close()
+    """
+
+    workers: int
+    slots: int
+    slot_bytes: int
+    output: BoundedQueue
+
+    def __init__(
+        self, workers: int, frame_shape: tuple[int, ...], slots: Optional[int] = None,
+        output_size: int = 2
+    ) -> None:
+        """
+        Start the worker processes.
+
+        Args:
+            workers (int): Number of worker processes.
+            frame_shape (tuple[int, ...]): Largest frame shape the farm accepts.
+            slots (Optional[int]): Number of shared memory slots, two per worker by default.
+            output_size (int): Capacity of the queue of in-order results.
+
+        Raises:
+            ValueError: If the number of workers is not greater than 0.
+        """
+        if workers <= 0:
+            raise ValueError("Number of workers must be greater than 0.")
+        self.workers = workers
+        self.slots = slots if slots is not None else 2 * workers
+        self.slot_bytes = int(np.prod(frame_shape))
+        self.output = BoundedQueue("collect", output_size, DropPolicy.BLOCK)
+
+        self._shm = SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self._free_slots: queue.Queue = queue.Queue()
+        for slot in range(self.slots):
+            self._free_slots.put(slot)
+        # Metadata, shape, slot and worker of the frames submitted and not yet published
+        self._pending: dict[int, tuple[Any, tuple[int, ...], int, int]] = {}
+        self._pending_lock = threading.Lock()
+        self._next_sequence: int = 1
+        # Sequences handed to each worker and not yet returned, failed if the worker dies
+        self._assigned: list[set[int]] = [set() for _ in range(workers)]
+
+        context = mp.get_context("spawn")
+        # Each worker has its own task queue, so that the frames of a dead worker are known
+        self._tasks: list[mp.Queue] = [context.Queue() for _ in range(workers)]
+        self._results: mp.Queue = context.Queue()
+        self._processes = [
+            context.Process(
+                target=_worker_main, name=f"detect-{index}", daemon=True,
+                args=(self._shm.name, self.slot_bytes, self._tasks[index], self._results))
+            for index in range(workers)
+        ]
+        for process in self._processes:
+            process.start()
+        self._collector = threading.Thread(
+            target=self._collect, name="collect", daemon=True)
+        self._closing = threading.Event()
+        self._collector.start()
+
+    @property
+    def alive(self) -> bool:
+        """
+        True while at least one worker process is running.
+        """
+        return any(process.is_alive() for process in self._processes)
+
+    def submit(
+        self, image: NDArray[np.uint8], params: Union[DefectDetectionParams, DetectionSnapshot],
+        metadata: Any = None,
+        timeout: Optional[float] = None, cfa_pattern: Optional[str] = None,
+        scale: ProcessingScale = ProcessingScale(PROCESSING_SCALE)
+    ) -> None:
+        """
+        Copy a frame into a free slot and queue it to the least busy live worker.
+        Blocks while every slot is in use.
+
+        Args:
+            image (NDArray[np.uint8]): BGR image or single channel plane of the frame.
+            params (Union[DefectDetectionParams, DetectionSnapshot]): Defect detection
+                parameters of the frame, or their snapshot.
+            metadata (Any): Object returned with the result, e.g. the exposure time.
+            timeout (Optional[float]): Maximum waiting time for a free slot in seconds.
+            cfa_pattern (Optional[str]): Colour filter array layout of a raw Bayer plane.
+            scale (ProcessingScale): Processing scale the frame was brought to, that of the
+                snapshot if params is one.
+
+        Raises:
+            ValueError: If the frame is larger than a slot.
+            queue.Empty: If no slot was freed within the timeout.
+            RuntimeError: If every worker process has exited.
+        """
+        if image.nbytes > self.slot_bytes:
+            raise ValueError("The frame does not fit into a shared memory slot.")
+        slot: int = self._free_slots.get(timeout=timeout)
+        frame: NDArray[np.uint8] = np.ndarray(
+            image.shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(frame, image)
+        del frame
+        with self._pending_lock:
+            alive: list[int] = [
+                index for index, process in enumerate(self._processes) if process.is_alive()]
+            if not alive:
+                self._free_slots.put(slot)
+                raise RuntimeError("Every detection worker has exited.")
+            worker: int = min(alive, key=lambda index: len(self._assigned[index]))
+            sequence: int = self._next_sequence
+            self._next_sequence += 1
+            self._pending[sequence] = (metadata, image.shape, slot, worker)
+            self._assigned[worker].add(sequence)
+        # The snapshot travels with the frame, so a worker never mixes two parameter sets
+        self._tasks[worker].put((
+            sequence, slot, image.shape, DetectionSnapshot.of(params, scale), cfa_pattern))
+
+    def _collect(self) -> None:
+        """
+        Reassemble the worker results in submission order and publish them to `output`.
+        """
+        reorder: dict[int, tuple] = {}
+        next_sequence: int = 1
+        while True:
+            with self._pending_lock:
+                idle: bool = not self._pending
+            if idle and self._closing.is_set():
+                break
+            try:
+                result = self._results.get(timeout=0.1)
+            except queue.Empty:
+                # Results a worker sent before dying have been received by now
+                self._fail_dead_workers(reorder)
+            else:
+                with self._pending_lock:
+                    # A result of a frame already failed is dropped, its slot was recycled
+                    if result[0] not in self._pending or result[0] in reorder:
+                        continue
+                    self._assigned[self._pending[result[0]][3]].discard(result[0])
+                reorder[result[0]] = result
+            while next_sequence in reorder:
+                sequence, slot, processing_time, centers, abnormal, empty, error = \
+                    reorder.pop(next_sequence)
+                with self._pending_lock:
+                    metadata, shape, _, _ = self._pending.pop(sequence)
+                image: Optional[NDArray[np.uint8]] = None
+                if error is None:
+                    image = np.ndarray(
+                        shape, dtype=np.uint8, buffer=self._shm.buf,
+                        offset=slot * self.slot_bytes).copy()
+                else:
+                    logging.error("Detection of frame %s failed: %s", sequence, error)
+                self._free_slots.put(slot)
+                self.output.put(FarmResult(
+                    sequence=sequence, metadata=metadata, image=image,
+                    processing_time=processing_time,
+                    capsule_centers=centers, abnormal_centers=abnormal, empty=empty))
+                next_sequence += 1
+        self.output.close()
+
+    def _fail_dead_workers(self, reorder: dict[int, tuple]) -> None:
+        """
+        Fail the frames handed to workers that have exited, so that their slots are
+        recycled and the frames after them are published.
+
+        Args:
+            reorder (dict[int, tuple]): Results waiting for their turn, by sequence.
+        """
+        with self._pending_lock:
+            for index, process in enumerate(self._processes):
+                if process.is_alive() or not self._assigned[index]:
+                    continue
+                error: str = f"worker {process.name} exited with code {process.exitcode}"
+                for sequence in self._assigned[index]:
+                    reorder[sequence] = (
+                        sequence, self._pending[sequence][2], 0.0, [], [], False, error)
+                self._assigned[index].clear()
+
+    def close(self) -> None:
+        """
+        Wait for the submitted frames to be published, then stop the workers
+        and free the shared memory.
+        """
+        self._closing.set()
+        self._collector.join()
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._shm.close()
+        self._shm.unlink()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Accounting of the frames that were exposed but never inspected.
+
+A frame can be lost at three places: skipped by the grab strategy because a newer frame
+arrived first, dropped by the stream grabber (failed or missing buffers), or dropped by
+one of the bounded queues of the pipeline. The counter tracks each of them, together with
+the gaps in the transport layer block IDs that cross-check the first two.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from src.frame_source import GrabbedFrame
+
+# Stream grabber counters of frames the transport layer failed to deliver
+STREAM_DROP_COUNTERS: tuple[str, ...] = (
+    "failed_buffer_count", "buffer_underrun_count", "missed_frame_count")
+
+
+@dataclass(slots=True)
+class FrameLossStats:
+    """
+    Frame counters since the start of the acquisition.
+
+    Attributes:
+        grabbed (int): Frames retrieved from the source.
+        inspected (int): Frames that went through the detection.
+        skipped_by_strategy (int): Frames replaced by a newer one before being retrieved.
+        dropped_by_stream (int): Frames the stream grabber failed to deliver.
+        dropped_by_queues (int): Frames dropped by the pipeline queues.
+        missing_block_ids (int): Frames missing from the sequence of block IDs.
+    """
+    grabbed: int = 0
+    inspected: int = 0
+    skipped_by_strategy: int = 0
+    dropped_by_stream: int = 0
+    dropped_by_queues: int = 0
+    missing_block_ids: int = 0
+
+    @property
+    def lost(self) -> int:
+        """
+        Frames exposed but not inspected.
+        """
+        return self.skipped_by_strategy + self.dropped_by_stream + self.dropped_by_queues
+
+    @property
+    def inspected_ratio(self) -> float:
+        """
+        Fraction of the exposed frames that were inspected.
+        """
+        total: int = self.inspected + self.lost
+        return self.inspected / total if total else 1.0
+
+
+class FrameLossCounter:
+    """
+    Counts the frames lost between the sensor and the detection.
+
+    Example:
+        >>> counter = FrameLossCounter()
+        >>> counter.update_stream({"failed_buffer_count": 2})
+        >>> for block_id, skipped in ((1, 0), (2, 0), (6, 3)):
+        ...     _ = counter.record(GrabbedFrame(None, 0, 0.0, block_id=block_id,
+        ...                                     skipped_images=skipped))
+        >>> counter.update_stream({"failed_buffer_count": 3})
+        >>> stats = counter.stats(inspected=2, dropped_by_queues=1)
+        >>> stats.skipped_by_strategy, stats.dropped_by_stream, stats.missing_block_ids
+        (3, 1, 3)
+        >>> stats.lost
+        5
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Restart counting, e.g. when the acquisition starts.
+        """
+        self._grabbed: int = 0
+        self._skipped: int = 0
+        self._missing: int = 0
+        self._last_block_id: Optional[int] = None
+        self._stream_baseline: Optional[int] = None
+        self._stream_dropped: int = 0
+
+    def record(self, frame: GrabbedFrame) -> int:
+        """
+        Record a retrieved frame.
+
+        Args:
+            frame (GrabbedFrame): The retrieved frame.
+
+        Returns:
+            int: Number of block IDs missing before this frame.
+        """
+        self._grabbed += 1
+        self._skipped += frame.skipped_images
+        gap: int = 0
+        if frame.block_id is not None:
+            # A lower block ID means the counter wrapped around or the camera restarted
+            if self._last_block_id is not None and frame.block_id > self._last_block_id:
+                gap = frame.block_id - self._last_block_id - 1
+            self._last_block_id = frame.block_id
+        self._missing += gap
+        return gap
+
+    def update_stream(self, stream_statistics: dict[str, int]) -> None:
+        """
+        Update the frames dropped by the stream grabber from its counters.
+        The first statistics received are the baseline.
+
+        Args:
+            stream_statistics (dict[str, int]): Counters of `FrameSource.stream_statistics`.
+        """
+        total: int = sum(stream_statistics.get(name, 0) for name in STREAM_DROP_COUNTERS)
+        if self._stream_baseline is None:
+            self._stream_baseline = total
+        self._stream_dropped = max(0, total - self._stream_baseline)
+
+    def stats(self, inspected: int, dropped_by_queues: int) -> FrameLossStats:
+        """
+        Snapshot of the counters.
+
+        Args:
+            inspected (int): Frames that went through the detection.
+            dropped_by_queues (int): Frames dropped by the pipeline queues.
+
+        Returns:
+            FrameLossStats: The frame counters.
+        """
+        return FrameLossStats(
+            grabbed=self._grabbed, inspected=inspected,
+            skipped_by_strategy=self._skipped, dropped_by_stream=self._stream_dropped,
+            dropped_by_queues=dropped_by_queues, missing_block_ids=self._missing)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
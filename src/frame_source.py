@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Frame sources feeding the acquisition stage of the camera thread.
+
+`PylonFrameSource` grabs from the first Basler camera found by pylon, while
+`ReplayFrameSource` replays an image directory or a video file so that the full
+detection loop can be run, benchmarked and profiled on a workstation without a camera.
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+from numpy.typing import NDArray
+from pypylon import genicam, pylon
+
+from src.buffer_pool import BufferPool
+from src.params import INIT_WIDTH, INIT_HEIGHT, INIT_FRAME_RATE
+from src.params import GRABBING_TIMEOUT_MS, TIMESTAMP_TICK_FREQUENCY_HZ
+from src.params import GRAB_ZERO_COPY, GRAB_PIXEL_MODE, DETECT_QUEUE_SIZE, CAMERA_BINNING
+from utils.transform import bgr_to_bayer
+
+IMAGE_SUFFIXES: tuple[str, ...] = (".png", ".jpg", ".jpeg", ".bmp")
+
+# Native pixel formats usable by the zero-copy grab path, in order of preference,
+# with the OpenCV conversion to BGR applied on the grab buffer (None if already BGR)
+NATIVE_PIXEL_FORMATS: dict[str, Optional[int]] = {
+    "BGR8": None,
+    "BGR8Packed": None,
+    "BayerRG8": cv2.COLOR_BayerRGGB2BGR,
+    "BayerBG8": cv2.COLOR_BayerBGGR2BGR,
+    "BayerGR8": cv2.COLOR_BayerGRBG2BGR,
+    "BayerGB8": cv2.COLOR_BayerGBRG2BGR,
+    "RGB8": cv2.COLOR_RGB2BGR,
+    "RGB8Packed": cv2.COLOR_RGB2BGR,
+    "Mono8": cv2.COLOR_GRAY2BGR,
+}
+
+# Pixel formats of the single channel modes of GRAB_PIXEL_MODE, in order of preference,
+# with the colour filter array layout of the Bayer formats
+PLANAR_PIXEL_FORMATS: dict[str, dict[str, Optional[str]]] = {
+    "mono": {"Mono8": None},
+    "bayer": {"BayerRG8": "RGGB", "BayerBG8": "BGGR", "BayerGR8": "GRBG", "BayerGB8": "GBRG"},
+}
+
+# Block ID reported by transport layers without block IDs
+UNAVAILABLE_BLOCK_ID: int = 2**64 - 1
+
+# Stream grabber counters reported by `stream_statistics`, when the transport layer has them
+STREAM_STATISTICS: dict[str, str] = {
+    "total_buffer_count": "Statistic_Total_Buffer_Count",
+    "failed_buffer_count": "Statistic_Failed_Buffer_Count",
+    "buffer_underrun_count": "Statistic_Buffer_Underrun_Count",
+    "missed_frame_count": "Statistic_Missed_Frame_Count",
+    "resynchronization_count": "Statistic_Resynchronization_Count",
+}
+
+
+@dataclass(slots=True)
+class GrabbedFrame:
+    """
+    A frame delivered by a frame source.
+
+    The frame either owns its image, or keeps the pylon grab result so that its buffer
+    can be read in place with `view` and handed back to the grabber with `release`.
+
+    Attributes:
+        image (Optional[NDArray[np.uint8]]): BGR image or single channel plane of the frame,
+            None when zero-copy.
+        camera_timestamp (int): Timestamp counter value of the exposure, 0 if unknown.
+        arrival_time (float): Host monotonic time at which the frame was retrieved.
+        grab_result (Optional[pylon.GrabResult]): Grab result still holding the buffer.
+        conversion (Optional[int]): OpenCV conversion from the native pixel format to BGR.
+        block_id (Optional[int]): Block (frame) ID of the transport layer, None if unknown.
+        skipped_images (int): Number of frames skipped by the grab strategy before this one.
+        cfa_pattern (Optional[str]): Colour filter array layout of a raw Bayer plane,
+            e.g. "RGGB", None for BGR images and Mono8 planes.
+
+    Example:
+        >>> frame = GrabbedFrame(np.zeros((2, 2, 3), np.uint8), 0, 0.0)
+        >>> with frame.view() as image:
+        ...     image.shape
+        (2, 2, 3)
+        >>> frame.release()
+    """
+    image: Optional[NDArray[np.uint8]]
+    camera_timestamp: int
+    arrival_time: float
+    grab_result: Optional[pylon.GrabResult] = None
+    conversion: Optional[int] = None
+    block_id: Optional[int] = None
+    skipped_images: int = 0
+    cfa_pattern: Optional[str] = None
+
+    @contextmanager
+    def view(self) -> Iterator[NDArray[np.uint8]]:
+        """
+        Give access to the BGR image or the single channel plane of the frame.
+
+        For zero-copy frames the grab buffer is wrapped as a NumPy view, converted in a
+        single step when the native pixel format is not BGR. No reference to the yielded
+        array may outlive the `with` block.
+
+        Yields:
+            NDArray[np.uint8]: BGR image or single channel plane of the frame.
+        """
+        if self.grab_result is None:
+            yield self.image
+            return
+        with self.grab_result.GetArrayZeroCopy() as array:
+            try:
+                if self.conversion is None:
+                    yield array
+                else:
+                    yield cv2.cvtColor(array, self.conversion)
+            finally:
+                del array
+
+    def release(self) -> None:
+        """
+        Hand the grab buffer back to the grabber. Safe to call more than once.
+        """
+        if self.grab_result is not None:
+            self.grab_result.Release()
+            self.grab_result = None
+
+
+class FrameSource(ABC):
+    """
+    Interface of the frame sources used by the camera thread.
+    """
+
+    # Frequency of the timestamp counter reported in `GrabbedFrame.camera_timestamp`
+    tick_frequency: float = TIMESTAMP_TICK_FREQUENCY_HZ
+    # Binning applied by the device, the frames are INIT_WIDTH / binning pixels wide
+    binning: int = 1
+
+    @abstractmethod
+    def start(self) -> None:
+        """
+        Start delivering frames.
+        """
+
+    @abstractmethod
+    def is_grabbing(self) -> bool:
+        """
+        Whether the source is delivering frames.
+        """
+
+    @abstractmethod
+    def grab(self) -> Optional[GrabbedFrame]:
+        """
+        Wait for the next frame.
+
+        Returns:
+            Optional[GrabbedFrame]: The next frame, or None if the grab failed.
+        """
+
+    @abstractmethod
+    def stop(self) -> None:
+        """
+        Stop delivering frames and release the device.
+        """
+
+    def latch_timestamp(self) -> Optional[int]:
+        """
+        Read the current value of the timestamp counter.
+
+        Returns:
+            Optional[int]: The counter value, or None if the source cannot latch it.
+        """
+        return None
+
+    def temperature_status(self) -> str:
+        """
+        Temperature status of the device, "Ok" when in the operating range.
+        """
+        return "Ok"
+
+    def resulting_frame_rate(self) -> float:
+        """
+        Frame rate the source is currently delivering in frames per second.
+        """
+        return 0.0
+
+    def stream_statistics(self) -> dict[str, int]:
+        """
+        Buffer and dropped frame counters of the stream, by counter name.
+        """
+        return {}
+
+    def set_frame_rate(self, frame_rate: float) -> float:
+        """
+        Change the acquisition frame rate while delivering frames.
+
+        Args:
+            frame_rate (float): Requested frame rate in frames per second.
+
+        Returns:
+            float: The frame rate applied, 0.0 if the source cannot change it.
+        """
+        return 0.0
+
+
+class PylonFrameSource(FrameSource):
+    """
+    Frame source grabbing from the first Basler camera found by pylon.
+    Only the latest image is kept, older frames are skipped by the grab strategy.
+
+    By default every frame is converted to BGR8packed by `pylon.ImageFormatConverter`
+    and copied into an array. In zero-copy mode the camera delivers a native pixel
+    format and the frame keeps its grab result, so the consumer reads the grab buffer
+    in place and releases it as soon as it no longer needs the raw data.
+    In the "mono" and "bayer" pixel modes the camera delivers a single channel plane,
+    which is passed on without conversion. With binning the sensor sums blocks of
+    pixels and the frames cover the same field of view at a lower resolution.
+    """
+
+    camera: pylon.InstantCamera
+    converter: pylon.ImageFormatConverter
+    zero_copy: bool
+    pixel_mode: str
+    conversion: Optional[int] = None
+    cfa_pattern: Optional[str] = None
+    # Converted frames are copied into reused arrays, one per frame that can be queued,
+    # detected or grabbed at the same time
+    buffers: BufferPool
+    frame_depth: int = DETECT_QUEUE_SIZE + 2
+
+    def __init__(
+        self, zero_copy: bool = GRAB_ZERO_COPY, pixel_mode: str = GRAB_PIXEL_MODE,
+        binning: int = CAMERA_BINNING
+    ) -> None:
+        """
+        Initialize the camera.
+
+        Args:
+            zero_copy (bool): Deliver frames that wrap the grab buffer instead of a copy.
+            pixel_mode (str): "bgr", or "mono" and "bayer" for a single channel plane.
+            binning (int): Horizontal and vertical binning of the sensor, 1 for none.
+
+        Raises:
+            ValueError: If the pixel mode is unknown.
+        """
+        if pixel_mode != "bgr" and pixel_mode not in PLANAR_PIXEL_FORMATS:
+            raise ValueError(f"Unknown pixel mode {pixel_mode}")
+        self.zero_copy = zero_copy
+        self.pixel_mode = pixel_mode
+        self.buffers = BufferPool()
+        # Create an instance of the camera object
+        try:
+            self.camera = pylon.InstantCamera(
+                pylon.TlFactory.GetInstance().CreateFirstDevice())
+            logging.debug(self.camera.GetDeviceInfo().GetFriendlyName())
+        except (pylon.GenericException, RuntimeError) as e:
+            logging.error("Error retrieving frame %s", e)
+
+        try:
+            self.camera.Open()
+        except UnboundLocalError as e:
+            logging.error("Error opening camera %s", e)
+
+        # Set camera related paramters
+        self.camera.UserSetSelector.SetValue("Default")
+        self.camera.UserSetLoad.Execute()
+        # self.camera.ExposureTimeMode.SetValue("Common")
+        # self.camera.ExposureTime.SetValue(INIT_EXPOSURE_TIME)
+        self.camera.AcquisitionFrameRateEnable.SetValue(True)
+        self.camera.AcquisitionFrameRate.SetValue(INIT_FRAME_RATE)
+        self.camera.AcquisitionMode.SetValue("Continuous")
+        # self.camera.Gain.SetValue(INIT_GAIN)
+        # Binning is set first, the image size is then counted in binned pixels
+        if binning > 1:
+            self.select_binning(binning)
+        self.camera.Width.SetValue(INIT_WIDTH // self.binning)
+        self.camera.Height.SetValue(INIT_HEIGHT // self.binning)
+        # Set the X axis offset such that it only looks at the horizontal centric pixels
+        self.camera.OffsetX.SetValue(
+            (self.camera.Width.GetMax() - INIT_WIDTH // self.binning) // 2)
+        # Set the Y axis offset such that it only looks at the vertical centric pixels
+        self.camera.OffsetY.SetValue(
+            (self.camera.Height.GetMax() - INIT_HEIGHT // self.binning) // 2)
+        # GigE cameras advertise the frequency of their timestamp counter, the node is
+        # looked up in the node map since the attribute of a missing node raises
+        tick_frequency = self.camera.GetNodeMap().GetNode("GevTimestampTickFrequency")
+        if tick_frequency is not None and genicam.IsAvailable(tick_frequency) \
+                and genicam.IsReadable(tick_frequency):
+            self.tick_frequency = float(tick_frequency.GetValue())
+        if self.pixel_mode != "bgr" and not self.select_planar_pixel_format():
+            self.pixel_mode = "bgr"
+        if self.zero_copy and self.pixel_mode == "bgr":
+            self.zero_copy = self.select_native_pixel_format()
+        self.camera.Close()
+
+        # The output pixel format for the converter
+        # The default pixel format is RGB8packed
+        # Converting to opencv bgr format
+        self.converter = pylon.ImageFormatConverter()
+        self.converter.OutputPixelFormat = pylon.PixelType_BGR8packed
+        self.converter.OutputBitAlignment = pylon.OutputBitAlignment_MsbAligned
+
+    def select_binning(self, binning: int) -> bool:
+        """
+        Bin the sensor horizontally and vertically.
+
+        Args:
+            binning (int): Number of pixels binned along each axis.
+
+        Returns:
+            bool: True if the camera bins the pixels, the frames are full size otherwise.
+        """
+        if not (genicam.IsWritable(self.camera.BinningHorizontal)
+                and genicam.IsWritable(self.camera.BinningVertical)):
+            logging.error("Binning not available, grabbing at full resolution")
+            return False
+        self.camera.BinningHorizontal.SetValue(binning)
+        self.camera.BinningVertical.SetValue(binning)
+        self.binning = binning
+        logging.debug("Grabbing with %dx%d binning", binning, binning)
+        return True
+
+    def select_native_pixel_format(self) -> bool:
+        """
+        Select the first pixel format of NATIVE_PIXEL_FORMATS supported by the camera.
+
+        Returns:
+            bool: True if a native pixel format usable without the converter was selected.
+        """
+        supported: tuple = self.camera.PixelFormat.GetSymbolics()
+        for pixel_format, conversion in NATIVE_PIXEL_FORMATS.items():
+            if pixel_format in supported:
+                self.camera.PixelFormat.SetValue(pixel_format)
+                self.conversion = conversion
+                logging.debug("Zero-copy grabbing in %s", pixel_format)
+                return True
+        logging.error("No native pixel format available, zero-copy grabbing disabled")
+        return False
+
+    def select_planar_pixel_format(self) -> bool:
+        """
+        Select the first pixel format of the pixel mode supported by the camera.
+
+        Returns:
+            bool: True if a single channel pixel format was selected.
+        """
+        supported: tuple = self.camera.PixelFormat.GetSymbolics()
+        for pixel_format, cfa_pattern in PLANAR_PIXEL_FORMATS[self.pixel_mode].items():
+            if pixel_format in supported:
+                self.camera.PixelFormat.SetValue(pixel_format)
+                self.cfa_pattern = cfa_pattern
+                logging.debug("Grabbing single channel planes in %s", pixel_format)
+                return True
+        logging.error("No %s pixel format available, grabbing in BGR", self.pixel_mode)
+        return False
+
+    def start(self) -> None:
+        # Only grab the latest image
+        self.camera.StartGrabbing(pylon.GrabStrategy_LatestImageOnly)
+        # camera.StartGrabbing(pylon.GrabStrategy_OneByOne)
+
+    def is_grabbing(self) -> bool:
+        return self.camera.IsGrabbing()
+
+    def grab(self) -> Optional[GrabbedFrame]:
+        # Wait for an image and then retrieve it. A timeout of 5000 ms is used.
+        # timeoutHandling: pylon.TimeoutHandling_ThrowException
+        grab_result: pylon.GrabResult = self.camera.RetrieveResult(
+            GRABBING_TIMEOUT_MS, pylon.TimeoutHandling_ThrowException)
+        arrival_time: float = time.monotonic()
+        frame: Optional[GrabbedFrame] = None
+        image: NDArray[np.uint8]
+        block_id: Optional[int] = grab_result.GetBlockID()
+        if block_id == UNAVAILABLE_BLOCK_ID:
+            block_id = None
+        skipped_images: int = grab_result.GetNumberOfSkippedImages()
+        if grab_result.GrabSucceeded() and self.zero_copy:
+            # The buffer is released by the consumer once the raw data is no longer needed
+            return GrabbedFrame(
+                image=None, camera_timestamp=grab_result.GetTimeStamp(),
+                arrival_time=arrival_time, grab_result=grab_result,
+                conversion=self.conversion, block_id=block_id,
+                skipped_images=skipped_images, cfa_pattern=self.cfa_pattern)
+        if grab_result.GrabSucceeded() and self.pixel_mode != "bgr":
+            # Single channel planes are copied as delivered, without the converter
+            with grab_result.GetArrayZeroCopy() as plane:
+                image = self.buffers.get_like("frame", plane, depth=self.frame_depth)
+                np.copyto(image, plane)
+                del plane
+            frame = GrabbedFrame(
+                image=image,
+                camera_timestamp=grab_result.GetTimeStamp(),
+                arrival_time=arrival_time, block_id=block_id,
+                skipped_images=skipped_images, cfa_pattern=self.cfa_pattern)
+        elif grab_result.GrabSucceeded():
+            pylon_image: pylon.PylonImage = self.converter.Convert(grab_result)
+            image = self.buffers.get(
+                "frame", (pylon_image.GetHeight(), pylon_image.GetWidth(), 3),
+                depth=self.frame_depth)
+            with pylon_image.GetArrayZeroCopy() as converted:
+                np.copyto(image, converted)
+                del converted
+            pylon_image.Release()
+            frame = GrabbedFrame(
+                image=image,
+                camera_timestamp=grab_result.GetTimeStamp(),
+                arrival_time=arrival_time, block_id=block_id,
+                skipped_images=skipped_images)
+        grab_result.Release()
+        return frame
+
+    def stop(self) -> None:
+        self.camera.StopGrabbing()
+        self.camera.Close()
+
+    def latch_timestamp(self) -> Optional[int]:
+        try:
+            self.camera.TimestampLatch.Execute()
+            return self.camera.TimestampLatchValue.GetValue()
+        except (pylon.GenericException, AttributeError) as e:
+            logging.debug("Camera timestamp latch unavailable: %s", e)
+            return None
+
+    def temperature_status(self) -> str:
+        return self.camera.BslTemperatureStatus.GetValue()
+
+    def resulting_frame_rate(self) -> float:
+        return self.camera.ResultingFrameRate.GetValue()
+
+    def set_frame_rate(self, frame_rate: float) -> float:
+        try:
+            node = self.camera.AcquisitionFrameRate
+            node.SetValue(min(max(frame_rate, node.GetMin()), node.GetMax()))
+            return node.GetValue()
+        except pylon.GenericException as e:
+            logging.error("Error setting the frame rate %s", e)
+            return 0.0
+
+    def stream_statistics(self) -> dict[str, int]:
+        statistics: dict[str, int] = {}
+        for name, node_name in STREAM_STATISTICS.items():
+            try:
+                node = getattr(self.camera.StreamGrabber, node_name)
+                if genicam.IsReadable(node):
+                    statistics[name] = int(node.GetValue())
+            except (pylon.GenericException, AttributeError):
+                continue
+        return statistics
+
+
+class ReplayPacing(Enum):
+    """
+    Pacing of the frames delivered by a `ReplayFrameSource`.
+
+    Attributes:
+        REALTIME: Deliver frames at the camera frame rate INIT_FRAME_RATE.
+        FASTEST: Deliver frames as fast as the consumer takes them.
+        FIXED: Deliver frames at a user defined frame rate.
+    """
+    REALTIME = "realtime"
+    FASTEST = "fastest"
+    FIXED = "fixed"
+
+
+class ReplayFrameSource(FrameSource):
+    """
+    Frame source replaying a directory of PNG/JPG/BMP images or a video file.
+
+    Images of a directory are decoded once and kept in memory so that the replay measures
+    the detection loop rather than the disk. The timestamp counter is the host monotonic
+    clock in nanoseconds, stamped when each frame is released.
+
+    Example:
+        >>> from src.params import DATA_DIR
+        >>> source = ReplayFrameSource(DATA_DIR / "Figs_14", ReplayPacing.FASTEST, loop=False)
+        >>> source.start()
+        >>> frames = []
+        >>> while source.is_grabbing():
+        ...     frame = source.grab()
+        ...     if frame is not None:
+        ...         frames.append(frame)
+        >>> len(frames) == len(source.images)
+        True
+        >>> frames[0].image.ndim
+        3
+        >>> source = ReplayFrameSource(DATA_DIR / "Figs_14", pixel_mode="bayer")
+        >>> source.images[0].ndim
+        2
+    """
+
+    path: Path
+    pacing: ReplayPacing
+    frame_rate: float
+    loop: bool
+    pixel_mode: str
+    cfa_pattern: Optional[str] = None
+    images: list[NDArray[np.uint8]]
+    capture: Optional[cv2.VideoCapture]
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self, path: str | Path, pacing: ReplayPacing = ReplayPacing.REALTIME,
+        frame_rate: float = INIT_FRAME_RATE, loop: bool = True, pixel_mode: str = "bgr"
+    ) -> None:
+        """
+        Initialize the replay source.
+
+        Args:
+            path (str | Path): Image directory or video file to replay.
+            pacing (ReplayPacing): Pacing of the delivered frames.
+            frame_rate (float): Frame rate used by ReplayPacing.FIXED.
+            loop (bool): Restart from the first frame after the last one.
+            pixel_mode (str): "bgr", or "mono" and "bayer" to replay the single channel
+                planes a camera would deliver in these modes.
+
+        Raises:
+            ValueError: If the path holds no frame, the frame rate is not positive
+                or the pixel mode is unknown.
+        """
+        if frame_rate <= 0:
+            raise ValueError("Frame rate must be greater than 0.")
+        if pixel_mode != "bgr" and pixel_mode not in PLANAR_PIXEL_FORMATS:
+            raise ValueError(f"Unknown pixel mode {pixel_mode}")
+        self.pixel_mode = pixel_mode
+        if pixel_mode == "bayer":
+            self.cfa_pattern = next(iter(PLANAR_PIXEL_FORMATS["bayer"].values()))
+        self.path = Path(path)
+        self.pacing = pacing
+        self.frame_rate = INIT_FRAME_RATE if pacing is ReplayPacing.REALTIME else frame_rate
+        self.loop = loop
+        self.images = []
+        self.capture = None
+        self.tick_frequency = 1e9
+        if self.path.is_dir():
+            for file in sorted(self.path.iterdir()):
+                if file.suffix.lower() in IMAGE_SUFFIXES:
+                    image = cv2.imread(str(file), cv2.IMREAD_COLOR)
+                    if image is not None:
+                        self.images.append(self._convert(image))
+            if not self.images:
+                raise ValueError(f"No image found in {self.path}")
+        elif not self.path.is_file():
+            raise ValueError(f"{self.path} is neither a directory nor a video file")
+        self._grabbing: bool = False
+        self._index: int = 0
+        self._start_time: float = 0.0
+
+    def start(self) -> None:
+        if not self.images:
+            self.capture = cv2.VideoCapture(str(self.path))
+            if not self.capture.isOpened():
+                raise ValueError(f"Unable to open the video file {self.path}")
+        self._index = 0
+        self._start_time = time.monotonic()
+        self._grabbing = True
+
+    def is_grabbing(self) -> bool:
+        return self._grabbing
+
+    def grab(self) -> Optional[GrabbedFrame]:
+        image: Optional[NDArray[np.uint8]] = self._next_image()
+        if image is None:
+            self._grabbing = False
+            return None
+        if self.pacing is not ReplayPacing.FASTEST:
+            due_time: float = self._start_time + self._index / self.frame_rate
+            delay: float = due_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self._index += 1
+        return GrabbedFrame(
+            image=image, camera_timestamp=time.monotonic_ns(), arrival_time=time.monotonic(),
+            block_id=self._index, cfa_pattern=self.cfa_pattern)
+
+    def _convert(self, image: NDArray[np.uint8]) -> NDArray[np.uint8]:
+        """
+        Convert a decoded BGR image to the pixel mode of the source.
+        """
+        if self.pixel_mode == "mono":
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if self.cfa_pattern is not None:
+            return bgr_to_bayer(image, self.cfa_pattern)
+        return image
+
+    def _next_image(self) -> Optional[NDArray[np.uint8]]:
+        """
+        Read the next image of the directory or video, restarting it if looping.
+        """
+        if self.images:
+            position: int = self._index
+            if position >= len(self.images) and not self.loop:
+                return None
+            return self.images[position % len(self.images)]
+        if self.capture is None:
+            return None
+        ok, image = self.capture.read()
+        if not ok and self.loop and self._index > 0:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, image = self.capture.read()
+        return self._convert(image) if ok else None
+
+    def stop(self) -> None:
+        self._grabbing = False
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def latch_timestamp(self) -> Optional[int]:
+        return time.monotonic_ns()
+
+    def stream_statistics(self) -> dict[str, int]:
+        return {"total_buffer_count": self._index}
+
+    def set_frame_rate(self, frame_rate: float) -> float:
+        if frame_rate <= 0:
+            raise ValueError("Frame rate must be greater than 0.")
+        # Rebase the schedule: the next frame stays due when it was, the following ones
+        # are spaced by the new period
+        now: float = time.monotonic()
+        self._start_time = min(now, self._start_time + self._index / self.frame_rate) \
+            - self._index / frame_rate
+        self.frame_rate = frame_rate
+        return frame_rate
+
+    def resulting_frame_rate(self) -> float:
+        if self._index == 0:
+            return 0.0
+        return self._index / max(time.monotonic() - self._start_time, 1e-9)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
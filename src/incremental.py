@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Incremental segmentation of consecutive frames.
+
+The belt moves the capsules by a predictable displacement between two frames, so most
+of a frame was already segmented in the previous one. Only the strip that entered the
+field of view on the left (plus a margin absorbing the speed error) is segmented again.
+The rest of the denoised binary image is the previous one shifted by the displacement,
+and capsules that lie entirely in that area keep the measurements of the frame they were
+measured in. A full frame is segmented periodically to resynchronize.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+from numpy.typing import NDArray
+
+from src.contours import CONTOUR_POINTS_RANGE, LENGTH_MARGIN_PX
+from src.contours import locate_capsules, measure_capsules
+from src.inspection_band import InspectionBand
+from src.params import INSPECTION_BAND, SEGMENTATION_DENOISE
+from src.params import BELT_SPEED_MM_S, MM_PER_PIXEL
+from src.params import INCREMENTAL_MARGIN_PX, INCREMENTAL_KEYFRAME_INTERVAL
+from src.scaling import ProcessingScale
+from utils.transform import DENOISE_KERNEL_PX, get_img_opened, opened_halo
+
+
+@dataclass(slots=True)
+class CapsuleMeasurement:
+    """
+    The measurements of a capsule, as returned by `measure_capsules`.
+
+    Attributes:
+        rect (tuple): Minimum enclosing rectangle of the capsule in the current frame.
+        raw (NDArray[np.uint8]): Cropped raw image of the capsule.
+        opened (NDArray[np.uint8]): Cropped denoised image of the capsule.
+        size (NDArray): Length and width of the capsule.
+        area (float): Area of the capsule contour.
+        similarity (list[float]): Similarity scores to the standard mask.
+    """
+    rect: tuple
+    raw: NDArray[np.uint8]
+    opened: NDArray[np.uint8]
+    size: NDArray
+    area: float
+    similarity: list[float]
+
+    def left(self) -> float:
+        """
+        Leftmost column of the rectangle.
+        """
+        return float(cv2.boxPoints(self.rect)[:, 0].min())
+
+    def right(self) -> float:
+        """
+        Rightmost column of the rectangle.
+        """
+        return float(cv2.boxPoints(self.rect)[:, 0].max())
+
+    def top(self) -> float:
+        """
+        Topmost row of the rectangle.
+        """
+        return float(cv2.boxPoints(self.rect)[:, 1].min())
+
+    def shifted(self, dx: float) -> "CapsuleMeasurement":
+        """
+        The same measurements with the rectangle moved by dx pixels along the belt.
+        """
+        (x, y), size, angle = self.rect
+        return CapsuleMeasurement(
+            ((x + dx, y), size, angle), self.raw, self.opened,
+            self.size, self.area, self.similarity)
+
+
+class IncrementalSegmenter:
+    """
+    Segments consecutive frames of the belt, re-processing only the newly entered strip.
+    Frames must be passed in exposure order, e.g. from a single detection stage.
+
+    Example:
+        >>> segmenter = IncrementalSegmenter(pixel_speed=100.0)
+        >>> image = np.zeros((64, 400, 3), dtype=np.uint8)
+        >>> result = segmenter.segment(image, 0.0, np.zeros((8, 8), np.uint8), (100, 140))
+        >>> result = segmenter.segment(image, 0.1, np.zeros((8, 8), np.uint8), (100, 140))
+        >>> segmenter.full_frames, segmenter.incremental_frames
+        (1, 1)
+    """
+
+    pixel_speed: float
+    margin: int
+    keyframe_interval: int
+    scale: ProcessingScale
+    denoise_backend: str
+    full_frames: int = 0
+    incremental_frames: int = 0
+
+    def __init__(
+        self, pixel_speed: float = BELT_SPEED_MM_S / MM_PER_PIXEL,
+        margin: int = INCREMENTAL_MARGIN_PX,
+        keyframe_interval: int = INCREMENTAL_KEYFRAME_INTERVAL,
+        scale: ProcessingScale = ProcessingScale(),
+        denoise_backend: str = SEGMENTATION_DENOISE
+    ) -> None:
+        """
+        Initialize the segmenter.
+
+        Args:
+            pixel_speed (float): Belt speed in pixels per second, towards +x.
+            margin (int): Columns re-processed beyond the newly entered strip.
+            keyframe_interval (int): Number of frames between two full frame segmentations.
+            scale (ProcessingScale): Processing scale of the frames, setting the kernel
+                size and the contour thresholds.
+            denoise_backend (str): Filter standing in for the median blur.
+        """
+        self.pixel_speed = pixel_speed
+        self.margin = margin
+        self.keyframe_interval = keyframe_interval
+        self.scale = scale
+        self.denoise_backend = denoise_backend
+        self._kernel_size: int = scale.kernel(DENOISE_KERNEL_PX)
+        self._halo: int = opened_halo(self._kernel_size)
+        self._points_range: tuple[int, int] = (
+            scale.length(CONTOUR_POINTS_RANGE[0]), scale.length(CONTOUR_POINTS_RANGE[1]))
+        self._length_margin: int = scale.length(LENGTH_MARGIN_PX)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget the previous frame, the next one is segmented in full.
+        """
+        self._opened: Optional[NDArray[np.uint8]] = None
+        # The previous binary image is read while the current one is written,
+        # the two arrays are swapped after every frame
+        self._spare: Optional[NDArray[np.uint8]] = None
+        self._capsules: list[CapsuleMeasurement] = []
+        self._time: float = 0.0
+        self._frames_since_keyframe: int = 0
+
+    # pylint: disable=too-many-locals
+    def segment(
+        self, image: NDArray[np.uint8], exposure_time: float,
+        mask_binary: cv2.typing.MatLike, normal_length_range: tuple[int, int],
+        gray: Optional[NDArray[np.uint8]] = None,
+        center_bounds: Optional[tuple[float, float, float, float]] = None
+    ) -> tuple[list, list, list, list, list, list]:
+        """
+        Segment a frame with the background removed.
+
+        Args:
+            image (NDArray[np.uint8]): BGR image or single channel plane with the background
+                removed.
+            exposure_time (float): Exposure time of the frame in seconds.
+            mask_binary (cv2.typing.MatLike): Binary mask of the standard capsule contour.
+            normal_length_range (tuple[int, int]): Normal range of capsule lengths.
+            gray (Optional[NDArray[np.uint8]]): Grayscale plane of the frame the capsules are
+                cropped from, the image itself if None.
+            center_bounds (Optional[tuple[float, float, float, float]]): Left, right, top
+                and bottom bounds of the inspected centers, the default InspectionBand of
+                the image if None.
+
+        Returns:
+            tuple[list, list, list, list, list, list]: The same lists as `find_contours_img`.
+        """
+        height, width = image.shape[:2]
+        if gray is None:
+            gray = image
+        if center_bounds is None:
+            center_bounds = InspectionBand(*INSPECTION_BAND).centers(width, height)
+        if self._spare is None or self._spare.shape != (height, width):
+            self._spare = np.empty((height, width), dtype=np.uint8)
+        opened: NDArray[np.uint8] = self._spare
+        dx: int = int(round(self.pixel_speed * (exposure_time - self._time)))
+        boundary: int = dx + self.margin
+        # Contours touching the strip lie entirely within the window
+        window: int = min(
+            width, boundary + normal_length_range[1] + self._length_margin + self.margin)
+
+        if self._opened is None or self._opened.shape != (height, width) or dx < 0 or \
+                boundary + self._halo >= width or \
+                self._frames_since_keyframe + 1 >= self.keyframe_interval:
+            get_img_opened(
+                image, dst=opened, kernel_size=self._kernel_size,
+                denoise_backend=self.denoise_backend)
+            rects = locate_capsules(
+                opened, normal_length_range, width, self._points_range, self._length_margin,
+                center_bounds)
+            capsules = self._measure(gray, opened, mask_binary, rects)
+            self._frames_since_keyframe = 0
+            self.full_frames += 1
+        else:
+            # Segment the new strip, shift the previous binary image for the rest
+            opened[:, :boundary] = get_img_opened(
+                image[:, :boundary + self._halo], kernel_size=self._kernel_size,
+                denoise_backend=self.denoise_backend)[:, :boundary]
+            opened[:, boundary:] = self._opened[:, self.margin:width - dx]
+
+            rects = [
+                rect for rect in locate_capsules(
+                    opened[:, :window], normal_length_range, width,
+                    self._points_range, self._length_margin, center_bounds)
+                if cv2.boxPoints(rect)[:, 0].min() < boundary
+            ]
+            capsules = self._measure(gray, opened, mask_binary, rects)
+            centers: NDArray = np.array([c.rect[0] for c in capsules]).reshape(-1, 2)
+            for capsule in self._capsules:
+                capsule = capsule.shifted(dx)
+                center_x: float = capsule.rect[0][0]
+                # Capsules leaving the frame on the right are clipped and measured differently
+                if capsule.left() < boundary or capsule.right() >= width - 1 or \
+                        not center_bounds[0] <= center_x <= center_bounds[1]:
+                    continue
+                # Skip capsules found again in the strip because of the speed error
+                if len(centers) and np.min(np.linalg.norm(
+                        centers - np.array(capsule.rect[0]), axis=1)) < self.margin:
+                    continue
+                capsules.append(capsule)
+            capsules.sort(key=lambda c: (-c.left(), c.top()))
+            self._frames_since_keyframe += 1
+            self.incremental_frames += 1
+
+        self._spare, self._opened = self._opened, opened
+        self._capsules = capsules
+        self._time = exposure_time
+        return (
+            [c.raw for c in capsules], [c.opened for c in capsules],
+            [c.rect[0] for c in capsules], [c.size for c in capsules],
+            [c.area for c in capsules], [c.similarity for c in capsules]
+        )
+
+    @staticmethod
+    def _measure(
+        image: NDArray[np.uint8], opened: NDArray[np.uint8],
+        mask_binary: cv2.typing.MatLike, rects: list
+    ) -> list[CapsuleMeasurement]:
+        """
+        Measure the located capsules of a frame.
+        The crops are allocated rather than cut into the crop slots of a pool, since the
+        measurements of a capsule are carried over to the next frames.
+        """
+        return [
+            CapsuleMeasurement(rect, *measurements)
+            for rect, *measurements in zip(rects, *measure_capsules(
+                image, opened, mask_binary, rects))
+        ]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
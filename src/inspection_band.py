@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lane of the frame in which the capsules are inspected.
+
+Capsules are only inspected while their center lies in the band, away from the edges of
+the field of view where they are clipped. The detection runs on the view of the frame that
+holds every capsule centered in the band: the band widened by half the longest capsule and
+the reach of the denoising filters, so that the capsules of the band are segmented exactly
+as in the full frame and the rest of the frame is never processed.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+@dataclass(slots=True, frozen=True)
+class InspectionBand:
+    """
+    Bounds of the capsule centers as fractions of the frame width and height.
+
+    Attributes:
+        left (float): Left bound of the centers.
+        right (float): Right bound of the centers.
+        top (float): Top bound of the centers.
+        bottom (float): Bottom bound of the centers.
+
+    Example:
+        >>> band = InspectionBand(0.25, 0.75, 0.0, 0.5)
+        >>> band.centers(400, 200)
+        (100.0, 300.0, 0.0, 100.0)
+        >>> band.view(400, 200, 41)
+        (58, 0, 342, 142)
+        >>> band.centers(400, 200, (58, 0))
+        (42.0, 242.0, 0.0, 100.0)
+    """
+    left: float = 0.10
+    right: float = 0.90
+    top: float = 0.0
+    bottom: float = 1.0
+
+    def __post_init__(self) -> None:
+        if not (0 <= self.left < self.right <= 1 and 0 <= self.top < self.bottom <= 1):
+            raise ValueError("The inspection band must be a non-empty part of the frame.")
+
+    def centers(
+        self, width: int, height: int, offset: tuple[int, int] = (0, 0)
+    ) -> tuple[float, float, float, float]:
+        """
+        Pixel bounds of the inspected capsule centers.
+
+        Args:
+            width (int): Width of the frame in pixels.
+            height (int): Height of the frame in pixels.
+            offset (tuple[int, int]): Top left corner of the view the bounds apply to.
+
+        Returns:
+            tuple[float, float, float, float]: Left, right, top and bottom bounds.
+        """
+        return (
+            self.left * width - offset[0], self.right * width - offset[0],
+            self.top * height - offset[1], self.bottom * height - offset[1])
+
+    def view(self, width: int, height: int, reach: int) -> tuple[int, int, int, int]:
+        """
+        Part of the frame holding every capsule centered in the band.
+        The view starts on even pixels, so that a raw Bayer view keeps the colour filter
+        layout of the frame.
+
+        Args:
+            width (int): Width of the frame in pixels.
+            height (int): Height of the frame in pixels.
+            reach (int): Distance from a center within which the capsule and the pixels
+                affecting its segmentation lie.
+
+        Returns:
+            tuple[int, int, int, int]: Left, top, right and bottom bounds of the view,
+            right and bottom excluded.
+        """
+        left, right, top, bottom = self.centers(width, height)
+        return (
+            max(int(np.floor(left)) - reach, 0) // 2 * 2,
+            max(int(np.floor(top)) - reach, 0) // 2 * 2,
+            min(int(np.ceil(right)) + reach + 1, width),
+            min(int(np.ceil(bottom)) + reach + 1, height))
+
+
+def clear_outside(array: NDArray[np.uint8], view: tuple[int, int, int, int]) -> None:
+    """
+    Set the pixels of an array outside of a view to black.
+
+    Args:
+        array (NDArray[np.uint8]): Frame sized array.
+        view (tuple[int, int, int, int]): Left, top, right and bottom bounds of the view.
+
+    >>> array = np.ones((3, 4), dtype=np.uint8)
+    >>> clear_outside(array, (1, 1, 3, 2))
+    >>> array.tolist()
+    [[0, 0, 0, 0], [0, 1, 1, 0], [0, 0, 0, 0]]
+    """
+    left, top, right, bottom = view
+    array[:top] = 0
+    array[bottom:] = 0
+    array[top:bottom, :left] = 0
+    array[top:bottom, right:] = 0
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
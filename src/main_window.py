@@ -22,6 +22,7 @@ from PyQt6.QtWidgets import QCheckBox, QPushButton, QSpacerItem, QSizePolicy, QH
 from PyQt6.QtWidgets import QInputDialog, QLineEdit, QMessageBox, QFileDialog
 
 from src.camera_thread import CameraThread
+from src.frame_source import FrameSource
 from src.parameter import DefectDetectionParams
 from src.relay_controller import RelayController
 
@@ -47,6 +48,7 @@ class MainWindow(QMainWindow):
     image_label: QLabel
     time_label: QLabel
     status_label: QLabel
+    operating_point_label: QLabel
     status_led: QLabel
     config_combo: QComboBox
     toggle_params_checkbox: QCheckBox
@@ -84,6 +86,8 @@ class MainWindow(QMainWindow):
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.status_label = QLabel("Status: Starting")
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.operating_point_label = QLabel("Operating Point: Fixed frame rate")
+        self.operating_point_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.status_led = QLabel()
         self.status_led.setFixedSize(20, 20)
         self.status_led.setStyleSheet(
@@ -166,9 +170,13 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.actuator_params_group)
         self.actuator_params_group.setVisible(False)
 
-    def __init__(self) -> None:
+    def __init__(self, frame_source: Optional[FrameSource] = None) -> None:
         """
         Initialize the main window.
+
+        Args:
+            frame_source (Optional[FrameSource]): Source of the frames,
+                the first Basler camera found by pylon by default.
         """
         super().__init__()
         self.init_window_and_labels()
@@ -219,6 +227,7 @@ class MainWindow(QMainWindow):
         right_layout.addLayout(status_layout)
         right_layout.addWidget(self.image_label)
         right_layout.addWidget(self.status_label)
+        right_layout.addWidget(self.operating_point_label)
         right_layout.addSpacerItem(QSpacerItem(
             20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
 
@@ -230,12 +239,16 @@ class MainWindow(QMainWindow):
 
         # Connect camear thread signals to update_frame and process_actuation_timestamps methods
         self.detection_params = DefectDetectionParams()
-        self.camera_thread = CameraThread(params=self.detection_params)
+        self.camera_thread = CameraThread(
+            params=self.detection_params, source=frame_source)
         self.camera_thread.frame_signal.connect(self.update_frame)
         self.camera_thread.relay_signal.connect(
             self.process_actuation_timestamps)
         self.camera_thread.camera_temperature_signal.connect(
             lambda temp: self.update_status_led("green" if temp == "Ok" else "red"))
+        self.camera_thread.rate_signal.connect(self.update_operating_point)
+        self.camera_thread.metrics_signal.connect(self.update_frame_loss)
+        self.frame_loss_text = "Frames Lost: 0"
         self.actuation_timestamps = []
         self.relay = RelayController()
         self.update_time()
@@ -270,16 +283,47 @@ class MainWindow(QMainWindow):
         status_text: str = \
             f"Frame Count: {count} | Timestamp: {timestamp:.4f}\n\
                 Algorithm Processing Time: {algorithm_processing_time:.4f} | Maximum algorithm runs per second: {1.0/algorithm_processing_time:.4f}\n\
-                    Resulting Camera Frame Rate: {frame_rate:.2f} fps"
+                    Resulting Camera Frame Rate: {frame_rate:.2f} fps\n\
+                        {self.frame_loss_text}"
         self.status_label.setText(status_text)
         self.time_label.setText(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
+    def update_frame_loss(self, metrics: dict) -> None:
+        """
+        Update the frame loss counters shown in the status label.
+
+        Args:
+            metrics (dict): Pipeline metrics, with the frame loss counters under "frames".
+        """
+        frames: dict = metrics["frames"]
+        self.frame_loss_text = \
+            f"Frames Lost: {frames['lost']} | Skipped by Grab Strategy: " \
+            f"{frames['skipped_by_strategy']} | Dropped by Stream: {frames['dropped_by_stream']} | " \
+            f"Dropped by Queues: {frames['dropped_by_queues']}"
+
+    def update_operating_point(self, point: dict) -> None:
+        """
+        Update the operating point label with the state of the frame rate controller.
+
+        Args:
+            point (dict): Operating point of the frame rate controller,
+                with the frame rate applied to the camera.
+        """
+        self.operating_point_label.setText(
+            f"Operating Point: {point['applied_rate']:.2f} fps | "
+            f"{point['frames_per_capsule']:.1f} frames per capsule | "
+            f"Required {point['required_rate']:.2f} fps | "
+            f"Sustainable {point['sustainable_rate']:.2f} fps"
+            + (" | Detector too slow" if point['limited'] else ""))
+
     def process_actuation_timestamps(self, abs_actuation_timestamps: list[float]) -> None:
         """
         This method processes a list of absolute actuation timestamps by adding them to the
         existing list of actuation timestamps, converting the list to a min-heap, and
         determining if the relay should be actuated based on the current time and the
         earliest actuation timestamp.
+        Timestamps are expressed on the host monotonic clock, the same clock the camera
+        exposure timestamps are mapped to.
         If the current time is within the actuation window,
         the relay is turned on and the executed timestamp is removed from the list.
         Otherwise, the relay is turned off. The method also removes any timestamps that
@@ -314,10 +358,10 @@ class MainWindow(QMainWindow):
         ...    MainWindow.process_actuation_timestamps(instance, ts)
         >>> instance.process_actuation_timestamps = process_actuation_timestamps_wrapper
 
-        >>> current_time = time.time()
+        >>> current_time = time.monotonic()
         >>> timestamps = [current_time + 2, current_time + 10]
 
-        >>> with patch('time.time', return_value=current_time):
+        >>> with patch('time.monotonic', return_value=current_time):
         ...     instance.process_actuation_timestamps(timestamps)
         >>> instance.relay.state
         False
@@ -326,21 +370,21 @@ class MainWindow(QMainWindow):
         >>> instance.actuation_timestamps == [current_time + 2, current_time + 10]
         True
 
-        >>> with patch('time.time', return_value=current_time + 1.9):
+        >>> with patch('time.monotonic', return_value=current_time + 1.9):
         ...    instance.process_actuation_timestamps([])
         >>> instance.relay.state
         True
         >>> instance.last_actuation_time == current_time + 1.9
         True
 
-        >>> with patch('time.time', return_value=current_time + 2.1):
+        >>> with patch('time.monotonic', return_value=current_time + 2.1):
         ...    instance.process_actuation_timestamps([])
         >>> instance.relay.state
         True
         >>> instance.last_actuation_time == current_time + 1.9
         True
 
-        >>> with patch('time.time', return_value=current_time + 9.901):
+        >>> with patch('time.monotonic', return_value=current_time + 9.901):
         ...    instance.process_actuation_timestamps([])
         >>> instance.relay.state
         True
@@ -353,7 +397,7 @@ class MainWindow(QMainWindow):
         for timestamp in abs_actuation_timestamps:
             heapq.heappush(self.actuation_timestamps, timestamp)
 
-        current_timestamp: float = time.time()
+        current_timestamp: float = time.monotonic()
         # Remove expired timestamps
         while self.actuation_timestamps and self.actuation_timestamps[0] < current_timestamp:
             heapq.heappop(self.actuation_timestamps)
@@ -373,7 +417,7 @@ class MainWindow(QMainWindow):
         # Actuate relay based on timestamp comparison
         if self.actuation_timestamps:
             earliest_timestamp = self.actuation_timestamps[0]
-            current_timestamp: float = time.time()
+            current_timestamp: float = time.monotonic()
             target_timestamp: float = current_timestamp + ACTUATOR_RETRACTION_TIME
 
             # If within actuation window or still within retention time, keep the relay on
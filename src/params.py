@@ -18,6 +18,8 @@ DATA_DIR: Path = ROOT_DIR / 'data'
 IMAGES_DIR: Path = ROOT_DIR / 'images'
 BACKUP_DIR: Path = ROOT_DIR / 'backup'
 LOG_DIR: Path = ROOT_DIR / 'logs'
+# Full belt frames recorded by scripts/capture_video.py, replayed without a camera
+CAPTURED_FRAMES_DIR: Path = DATA_DIR / 'captured_frames'
 
 DEFAULT_EXPOSURE_TIME: int = 5000
 DEFAULT_FRAME_RATE: int = 100
@@ -39,7 +41,84 @@ INIT_HEIGHT: int = 1440
 # INIT_WIDTH: int = 1920
 # INIT_HEIGHT: int = 1080
 
+# Resolution of the processed frames relative to INIT_WIDTH x INIT_HEIGHT, e.g. 0.5 to
+# process a quarter of the pixels. The pixel thresholds and kernel sizes tuned at full
+# resolution are derived from it (see src/scaling.py)
+PROCESSING_SCALE: float = 1.0
+# Binning of the camera sensor (2 for 2x2), frames are downscaled in software for the part
+# of PROCESSING_SCALE the binning does not cover
+CAMERA_BINNING: int = 1
+
+# Adaptive frame rate hyper parameters
+# Adjust the acquisition frame rate to the belt speed and the detection latency
+ADAPTIVE_FRAME_RATE: bool = True
+# Minimum number of frames analysing each capsule while it crosses the field of view
+RATE_MIN_FRAMES_PER_CAPSULE: int = 8
+# Fraction of the detector throughput the frame rate may use
+RATE_HEADROOM: float = 0.8
+RATE_MIN_FPS: float = 2.0
+RATE_MAX_FPS: float = 60.0
+# Minimum interval between two frame rate decisions
+RATE_CONTROL_INTERVAL_S: float = 2.0
+
 GRABBING_TIMEOUT_MS: int = 5000
+# Read the grab buffer in place instead of converting and copying every frame
+GRAB_ZERO_COPY: bool = False
+# Pixel data delivered by the camera: "bgr" converts every frame to colour, "mono" (Mono8)
+# and "bayer" (raw Bayer) deliver a single channel plane, a third of the bandwidth,
+# which is segmented as it is while only the capsule crops are converted to colour
+GRAB_PIXEL_MODE: str = "bgr"
+
+# Camera clock hyper parameters
+# Frequency of the camera timestamp counter (1 GHz for USB3 Vision cameras)
+TIMESTAMP_TICK_FREQUENCY_HZ: float = 1e9
+# Interval between two latches of the camera timestamp counter
+CLOCK_SYNC_INTERVAL_S: float = 1.0
+
+# Pipeline hyper parameters
+# Capacity of the queues feeding the detection and presentation stages
+DETECT_QUEUE_SIZE: int = 2
+RENDER_QUEUE_SIZE: int = 2
+# Drop policy of each stage when its queue is full: "block", "drop_newest" or "drop_oldest"
+DETECT_DROP_POLICY: str = "drop_oldest"
+RENDER_DROP_POLICY: str = "drop_oldest"
+# Interval between two pipeline metrics reports
+METRICS_INTERVAL_S: float = 1.0
+# Interval between two samples of the camera temperature, frame rate and stream counters
+TELEMETRY_INTERVAL_S: float = 1.0
+# Number of detection worker processes, 0 runs the detection on a thread of this process
+# (e.g. os.cpu_count() - 2 leaves a core for grabbing and one for the GUI)
+DETECTION_WORKERS: int = 0
+# Number of threads removing the background and denoising each frame by horizontal stripes
+# in the in-thread detection stage (e.g. os.cpu_count() - 2), 0 runs them on the stage thread
+PREPROCESS_THREADS: int = 0
+# Skip the detection of frames where the belt is empty, judged on 2x2 tiles sampled every
+# EMPTY_BELT_STEP_PX pixels (even): the frame is empty when the foreground it estimates is
+# below EMPTY_BELT_AREA_RATIO of the smallest normal capsule area
+EMPTY_BELT_SKIP: bool = True
+EMPTY_BELT_STEP_PX: int = 16
+EMPTY_BELT_AREA_RATIO: float = 0.25
+# Segment only the strip that entered the field of view since the previous frame
+# (in-thread detection only, the frames of a worker process are not consecutive)
+INCREMENTAL_SEGMENTATION: bool = False
+# Reduction factor of the coarse image locating the capsules before the full resolution
+# denoising, which then only runs around them (4 or 8), 0 denoises the full frame
+# (see scripts/compare_pyramid.py to check a factor on recorded frames)
+SEGMENTATION_PYRAMID_SCALE: int = 0
+# Filter standing in for the median blur of the segmentation and of the local defect
+# check: "median", "box", "closing" or "half_median" (see utils/denoise.py, and
+# scripts/benchmark_denoise.py to check a backend on recorded frames)
+SEGMENTATION_DENOISE: str = "median"
+DEFECT_DENOISE: str = "median"
+# Columns re-segmented beyond the new strip, absorbing the belt speed error
+INCREMENTAL_MARGIN_PX: int = 32
+# Number of frames between two full frame segmentations
+INCREMENTAL_KEYFRAME_INTERVAL: int = 15
+
+# Lane of the inspected capsule centers as fractions of the frame: left, right, top, bottom.
+# Capsules centered outside of it are clipped by the field of view, the part of the frame
+# they cannot reach is not processed (see src/inspection_band.py)
+INSPECTION_BAND: tuple[float, float, float, float] = (0.10, 0.90, 0.0, 1.0)
 
 FOV_WIDTH_MM: float = 131.5
 # FOV_HEIGHT_MM: int = 100
@@ -54,6 +133,12 @@ STRICTLY_FLAT_BELT_LENGTH_MM: int = 340
 BELT_SPEED_MM_S: float = 114.0
 # BELT_SPEED_MM_S: float = 108.56
 
+# Capsule tracker hyper parameters
+# Maximum distance between the predicted and the detected center of a capsule
+TRACK_GATE_PX: float = 80.0
+# Time after which a capsule that is not detected anymore is forgotten
+TRACK_MAX_AGE_S: float = 0.5
+
 # Relay parameter
 VENDOR_ID: Annotated[int, "16-bit unsigned"] = 0x16C0
 PRODUCT_ID: Annotated[int, "16-bit unsigned"] = 0x05DF
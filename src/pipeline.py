@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Building blocks for the staged acquisition -> detection -> presentation pipeline.
+
+Each stage runs on its own thread and hands its output to the next stage through a
+bounded queue. When a queue is full its drop policy decides whether the producer waits,
+the incoming item is discarded or the oldest queued item is evicted, so a slow consumer
+never stalls the camera acquisition loop unless explicitly requested.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Optional
+
+
+class DropPolicy(Enum):
+    """
+    Behaviour of a `BoundedQueue` when an item is put while the queue is full.
+
+    Attributes:
+        BLOCK: The producer waits until the consumer frees a slot.
+        DROP_NEWEST: The incoming item is discarded.
+        DROP_OLDEST: The oldest queued item is evicted to make room for the incoming one.
+    """
+    BLOCK = "block"
+    DROP_NEWEST = "drop_newest"
+    DROP_OLDEST = "drop_oldest"
+
+
+@dataclass(slots=True)
+class QueueStats:
+    """
+    Snapshot of the occupancy counters of a `BoundedQueue`.
+
+    Attributes:
+        name (str): Name of the stage fed by the queue.
+        capacity (int): Maximum number of queued items.
+        occupancy (int): Number of items currently queued.
+        high_water (int): Highest occupancy observed since the queue was created.
+        put (int): Number of items accepted by the queue.
+        got (int): Number of items handed to the consumer.
+        dropped (int): Number of items discarded by the drop policy.
+    """
+    name: str
+    capacity: int
+    occupancy: int = 0
+    high_water: int = 0
+    put: int = 0
+    got: int = 0
+    dropped: int = 0
+
+
+class BoundedQueue:
+    """
+    A thread-safe FIFO queue with a fixed capacity and a configurable drop policy.
+
+    Items evicted or rejected by the drop policy are passed to `on_drop`, which allows
+    the owner to release any resource attached to them.
+
+    Example:
+        >>> q = BoundedQueue("detect", capacity=2, policy=DropPolicy.DROP_OLDEST)
+        >>> [q.put(i) for i in range(3)]
+        [True, True, True]
+        >>> q.get(), q.get()
+        (1, 2)
+        >>> q.stats().dropped
+        1
+        >>> q.close()
+        >>> q.get(timeout=0.01) is None
+        True
+    """
+
+    name: str
+    capacity: int
+    policy: DropPolicy
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self, name: str, capacity: int, policy: DropPolicy = DropPolicy.DROP_OLDEST,
+        on_drop: Optional[Callable[[Any], None]] = None
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError("Queue capacity must be greater than 0.")
+        self.name = name
+        self.capacity = capacity
+        self.policy = policy
+        self._on_drop = on_drop
+        self._items: deque = deque()
+        self._closed: bool = False
+        self._condition = threading.Condition()
+        self._stats = QueueStats(name=name, capacity=capacity)
+
+    @property
+    def closed(self) -> bool:
+        """
+        Whether the queue has been closed by the producer.
+        """
+        return self._closed
+
+    def put(self, item: Any, timeout: Optional[float] = None) -> bool:
+        """
+        Put an item into the queue, applying the drop policy if the queue is full.
+
+        Args:
+            item (Any): The item to enqueue.
+            timeout (Optional[float]): Maximum waiting time in seconds for `DropPolicy.BLOCK`.
+
+        Returns:
+            bool: True if the item was queued, False if it was discarded.
+        """
+        dropped: Any = None
+        accepted: bool = True
+        with self._condition:
+            if self._closed:
+                return False
+            if len(self._items) >= self.capacity:
+                if self.policy is DropPolicy.BLOCK:
+                    has_room: bool = self._condition.wait_for(
+                        lambda: len(self._items) < self.capacity or self._closed, timeout)
+                    if not has_room or self._closed:
+                        dropped, accepted = item, False
+                elif self.policy is DropPolicy.DROP_NEWEST:
+                    dropped, accepted = item, False
+                else:
+                    dropped = self._items.popleft()
+            if accepted:
+                self._items.append(item)
+                self._stats.put += 1
+                self._stats.high_water = max(
+                    self._stats.high_water, len(self._items))
+                self._condition.notify_all()
+            if dropped is not None:
+                self._stats.dropped += 1
+        if dropped is not None and self._on_drop is not None:
+            self._on_drop(dropped)
+        return accepted
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Get the oldest item from the queue.
+
+        Args:
+            timeout (Optional[float]): Maximum waiting time in seconds.
+
+        Returns:
+            Any: The oldest item, or None if the queue is empty after the timeout
+            or closed and drained.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._stats.got += 1
+            self._condition.notify_all()
+            return item
+
+    def close(self) -> None:
+        """
+        Close the queue, waking up every waiting producer and consumer.
+        Items still queued can be drained with `get`.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def drain(self) -> list:
+        """
+        Remove and return every queued item without counting them as consumed.
+        """
+        with self._condition:
+            items: list = list(self._items)
+            self._items.clear()
+            self._condition.notify_all()
+            return items
+
+    def stats(self) -> QueueStats:
+        """
+        Return a snapshot of the occupancy counters.
+        """
+        with self._condition:
+            return QueueStats(
+                name=self._stats.name, capacity=self._stats.capacity,
+                occupancy=len(self._items), high_water=self._stats.high_water,
+                put=self._stats.put, got=self._stats.got, dropped=self._stats.dropped)
+
+
+class PipelineStage(threading.Thread):
+    """
+    A worker thread that takes items from an inbox, processes them with a handler and
+    forwards non-None results to an optional outbox.
+
+    The stage exits once its inbox is closed and drained, and closes its outbox in turn
+    so that downstream stages shut down in order.
+
+    Example:
+        >>> inbox = BoundedQueue("square", 4, DropPolicy.BLOCK)
+        >>> outbox = BoundedQueue("out", 4, DropPolicy.BLOCK)
+        >>> stage = PipelineStage("square", lambda x: x * x, inbox, outbox)
+        >>> stage.start()
+        >>> _ = [inbox.put(i) for i in (2, 3)]
+        >>> inbox.close()
+        >>> stage.join()
+        >>> outbox.get(), outbox.get()
+        (4, 9)
+    """
+
+    handler: Callable[[Any], Any]
+    inbox: BoundedQueue
+    outbox: Optional[BoundedQueue]
+    processed: int
+    busy_time: float
+
+    def __init__(
+        self, name: str, handler: Callable[[Any], Any],
+        inbox: BoundedQueue, outbox: Optional[BoundedQueue] = None
+    ) -> None:
+        super().__init__(name=name, daemon=True)
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.processed = 0
+        self.busy_time = 0.0
+
+    def run(self) -> None:
+        while True:
+            item = self.inbox.get(timeout=0.1)
+            if item is None:
+                if self.inbox.closed:
+                    break
+                continue
+            start_time: float = time.perf_counter()
+            try:
+                result = self.handler(item)
+            # pylint: disable=broad-except
+            except Exception as e:
+                logging.error("Stage %s failed to process an item: %s", self.name, e)
+                result = None
+            self.busy_time += time.perf_counter() - start_time
+            self.processed += 1
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+        if self.outbox is not None:
+            self.outbox.close()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
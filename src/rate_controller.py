@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Adaptive acquisition frame rate.
+
+The frame rate has a lower bound set by the belt: every capsule must be analysed in at
+least `min_frames` frames while it crosses the analysed part of the field of view. It has
+an upper bound set by the detector: frames must not be produced faster than the detection
+stage processes them. The controller tracks the detection latency and moves the frame rate
+to the lowest rate meeting the belt bound, within the detector bound.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from src.params import BELT_SPEED_MM_S, FOV_WIDTH_MM, INIT_FRAME_RATE
+from src.params import RATE_MIN_FRAMES_PER_CAPSULE, RATE_HEADROOM
+from src.params import RATE_MIN_FPS, RATE_MAX_FPS, RATE_CONTROL_INTERVAL_S
+
+# Part of the field of view in which capsules are analysed, see locate_capsules
+ANALYSED_VIEW_FRACTION: float = 0.80
+
+
+@dataclass(slots=True, frozen=True)
+class OperatingPoint:
+    """
+    The state of the frame rate controller.
+
+    Attributes:
+        frame_rate (float): Frame rate requested from the camera.
+        required_rate (float): Lowest frame rate analysing every capsule `min_frames` times.
+        sustainable_rate (float): Highest frame rate the detector keeps up with.
+        detection_latency (float): Smoothed detection time of a frame in seconds.
+        frames_per_capsule (float): Number of frames analysing a capsule at frame_rate.
+        limited (bool): Whether the detector is too slow for the required rate.
+    """
+    frame_rate: float
+    required_rate: float
+    sustainable_rate: float
+    detection_latency: float
+    frames_per_capsule: float
+    limited: bool
+
+
+class FrameRateController:
+    """
+    Derives the acquisition frame rate from the belt speed and the detection latency.
+
+    Example:
+        >>> controller = FrameRateController(
+        ...     belt_speed=100.0, view_length=100.0, min_frames=5, interval=1.0)
+        >>> controller.required_rate()
+        5.0
+        >>> point = controller.observe(0.05, now=1.0)
+        >>> point.frame_rate, point.sustainable_rate, point.limited
+        (5.0, 16.0, False)
+        >>> controller.observe(0.05, now=1.5) is None
+        True
+    """
+
+    belt_speed: float
+    view_length: float
+    min_frames: int
+    parallelism: int
+    headroom: float
+    min_rate: float
+    max_rate: float
+    smoothing: float
+    interval: float
+    frame_rate: float
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self, belt_speed: float = BELT_SPEED_MM_S,
+        view_length: float = ANALYSED_VIEW_FRACTION * FOV_WIDTH_MM,
+        min_frames: int = RATE_MIN_FRAMES_PER_CAPSULE, parallelism: int = 1,
+        headroom: float = RATE_HEADROOM, min_rate: float = RATE_MIN_FPS,
+        max_rate: float = RATE_MAX_FPS, smoothing: float = 0.2,
+        interval: float = RATE_CONTROL_INTERVAL_S
+    ) -> None:
+        """
+        Initialize the controller.
+
+        Args:
+            belt_speed (float): Belt speed in mm/s.
+            view_length (float): Length of the analysed part of the field of view in mm.
+            min_frames (int): Minimum number of frames analysing each capsule.
+            parallelism (int): Number of frames detected at the same time.
+            headroom (float): Fraction of the detector throughput the frame rate may use.
+            min_rate (float): Lowest frame rate in frames per second.
+            max_rate (float): Highest frame rate in frames per second.
+            smoothing (float): Weight of a new latency sample in the moving average.
+            interval (float): Minimum interval between two decisions in seconds.
+        """
+        self.belt_speed = belt_speed
+        self.view_length = view_length
+        self.min_frames = min_frames
+        self.parallelism = parallelism
+        self.headroom = headroom
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.smoothing = smoothing
+        self.interval = interval
+        self.reset()
+
+    def reset(self, frame_rate: float = INIT_FRAME_RATE) -> None:
+        """
+        Forget the measured latency and restart from a frame rate.
+
+        Args:
+            frame_rate (float): Current frame rate of the camera.
+        """
+        self.frame_rate = frame_rate
+        self._latency: Optional[float] = None
+        self._last_decision: Optional[float] = None
+
+    def required_rate(self) -> float:
+        """
+        Lowest frame rate analysing every capsule in min_frames frames.
+
+        Returns:
+            float: Frame rate in frames per second.
+        """
+        return self.min_frames * self.belt_speed / self.view_length
+
+    def observe(self, latency: float, now: float) -> Optional[OperatingPoint]:
+        """
+        Record the detection latency of a frame and decide the frame rate
+        once every interval.
+
+        Args:
+            latency (float): Detection time of the frame in seconds.
+            now (float): Current host monotonic time in seconds.
+
+        Returns:
+            Optional[OperatingPoint]: The new operating point, None between two decisions.
+        """
+        if latency > 0:
+            self._latency = latency if self._latency is None else \
+                (1 - self.smoothing) * self._latency + self.smoothing * latency
+        if self._latency is None:
+            return None
+        if self._last_decision is not None and now - self._last_decision < self.interval:
+            return None
+        self._last_decision = now
+
+        required: float = self.required_rate()
+        sustainable: float = self.headroom * self.parallelism / self._latency
+        ceiling: float = min(sustainable, self.max_rate)
+        self.frame_rate = max(min(max(required, self.min_rate), ceiling), self.min_rate)
+        return OperatingPoint(
+            frame_rate=self.frame_rate, required_rate=required,
+            sustainable_rate=sustainable, detection_latency=self._latency,
+            frames_per_capsule=self.frame_rate * self.view_length / self.belt_speed,
+            limited=required > ceiling)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Processing of the frames at a reduced resolution.
+
+The pixel thresholds and kernel sizes of the detection chain are tuned for the full
+resolution frames. A processing scale reduces the frames, by binning on the camera or by
+downscaling in software, and derives every threshold and kernel size from the full
+resolution value: lengths scale with the factor, areas with its square, and kernels keep
+the nearest odd size. A recipe tuned at full resolution then runs unchanged at the
+reduced resolution.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import cv2
+import numpy as np
+from numpy.typing import NDArray
+
+from src.buffer_pool import BufferPool
+from src.parameter import DefectDetectionParams
+from src.params import MM_PER_PIXEL
+from utils.transform import bayer_superpixels
+
+
+@dataclass(slots=True, frozen=True)
+class ProcessingScale:
+    """
+    Resolution of the processed frames relative to the full resolution.
+
+    Attributes:
+        factor (float): Size ratio of the processed frames, e.g. 0.5 for 2x2 binning.
+
+    Example:
+        >>> scale = ProcessingScale(0.5)
+        >>> scale.length(330), scale.area(35000), scale.kernel(15)
+        (165, 8750, 7)
+        >>> scale.params(DefectDetectionParams()).normal_length_upper
+        165
+    """
+    factor: float = 1.0
+
+    def __post_init__(self) -> None:
+        if not 0 < self.factor <= 1:
+            raise ValueError("The processing scale must be in (0, 1].")
+
+    def length(self, pixels: float) -> int:
+        """
+        A full resolution length in processed pixels.
+        """
+        return max(1, int(round(pixels * self.factor)))
+
+    def area(self, pixels: float) -> int:
+        """
+        A full resolution area in processed pixels.
+        """
+        return max(1, int(round(pixels * self.factor ** 2)))
+
+    def kernel(self, size: int) -> int:
+        """
+        A full resolution kernel size in processed pixels, odd and at least 3.
+        """
+        return max(3, 2 * int(round((size * self.factor - 1) / 2)) + 1)
+
+    @property
+    def mm_per_pixel(self) -> float:
+        """
+        Size of a processed pixel on the belt in mm.
+        """
+        return MM_PER_PIXEL / self.factor
+
+    def params(self, params: DefectDetectionParams) -> DefectDetectionParams:
+        """
+        The detection parameters of a full resolution recipe, in processed pixels.
+
+        Args:
+            params (DefectDetectionParams): Parameters tuned at full resolution.
+
+        Returns:
+            DefectDetectionParams: The parameters with scaled lengths and areas.
+        """
+        if self.factor == 1:
+            return params
+        return replace(
+            params,
+            normal_length_lower=self.length(params.normal_length_lower),
+            normal_length_upper=self.length(params.normal_length_upper),
+            normal_area_lower=self.area(params.normal_area_lower),
+            normal_area_upper=self.area(params.normal_area_upper),
+            local_defect_length=self.length(params.local_defect_length))
+
+    def prepare(
+        self, image: NDArray[np.uint8], cfa_pattern: Optional[str] = None, binning: int = 1,
+        buffers: Optional[BufferPool] = None
+    ) -> tuple[NDArray[np.uint8], Optional[str]]:
+        """
+        Bring a frame to the processing scale.
+
+        Frames binned by the camera to the processing scale are returned as they are.
+        Other frames are downscaled, raw Bayer planes through the BGR image of their
+        2x2 tiles, which is already half the resolution.
+
+        Args:
+            image (NDArray[np.uint8]): BGR image or single channel plane of the frame.
+            cfa_pattern (Optional[str]): Colour filter array layout of a raw Bayer plane.
+            binning (int): Binning already applied by the camera.
+            buffers (Optional[BufferPool]): Pool of the downscaled frame.
+
+        Returns:
+            tuple[NDArray[np.uint8], Optional[str]]: The frame at the processing scale and
+            its colour filter array layout.
+        """
+        ratio: float = self.factor * binning
+        if ratio == 1:
+            return image, cfa_pattern
+        if cfa_pattern is not None:
+            image, cfa_pattern, ratio = bayer_superpixels(image, cfa_pattern), None, 2 * ratio
+            if ratio == 1:
+                return image, cfa_pattern
+        size: tuple[int, int] = (
+            max(1, int(round(image.shape[1] * ratio))), max(1, int(round(image.shape[0] * ratio))))
+        dst: Optional[NDArray[np.uint8]] = None
+        if buffers is not None:
+            dst = buffers.get("scaled", (size[1], size[0]) + image.shape[2:])
+        return cv2.resize(image, size, dst=dst, interpolation=cv2.INTER_AREA), cfa_pattern
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
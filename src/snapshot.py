@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Immutable snapshot of the detection parameters and of everything derived from them.
+
+The GUI edits the parameters while frames are being detected. A snapshot is built once
+whenever the parameters change, from a copy of them, and carries the background
+classifier with its bound arrays and lookup table, the thresholds and kernel sizes at the
+processing scale, and the reach of the processed view. The detector takes the current
+snapshot once at the start of a frame, a single reference read, so that a frame is
+detected with one consistent set of parameters and nothing is derived per frame.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Union
+
+from src.background import BackgroundClassifier
+from src.contours import CONTOUR_POINTS_RANGE, LENGTH_MARGIN_PX
+from src.defects import DEFECT_MEDIAN_KERNEL_PX
+from src.parameter import DefectDetectionParams
+from src.params import INIT_WIDTH, PROCESSING_SCALE, EMPTY_BELT_AREA_RATIO
+from src.scaling import ProcessingScale
+from utils.transform import DENOISE_KERNEL_PX, opened_halo
+
+# Normal range of capsule widths at full resolution
+NORMAL_WIDTH_RANGE: tuple[int, int] = (100, 150)
+
+
+# pylint: disable=too-many-instance-attributes
+@dataclass(slots=True, frozen=True)
+class DetectionSnapshot:
+    """
+    Detection parameters of a frame with their derived constants, at the processing scale.
+
+    Attributes:
+        version (int): Number of parameter changes before the snapshot was built.
+        params (DefectDetectionParams): Copy of the parameters tuned at full resolution.
+        scale (ProcessingScale): Processing scale the constants are derived for.
+        scaled (DefectDetectionParams): The parameters in processed pixels.
+        classifier (BackgroundClassifier): Classifier of the background bounds.
+        kernel_size (int): Size of the median blur and of the opening of the segmentation.
+        defect_median_kernel (int): Size of the median blur revealing local defects.
+        points_range (tuple[int, int]): Range of the number of points of a capsule contour.
+        length_margin (int): Tolerance on the normal range of capsule lengths.
+        normal_length_range (tuple[int, int]): Normal range of capsule lengths.
+        normal_width_range (tuple[int, int]): Normal range of capsule widths.
+        normal_area_range (tuple[int, int]): Normal range of capsule areas.
+        frame_width (int): Width of the full frame at the processing scale.
+        view_reach (int): Distance from an inspected center within which the capsule and
+            the pixels affecting its segmentation lie.
+        empty_area (float): Foreground area under which the belt is empty.
+
+    Example:
+        >>> params = DefectDetectionParams()
+        >>> snapshot = DetectionSnapshot.build(params, ProcessingScale(0.5), version=3)
+        >>> snapshot.version, snapshot.normal_length_range, snapshot.kernel_size
+        (3, (155, 165), 7)
+        >>> params.normal_length_upper = 400
+        >>> snapshot.params.normal_length_upper
+        330
+        >>> DetectionSnapshot.of(snapshot) is snapshot
+        True
+    """
+    version: int
+    params: DefectDetectionParams
+    scale: ProcessingScale
+    scaled: DefectDetectionParams
+    classifier: BackgroundClassifier
+    kernel_size: int
+    defect_median_kernel: int
+    points_range: tuple[int, int]
+    length_margin: int
+    normal_length_range: tuple[int, int]
+    normal_width_range: tuple[int, int]
+    normal_area_range: tuple[int, int]
+    frame_width: int
+    view_reach: int
+    empty_area: float
+
+    @staticmethod
+    def build(
+        params: DefectDetectionParams,
+        scale: ProcessingScale = ProcessingScale(PROCESSING_SCALE), version: int = 0
+    ) -> "DetectionSnapshot":
+        """
+        Derive the constants of a set of parameters.
+
+        Args:
+            params (DefectDetectionParams): Parameters tuned at full resolution, copied so
+                that later changes do not reach the snapshot.
+            scale (ProcessingScale): Processing scale of the frames.
+            version (int): Number of parameter changes so far.
+
+        Returns:
+            DetectionSnapshot: The snapshot of the parameters.
+        """
+        params = replace(params)
+        scaled: DefectDetectionParams = scale.params(params)
+        kernel_size: int = scale.kernel(DENOISE_KERNEL_PX)
+        # The crops of the capsules extend to 0.55 times the longest capsule from their center
+        longest: int = scale.length(params.normal_length_upper + LENGTH_MARGIN_PX)
+        return DetectionSnapshot(
+            version=version,
+            params=params,
+            scale=scale,
+            scaled=scaled,
+            classifier=BackgroundClassifier.from_params(params),
+            kernel_size=kernel_size,
+            defect_median_kernel=scale.kernel(DEFECT_MEDIAN_KERNEL_PX),
+            points_range=(
+                scale.length(CONTOUR_POINTS_RANGE[0]), scale.length(CONTOUR_POINTS_RANGE[1])),
+            length_margin=scale.length(LENGTH_MARGIN_PX),
+            normal_length_range=(scaled.normal_length_lower, scaled.normal_length_upper),
+            normal_width_range=(
+                scale.length(NORMAL_WIDTH_RANGE[0]), scale.length(NORMAL_WIDTH_RANGE[1])),
+            normal_area_range=(scaled.normal_area_lower, scaled.normal_area_upper),
+            frame_width=scale.length(INIT_WIDTH),
+            view_reach=-(-longest * 11 // 20) + opened_halo(kernel_size) + 1,
+            empty_area=EMPTY_BELT_AREA_RATIO * scaled.normal_area_lower)
+
+    @staticmethod
+    def of(
+        params: Union[DefectDetectionParams, "DetectionSnapshot"],
+        scale: ProcessingScale = ProcessingScale(PROCESSING_SCALE)
+    ) -> "DetectionSnapshot":
+        """
+        The snapshot itself, or the snapshot of plain parameters at a processing scale.
+
+        Args:
+            params (Union[DefectDetectionParams, DetectionSnapshot]): Parameters tuned at
+                full resolution, or a snapshot, whose own scale is then kept.
+            scale (ProcessingScale): Processing scale of plain parameters.
+
+        Returns:
+            DetectionSnapshot: The snapshot of the parameters.
+        """
+        if isinstance(params, DetectionSnapshot):
+            return params
+        return DetectionSnapshot.build(params, scale)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
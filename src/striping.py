@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Multi-threaded preprocessing of the frames by horizontal stripes.
+
+Background removal classifies every pixel on its own, and the median filter, threshold
+and opening of `get_img_opened` only look at the pixels within their reach. A frame is
+therefore split into one stripe per thread: each thread removes the background of its
+rows and denoises them together with a halo of the rows around them, then writes its rows
+of the result into the shared output array. OpenCV releases the GIL, so the stripes run in
+parallel independently of the internal threading of OpenCV, and the result is the same as
+on the full frame.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+from numpy.typing import NDArray
+
+from src.background import BackgroundClassifier
+from src.buffer_pool import BufferPool
+from utils.transform import DENOISE_KERNEL_PX, get_img_opened, opened_halo
+
+
+class StripedExecutor:
+    """
+    Runs the preprocessing of a frame on horizontal stripes in a thread pool.
+
+    Stripe boundaries and halos are aligned to even rows, so that the stripes of a raw
+    Bayer plane start on the same colour filter row as the frame.
+
+    Example:
+        >>> executor = StripedExecutor(threads=3)
+        >>> executor.stripes(100)
+        [(0, 34), (34, 68), (68, 100)]
+        >>> img = np.zeros((100, 80, 3), dtype=np.uint8)
+        >>> _ = cv2.rectangle(img, (10, 20), (60, 70), (200, 200, 200), -1)
+        >>> np.array_equal(executor.get_img_opened(img), get_img_opened(img))
+        True
+        >>> executor.close()
+    """
+
+    threads: int
+    # Scratch arrays of the stripe with the same index, only used by one thread at a time
+    buffers: list[BufferPool]
+
+    def __init__(self, threads: int) -> None:
+        """
+        Initialize the thread pool.
+
+        Args:
+            threads (int): Number of threads and of stripes per frame.
+        """
+        self.threads = max(1, threads)
+        self.buffers = [BufferPool() for _ in range(self.threads)]
+        self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="stripe")
+
+    def stripes(self, height: int) -> list[tuple[int, int]]:
+        """
+        Split the rows of a frame into stripes of nearly equal, even height.
+
+        Args:
+            height (int): Height of the frame in pixels.
+
+        Returns:
+            list[tuple[int, int]]: First and past-the-end row of every non-empty stripe.
+        """
+        step: int = -(-height // (2 * self.threads)) * 2
+        return [(top, min(top + step, height)) for top in range(0, height, step)]
+
+    def map(self, func: Callable[[int, int, int], None], height: int) -> None:
+        """
+        Call a function on every stripe in the thread pool and wait for all of them.
+
+        Args:
+            func (Callable[[int, int, int], None]): Function of the stripe index and of
+                its first and past-the-end row.
+            height (int): Height of the frame in pixels.
+        """
+        futures = [self._pool.submit(func, index, top, bottom)
+                   for index, (top, bottom) in enumerate(self.stripes(height))]
+        # Raise the exception of a stripe only once every stripe is done with the arrays
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    def remove_background(
+        self, classifier: BackgroundClassifier, image: NDArray[np.uint8],
+        cfa_pattern: Optional[str] = None, dst: Optional[NDArray[np.uint8]] = None,
+        mask: Optional[NDArray[np.uint8]] = None
+    ) -> NDArray[np.uint8]:
+        """
+        Set the background pixels of a frame to black, stripe by stripe.
+
+        Args:
+            classifier (BackgroundClassifier): Classifier of the background bounds.
+            image (NDArray[np.uint8]): BGR image, Mono8 plane or raw Bayer plane.
+            cfa_pattern (Optional[str]): Colour filter array layout of a raw Bayer plane.
+            dst (Optional[NDArray[np.uint8]]): Array receiving the result, shaped like image.
+            mask (Optional[NDArray[np.uint8]]): Single channel array receiving the foreground
+                mask.
+
+        Returns:
+            NDArray[np.uint8]: The frame with the background set to black.
+        """
+        if dst is None:
+            dst = np.empty_like(image)
+        if mask is None:
+            mask = np.empty(image.shape[:2], dtype=np.uint8)
+
+        def remove(_index: int, top: int, bottom: int) -> None:
+            classifier.remove_background(
+                image[top:bottom], cfa_pattern, dst=dst[top:bottom], mask=mask[top:bottom])
+
+        self.map(remove, image.shape[0])
+        return dst
+
+    def get_img_opened(
+        self, img_raw: NDArray[np.uint8], dst: Optional[NDArray[np.uint8]] = None,
+        kernel_size: int = DENOISE_KERNEL_PX, denoise_backend: str = "median"
+    ) -> NDArray[np.uint8]:
+        """
+        Striped variant of `get_img_opened`, each stripe denoised with a halo of the rows
+        within the reach of the filters.
+
+        Args:
+            img_raw (NDArray[np.uint8]): The BGR image, or a Mono8 or raw Bayer plane.
+            dst (Optional[NDArray[np.uint8]]): Single channel array receiving the result.
+            kernel_size (int): Odd size of the median blur and of the opening.
+            denoise_backend (str): Filter standing in for the median blur.
+
+        Returns:
+            NDArray[np.uint8]: The processed image after applying the morphological operations.
+        """
+        height: int = img_raw.shape[0]
+        if dst is None:
+            dst = np.empty(img_raw.shape[:2], dtype=np.uint8)
+        halo: int = -(-opened_halo(kernel_size) // 2) * 2
+
+        def open_stripe(index: int, top: int, bottom: int) -> None:
+            start, stop = max(top - halo, 0), min(bottom + halo, height)
+            source: NDArray[np.uint8] = img_raw[start:stop]
+            buffers: BufferPool = self.buffers[index]
+            opened = get_img_opened(
+                source, dst=buffers.get("opened", source.shape[:2]),
+                img_gray=buffers.get("gray", source.shape[:2]),
+                img_blurred=buffers.get("blurred", source.shape[:2]), kernel_size=kernel_size,
+                denoise_backend=denoise_backend)
+            np.copyto(dst[top:bottom], opened[top - start:bottom - start])
+
+        self.map(open_stripe, height)
+        return dst
+
+    def close(self) -> None:
+        """
+        Stop the threads once the running stripes are done.
+        """
+        self._pool.shutdown()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
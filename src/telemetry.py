@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Camera telemetry sampled at a low rate.
+
+Reading the temperature, the resulting frame rate or the stream counters is a GenICam
+node access that may go over the transport layer. The sampler reads them on its own
+thread every TELEMETRY_INTERVAL_S and publishes the latest values, so that the grab and
+detection loops never wait on them.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from src.frame_source import FrameSource
+from src.params import TELEMETRY_INTERVAL_S
+
+
+@dataclass(slots=True, frozen=True)
+class TelemetrySnapshot:
+    """
+    The camera telemetry at one instant.
+
+    Attributes:
+        sample_time (float): Host monotonic time of the sample.
+        temperature_status (str): Temperature status of the device, "Ok" in the operating range.
+        resulting_frame_rate (float): Frame rate the source is delivering.
+        stream_statistics (dict[str, int]): Buffer and dropped frame counters of the stream.
+    """
+    sample_time: float = 0.0
+    temperature_status: str = "Ok"
+    resulting_frame_rate: float = 0.0
+    stream_statistics: dict[str, int] = field(default_factory=dict)
+
+
+class TelemetrySampler(threading.Thread):
+    """
+    Samples the telemetry of a frame source until stopped.
+
+    Example:
+        >>> from unittest.mock import MagicMock
+        >>> source = MagicMock(spec=FrameSource)
+        >>> source.temperature_status.return_value = "Critical"
+        >>> source.resulting_frame_rate.return_value = 15.0
+        >>> source.stream_statistics.return_value = {"total_buffer_count": 3}
+        >>> sampler = TelemetrySampler(source, interval=0.01)
+        >>> sampler.sample().temperature_status
+        'Critical'
+        >>> sampler.latest.resulting_frame_rate
+        15.0
+    """
+
+    source: FrameSource
+    interval: float
+    on_sample: Optional[Callable[[TelemetrySnapshot], None]]
+
+    def __init__(
+        self, source: FrameSource, interval: float = TELEMETRY_INTERVAL_S,
+        on_sample: Optional[Callable[[TelemetrySnapshot], None]] = None,
+        wait: Optional[Callable[[float], bool]] = None
+    ) -> None:
+        """
+        Initialize the sampler.
+
+        Args:
+            source (FrameSource): Frame source to sample.
+            interval (float): Interval between two samples in seconds.
+            on_sample (Optional[Callable[[TelemetrySnapshot], None]]): Called on the sampler
+                thread with every new snapshot.
+            wait (Optional[Callable[[float], bool]]): Waits for an interval between two
+                samples and returns True to stop sampling, the wait of the stop event
+                by default.
+        """
+        super().__init__(name="telemetry", daemon=True)
+        self.source = source
+        self.interval = interval
+        self.on_sample = on_sample
+        self._latest: TelemetrySnapshot = TelemetrySnapshot()
+        self._stopped = threading.Event()
+        self._wait: Callable[[float], bool] = wait if wait is not None else self._stopped.wait
+
+    @property
+    def latest(self) -> TelemetrySnapshot:
+        """
+        The last sampled telemetry, replaced atomically by every sample.
+        """
+        return self._latest
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            self.sample()
+            if self._wait(self.interval):
+                break
+
+    def sample(self) -> TelemetrySnapshot:
+        """
+        Read the telemetry of the source once and publish it.
+
+        Returns:
+            TelemetrySnapshot: The new snapshot, or the previous one if the source failed.
+        """
+        try:
+            self._latest = TelemetrySnapshot(
+                sample_time=time.monotonic(),
+                temperature_status=self.source.temperature_status(),
+                resulting_frame_rate=self.source.resulting_frame_rate(),
+                stream_statistics=self.source.stream_statistics())
+        # pylint: disable=broad-except
+        except Exception as e:
+            logging.error("Error sampling the camera telemetry %s", e)
+            return self._latest
+        if self.on_sample is not None:
+            self.on_sample(self._latest)
+        return self._latest
+
+    def stop(self) -> None:
+        """
+        Stop sampling and wait for the sampler thread to exit.
+        """
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
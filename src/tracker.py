@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cross-frame capsule tracking.
+
+A capsule stays in the field of view for many frames. The tracker predicts where every
+known capsule moved since the previous frame from the belt speed, associates the new
+detections with these predictions and keeps a persistent ID per capsule, so that a
+defective capsule is actuated once instead of once per frame it appears in.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from src.params import BELT_SPEED_MM_S, MM_PER_PIXEL, INIT_WIDTH
+from src.params import TRACK_GATE_PX, TRACK_MAX_AGE_S
+
+
+@dataclass(slots=True)
+class Track:
+    """
+    A capsule followed across frames.
+
+    Attributes:
+        track_id (int): Persistent ID of the capsule.
+        x (float): Horizontal position at the last detection in pixels.
+        y (float): Vertical position at the last detection in pixels.
+        last_time (float): Exposure time of the last detection.
+        hits (int): Number of frames the capsule was detected in.
+        defective (bool): Whether the capsule was flagged as defective in any frame.
+    """
+    track_id: int
+    x: float
+    y: float
+    last_time: float
+    hits: int = 1
+    defective: bool = False
+
+    def predict(self, exposure_time: float, pixel_speed: float) -> tuple[float, float]:
+        """
+        Predict the position of the capsule at an exposure time.
+        """
+        return self.x + pixel_speed * (exposure_time - self.last_time), self.y
+
+
+class CapsuleTracker:
+    """
+    Assigns persistent IDs to the capsules moving along the belt (towards +x)
+    and reports each defective capsule once.
+
+    Example:
+        >>> tracker = CapsuleTracker(pixel_speed=100.0)
+        >>> tracker.update(0.0, [(200.0, 50.0)], [(200.0, 50.0)])
+        ([1], [(200.0, 50.0)])
+        >>> tracker.update(0.1, [(211.0, 51.0), (20.0, 60.0)], [(211.0, 51.0)])
+        ([1, 2], [])
+    """
+
+    pixel_speed: float
+    gate: float
+    max_age: float
+    frame_width: int
+    tracks: list[Track]
+    _next_id: int
+
+    def __init__(
+        self, pixel_speed: float = BELT_SPEED_MM_S / MM_PER_PIXEL,
+        gate: float = TRACK_GATE_PX, max_age: float = TRACK_MAX_AGE_S,
+        frame_width: int = INIT_WIDTH
+    ) -> None:
+        """
+        Initialize the tracker.
+
+        Args:
+            pixel_speed (float): Belt speed in pixels per second.
+            gate (float): Maximum distance between a prediction and a detection in pixels.
+            max_age (float): Time after which a capsule that is not detected anymore is
+                forgotten, in seconds.
+            frame_width (int): Frame width in pixels, capsules predicted beyond it left the view.
+        """
+        self.pixel_speed = pixel_speed
+        self.gate = gate
+        self.max_age = max_age
+        self.frame_width = frame_width
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget every track.
+        """
+        self.tracks = []
+        self._next_id = 1
+
+    def update(
+        self, exposure_time: float, capsule_centers: list, abnormal_centers: list
+    ) -> tuple[list[int], list]:
+        """
+        Associate the capsules of a frame with the known tracks.
+        Frames must be passed in exposure order.
+
+        Args:
+            exposure_time (float): Exposure time of the frame in seconds.
+            capsule_centers (list): Centers of every detected capsule.
+            abnormal_centers (list): Centers of the defective capsules,
+                a subset of `capsule_centers`.
+
+        Returns:
+            tuple[list[int], list]: The track ID of every capsule center, and the centers
+            of the capsules flagged as defective for the first time, to be actuated.
+        """
+        self._expire(exposure_time)
+
+        # Greedy association: the closest prediction and detection pairs first
+        track_ids: list[Optional[int]] = [None] * len(capsule_centers)
+        matched: dict[int, Track] = {}
+        if self.tracks and capsule_centers:
+            predictions: np.ndarray = np.array(
+                [track.predict(exposure_time, self.pixel_speed) for track in self.tracks])
+            detections: np.ndarray = np.array(capsule_centers, dtype=np.float64)[:, :2]
+            distances: np.ndarray = np.linalg.norm(
+                predictions[:, None, :] - detections[None, :, :], axis=2)
+            used_tracks: set[int] = set()
+            for flat_index in np.argsort(distances, axis=None):
+                track_index, center_index = np.unravel_index(flat_index, distances.shape)
+                if distances[track_index, center_index] > self.gate:
+                    break
+                if track_index in used_tracks or track_ids[center_index] is not None:
+                    continue
+                used_tracks.add(track_index)
+                track_ids[center_index] = self.tracks[track_index].track_id
+                matched[int(center_index)] = self.tracks[track_index]
+
+        new_defects: list = []
+        for center_index, center in enumerate(capsule_centers):
+            track: Optional[Track] = matched.get(center_index)
+            if track is None:
+                track = Track(
+                    track_id=self._next_id, x=float(center[0]), y=float(center[1]),
+                    last_time=exposure_time)
+                self._next_id += 1
+                self.tracks.append(track)
+                track_ids[center_index] = track.track_id
+            else:
+                track.x, track.y = float(center[0]), float(center[1])
+                track.last_time = exposure_time
+                track.hits += 1
+            if not track.defective and center in abnormal_centers:
+                track.defective = True
+                new_defects.append(center)
+        return track_ids, new_defects
+
+    def _expire(self, exposure_time: float) -> None:
+        """
+        Forget the tracks that left the field of view or were not detected for too long.
+        """
+        self.tracks = [
+            track for track in self.tracks
+            if exposure_time - track.last_time <= self.max_age
+            and track.predict(exposure_time, self.pixel_speed)[0] <= self.frame_width + self.gate
+        ]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
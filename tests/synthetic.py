@@ -0,0 +1,93 @@
+"""
+Synthetic belt frames shared by the tests.
+
+Capsules are drawn as filled ellipses of the normal capsule size, on the belt colour or
+on black for frames whose background was already removed.
+"""
+
+from typing import Iterable, Sequence
+
+import cv2
+import numpy as np
+
+# Colour of the belt, classified as background by the default parameters
+BELT_BGR: tuple[int, int, int] = (90, 100, 110)
+# Colour of the capsules
+CAPSULE_BGR: tuple[int, int, int] = (235, 240, 245)
+# Colour of the dark spots marking defective capsules
+DEFECT_BGR: tuple[int, int, int] = (40, 40, 40)
+# Length and width of a capsule in pixels
+CAPSULE_SIZE: tuple[int, int] = (320, 120)
+
+# Center and angle in degrees of a capsule
+Capsule = tuple[tuple[float, float], float]
+
+
+def capsule_frame(
+    shape: tuple[int, int], capsules: Iterable[Capsule],
+    background: tuple[int, int, int] = BELT_BGR, spots: Sequence[tuple[int, int]] = (),
+    spot_radius: int = 12, spot_colour: tuple[int, int, int] = DEFECT_BGR,
+    specks: int = 0, seed: int = 0
+) -> np.ndarray:
+    """
+    BGR frame with capsules, dark spots and random specks of noise.
+
+    Args:
+        shape (tuple[int, int]): Height and width of the frame.
+        capsules (Iterable[Capsule]): Center and angle of each capsule.
+        background (tuple[int, int, int]): Colour of the belt, black if it was removed.
+        spots (Sequence[tuple[int, int]]): Centers of the dark spots.
+        spot_radius (int): Radius of the dark spots.
+        spot_colour (tuple[int, int, int]): Colour of the dark spots.
+        specks (int): Number of rectangles of random size and grey level.
+        seed (int): Seed of the specks.
+
+    Returns:
+        np.ndarray: The frame.
+    """
+    image = np.full(shape + (3,), background, np.uint8)
+    for center, angle in capsules:
+        cv2.ellipse(image, (center, CAPSULE_SIZE, angle), CAPSULE_BGR, -1)
+    for center in spots:
+        cv2.circle(image, center, spot_radius, spot_colour, -1)
+    rng = np.random.default_rng(seed)
+    height, width = shape
+    for _ in range(specks):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        image[y:y + rng.integers(1, 20), x:x + rng.integers(1, 20)] = rng.integers(1, 255)
+    return image
+
+
+def four_capsules_frame(height: int, width: int) -> np.ndarray:
+    """
+    Frame with the background removed and four capsules at right angles and diagonals,
+    the third one with a black spot. Capsules beyond the frame are left out.
+
+    Args:
+        height (int): Height of the frame.
+        width (int): Width of the frame.
+
+    Returns:
+        np.ndarray: The frame.
+    """
+    return capsule_frame(
+        (height, width), [((300, 200), 0), ((700, 250), 90), ((1100, 300), 45),
+                          ((1500, 400), 135)],
+        background=(0, 0, 0), spots=[(1100, 300)], spot_radius=14, spot_colour=(0, 0, 0))
+
+
+def capsule_mask(shape: tuple[int, int], capsules: Iterable[Capsule]) -> np.ndarray:
+    """
+    Binary image of capsules, as segmented from a frame.
+
+    Args:
+        shape (tuple[int, int]): Height and width of the image.
+        capsules (Iterable[Capsule]): Center and angle of each capsule.
+
+    Returns:
+        np.ndarray: 255 on the capsules, 0 elsewhere.
+    """
+    mask = np.zeros(shape, np.uint8)
+    for center, angle in capsules:
+        cv2.ellipse(mask, (center, CAPSULE_SIZE, angle), 255, -1)
+    return mask
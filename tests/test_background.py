@@ -0,0 +1,70 @@
+"""
+Test the BackgroundClassifier class.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.background import BackgroundClassifier
+from src.parameter import DefectDetectionParams
+from src.params import BACKUP_DIR
+
+
+class TestBackgroundClassifier(unittest.TestCase):
+    """
+    TestBackgroundClassifier class to test the background classification of frames.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_bounds_in_recipe_order(self):
+        """
+        Test that the bound labelled B applies to the red channel, as in the recipes.
+        """
+        classifier = BackgroundClassifier((0, 0, 200), (50, 255, 255))
+        image = np.array([[[10, 100, 220], [220, 100, 10]]], dtype=np.uint8)
+        np.testing.assert_array_equal(classifier.foreground_mask(image), [[255, 0]])
+
+    def test_same_mask_as_rgb_ranges(self):
+        """
+        Test that a real frame is classified as by the RGB conversion and inRange.
+        """
+        params = DefectDetectionParams()
+        image = cv2.imread(str(BACKUP_DIR / "Figs_0203" / "2.png"))
+        expected = cv2.bitwise_not(cv2.inRange(
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB),
+            np.array([params.B_val_lower, params.G_val_lower, params.R_val_lower], np.uint8),
+            np.array([params.B_val_upper, params.G_val_upper, params.R_val_upper], np.uint8)))
+        mask = BackgroundClassifier.from_params(params).foreground_mask(image)
+        self.assertGreater(np.count_nonzero(expected), 0)
+        np.testing.assert_array_equal(mask, expected)
+
+    def test_remove_background_into_buffers(self):
+        """
+        Test that reused buffers are fully overwritten and receive the mask.
+        """
+        classifier = BackgroundClassifier((0, 30, 60), (120, 190, 220))
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 256, (40, 60, 3), dtype=np.uint8)
+        dst = np.full_like(image, 7)
+        mask = np.full(image.shape[:2], 7, dtype=np.uint8)
+        result = classifier.remove_background(image, dst=dst, mask=mask)
+        self.assertIs(result, dst)
+        background = np.all((image >= (60, 30, 0)) & (image <= (220, 190, 120)), axis=2)
+        np.testing.assert_array_equal(mask, np.where(background, 0, 255))
+        np.testing.assert_array_equal(result, np.where(background[..., None], 0, image))
+
+    def test_built_once_per_bounds(self):
+        """
+        Test that parameters with the same bounds share a classifier.
+        """
+        first = BackgroundClassifier.from_params(DefectDetectionParams())
+        self.assertIs(BackgroundClassifier.from_params(DefectDetectionParams()), first)
+        self.assertIsNot(
+            BackgroundClassifier.from_params(DefectDetectionParams(B_val_upper=100)), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
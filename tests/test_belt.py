@@ -59,6 +59,29 @@ class TestBelt(unittest.TestCase):
         self.assertEqual(belt.rotating_speed, rotating_speed)
         self.assertEqual(belt.distance_to_actuator, distance)
 
+    def test_calculate_actuation_timestamps(self):
+        """
+        Test that actuation timestamps count the travel from the exposure instant.
+        For a belt with rotating_speed=100 mm/s and distance_to_actuator=300 mm,
+        a capsule at x=1000 px in a 2000 px wide frame with 0.1 mm per pixel
+        travels 100 mm + 300 mm, so it reaches the actuator 4 seconds after exposure.
+        """
+        belt = Belt(rotating_speed=100.0, distance_to_actuator=300.0)
+        result = belt.calculate_actuation_timestamps(
+            exposure_time=10.0, centers_x=[1000.0, 2000.0],
+            frame_width=2000, length_per_pixel=0.1)
+        self.assertEqual(len(result), 2)
+        self.assertAlmostEqual(result[0], 14.0, places=5)
+        self.assertAlmostEqual(result[1], 13.0, places=5)
+
+    def test_calculate_actuation_timestamps_invalid_speed(self):
+        """
+        Test that a ValueError is raised when rotating_speed is not greater than zero.
+        """
+        belt = Belt(rotating_speed=0.0, distance_to_actuator=1.0)
+        with self.assertRaises(ValueError):
+            belt.calculate_actuation_timestamps(0.0, [0.0], 2000, 0.1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,80 @@
+"""
+Test the Blobs class and the capsule location built on it.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.blobs import Blobs
+from src.contours import locate_capsules
+from tests.synthetic import capsule_mask
+
+
+def reference_rects(img_opened, normal_length_range, points_range=(400, 1500), margin=20):
+    """
+    Capsule rectangles located by tracing every contour of the image.
+    """
+    contours, _ = cv2.findContours(img_opened, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    contours = [c for c in contours if points_range[0] < len(c) < points_range[1]]
+    contours = sorted(
+        contours, key=lambda c: (-cv2.boundingRect(c)[0], cv2.boundingRect(c)[1]))
+    rects = []
+    for contour in contours:
+        rect = cv2.minAreaRect(contour)
+        length = max(rect[1])
+        if normal_length_range[0] - margin <= length <= normal_length_range[1] + margin:
+            rects.append(rect)
+    return rects
+
+
+class TestBlobs(unittest.TestCase):
+    """
+    TestBlobs class to test the blob extraction from connected component statistics.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Draw capsules at various angles, speckle noise and an oversized blob.
+        """
+        self.image = capsule_mask((600, 1900), [
+            ((200 + 350 * index, 250), angle) for index, angle in enumerate((0, 20, 45, 90, 135))])
+        cv2.rectangle(self.image, (100, 480), (1500, 590), 255, -1)
+        rng = np.random.default_rng(0)
+        self.image[rng.integers(0, 600, 300), rng.integers(0, 1900, 300)] = 255
+
+    def test_statistics(self):
+        """
+        Test that the statistics of a blob are those of its pixels.
+        """
+        blobs = Blobs.extract(self.image)
+        largest = int(np.argmax(blobs.areas))
+        ys, xs = np.nonzero(blobs.labels == blobs.ids[largest])
+        self.assertEqual(blobs.areas[largest], len(xs))
+        self.assertEqual(tuple(blobs.boxes[largest]), (
+            xs.min(), ys.min(), xs.max() - xs.min() + 1, ys.max() - ys.min() + 1))
+        np.testing.assert_allclose(blobs.centroids[largest], (xs.mean(), ys.mean()))
+        self.assertEqual(len(blobs.contour(largest)), len(max(cv2.findContours(
+            (blobs.labels == blobs.ids[largest]).astype(np.uint8),
+            cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[0], key=len)))
+
+    def test_same_capsules(self):
+        """
+        Test that the capsules are those located by tracing every contour.
+        """
+        normal_length_range = (300, 340)
+        rects = locate_capsules(
+            self.image, normal_length_range, center_bounds=(0, 1900, 0, 600))
+        expected = reference_rects(self.image, normal_length_range)
+        self.assertEqual(len(expected), 5)
+        self.assertEqual(len(rects), len(expected))
+        for rect, expected_rect in zip(rects, expected):
+            np.testing.assert_allclose(rect[0], expected_rect[0])
+            np.testing.assert_allclose(rect[1], expected_rect[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
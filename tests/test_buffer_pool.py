@@ -0,0 +1,65 @@
+"""
+Test the BufferPool class and the detection chain running on pooled buffers.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.buffer_pool import BufferPool
+from src.detection import detect_frame
+from src.parameter import DefectDetectionParams
+from tests.synthetic import capsule_frame
+
+
+class TestBufferPool(unittest.TestCase):
+    """
+    TestBufferPool class to test the reuse of preallocated buffers.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Synthetic frame with two capsules on the belt background.
+        """
+        self.frame = capsule_frame((480, 960), [((350, 200), 0), ((650, 300), 0)])
+
+    def test_shape_change_reallocates(self):
+        """
+        Test that a buffer is reallocated only when its requested shape changes.
+        """
+        pool = BufferPool(height=4, width=6)
+        first = pool.get("gray", channels=1)
+        self.assertIs(pool.get("gray", (4, 6)), first)
+        self.assertEqual(pool.get("gray", (8, 6)).shape, (8, 6))
+        self.assertEqual(pool.allocations, 2)
+
+    def test_ring_depth(self):
+        """
+        Test that a buffer with a depth is not handed out again before depth requests.
+        """
+        pool = BufferPool(height=4, width=6)
+        ring = [pool.get("frame", depth=3) for _ in range(6)]
+        self.assertEqual(len({id(buffer) for buffer in ring}), 3)
+        self.assertIs(ring[0], ring[3])
+
+    def test_detection_without_allocation(self):
+        """
+        Test that repeated detections reuse the pool and match an unpooled detection.
+        """
+        params = DefectDetectionParams()
+        pool = BufferPool(*self.frame.shape[:2])
+        expected_image, expected_centers, expected_abnormal = detect_frame(self.frame, params)
+        detect_frame(self.frame, params, buffers=pool)
+        allocations = pool.allocations
+        for _ in range(3):
+            image, centers, abnormal = detect_frame(self.frame, params, buffers=pool)
+        self.assertEqual(pool.allocations, allocations)
+        np.testing.assert_array_equal(image, expected_image)
+        self.assertEqual(len(centers), len(expected_centers))
+        self.assertEqual(len(abnormal), len(expected_abnormal))
+
+
+if __name__ == "__main__":
+    unittest.main()
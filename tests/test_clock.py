@@ -0,0 +1,71 @@
+"""
+Test the CameraClockMapper class.
+"""
+
+import unittest
+
+from src.clock import CameraClockMapper
+
+
+class TestCameraClockMapper(unittest.TestCase):
+    """
+    TestCameraClockMapper class to test the camera to host clock mapping.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_offset_and_drift(self):
+        """
+        Test that a drifting camera clock with an offset is mapped back to host time.
+        The camera counter runs at 1 GHz, starts at 7 s and runs 50 ppm fast.
+        """
+        mapper = CameraClockMapper(tick_frequency=1e9)
+        for i in range(10):
+            host_time = 1000.0 + 0.1 * i
+            camera_ticks = int((7.0 + 0.1 * i * (1 + 50e-6)) * 1e9)
+            mapper.add_sample(camera_ticks, host_time)
+        exposure_ticks = int((7.0 + 2.0 * (1 + 50e-6)) * 1e9)
+        self.assertAlmostEqual(mapper.to_host(exposure_ticks), 1002.0, places=6)
+        self.assertAlmostEqual(mapper.drift_ppm, -50.0, delta=0.5)
+
+    def test_single_sample(self):
+        """
+        Test that a single sample provides an offset-only mapping.
+        """
+        mapper = CameraClockMapper(tick_frequency=1e6)
+        mapper.add_sample(5_000_000, 20.0)
+        self.assertTrue(mapper.is_synchronized)
+        self.assertAlmostEqual(mapper.to_host(5_500_000), 20.5, places=9)
+
+    def test_window_follows_clock_jump(self):
+        """
+        Test that old samples leave the sliding window.
+        """
+        mapper = CameraClockMapper(tick_frequency=1e9, window=4)
+        for i in range(4):
+            mapper.add_sample(i * 1_000_000_000, 100.0 + i)
+        for i in range(4, 8):
+            mapper.add_sample(i * 1_000_000_000, 100.5 + i)
+        self.assertAlmostEqual(mapper.to_host(8_000_000_000), 108.5, places=6)
+
+    def test_not_synchronized(self):
+        """
+        Test that a RuntimeError is raised before any sample is collected.
+        """
+        mapper = CameraClockMapper()
+        with self.assertRaises(RuntimeError):
+            mapper.to_host(0)
+        mapper.add_sample(0, 1.0)
+        mapper.reset()
+        self.assertFalse(mapper.is_synchronized)
+
+    def test_invalid_tick_frequency(self):
+        """
+        Test that a ValueError is raised when the tick frequency is not greater than zero.
+        """
+        with self.assertRaises(ValueError):
+            CameraClockMapper(tick_frequency=0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Test the row profile of the capsule masks.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.contours import slice_head_tail_capsule_opened
+from utils.rle import RunLengthMask
+
+
+def reference_tips(target_opened: np.ndarray) -> tuple[int, int]:
+    """
+    Maximum widths of both tips measured row by row.
+    """
+    h = target_opened.shape[0]
+    tips = []
+    for rows in (target_opened[:int(0.35 * h), :], target_opened[-int(0.65 * h):, :]):
+        tip_width = 0
+        for row in rows:
+            indices = np.where(row > 0)[0]
+            if len(indices) > 0:
+                tip_width = max(tip_width, indices[-1] + 1 - indices[0])
+        tips.append(tip_width)
+    return tips[0], tips[1]
+
+
+class TestRowProfile(unittest.TestCase):
+    """
+    TestRowProfile class to test the head and tail slicing on the row spans of the masks.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Draw a capsule mask whose lower half is wider than its upper half.
+        """
+        self.target = np.zeros((160, 70), dtype=np.uint8)
+        cv2.ellipse(self.target, (35, 50), (20, 45), 0, 0, 360, 255, -1)
+        cv2.ellipse(self.target, (35, 105), (28, 50), 0, 0, 360, 255, -1)
+
+    def test_same_tips(self):
+        """
+        Test that the head and tail are those of the row by row measurement.
+        """
+        for target in (self.target, self.target[::-1], np.zeros((1, 5), dtype=np.uint8)):
+            top_width, bottom_width = reference_tips(target)
+            h = target.shape[0]
+            head, tail = slice_head_tail_capsule_opened(target)
+            top, bottom = target[:int(0.25 * h), :], target[int(0.75 * h):, :]
+            expected_head, expected_tail = (bottom, top) if top_width < bottom_width \
+                else (top, bottom)
+            np.testing.assert_array_equal(head, expected_head)
+            np.testing.assert_array_equal(tail, expected_tail)
+
+    def test_given_profile(self):
+        """
+        Test that a precomputed width profile decides the tips instead of the mask.
+        """
+        h = self.target.shape[0]
+        widths = RunLengthMask.from_image(self.target).row_spans()
+        head, tail = slice_head_tail_capsule_opened(self.target, widths)
+        np.testing.assert_array_equal(head, self.target[int(0.75 * h):, :])
+        np.testing.assert_array_equal(tail, self.target[:int(0.25 * h), :])
+        # A profile widest at the top makes the top the head, whatever the mask
+        widths = np.zeros(h, dtype=np.int64)
+        widths[:10] = 50
+        head, tail = slice_head_tail_capsule_opened(self.target, widths)
+        np.testing.assert_array_equal(head, self.target[:int(0.25 * h), :])
+        np.testing.assert_array_equal(tail, self.target[int(0.75 * h):, :])
+
+
+if __name__ == '__main__':
+    unittest.main()
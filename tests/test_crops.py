@@ -0,0 +1,88 @@
+"""
+Test the upright capsule crops cut into the crop slots of a frame.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.buffer_pool import BufferPool
+from src.contours import crop_capsules, locate_capsules
+from tests.synthetic import capsule_mask
+from utils.transform import bgr_to_bayer, cut_image_by_box
+
+
+class TestCrops(unittest.TestCase):
+    """
+    TestCrops class to test the crops of the capsules warped by a single affine transform.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Draw capsules at various angles on a textured belt.
+        """
+        rng = np.random.default_rng(0)
+        self.opened = capsule_mask((500, 1900), [
+            ((200 + 350 * index, 250), angle) for index, angle in enumerate((0, 20, 45, 90, 135))])
+        self.image = cv2.GaussianBlur(
+            rng.integers(0, 256, (500, 1900, 3), dtype=np.uint8), (9, 9), 0)
+        self.image[self.opened > 0] //= 2
+        self.rects = locate_capsules(
+            self.opened, (300, 340), center_bounds=(0, 1900, 0, 500))
+
+    def reference_crops(self, image, rect):
+        """
+        Crop of an image by a perspective warp followed by a rotation.
+        """
+        box = cv2.boxPoints((rect[0], (1.1 * rect[1][0], 1.2 * rect[1][1]), rect[2]))
+        crop = cut_image_by_box(image, box)
+        if crop.shape[0] < crop.shape[1]:
+            crop = cv2.rotate(crop, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        return crop
+
+    def test_same_crops(self):
+        """
+        Test that the crops are those of the perspective warp and rotation.
+        """
+        self.assertEqual(len(self.rects), 5)
+        raw, opened = crop_capsules(self.image, self.opened, self.rects)
+        for rect, raw_crop, opened_crop in zip(self.rects, raw, opened):
+            expected_raw = self.reference_crops(self.image, rect)
+            expected_opened = self.reference_crops(self.opened, rect)
+            self.assertEqual(raw_crop.shape, expected_raw.shape)
+            self.assertEqual(opened_crop.shape, expected_opened.shape)
+            self.assertGreater(opened_crop.shape[0], opened_crop.shape[1])
+            self.assertLess(np.abs(raw_crop.astype(int) - expected_raw).mean(), 1.0)
+            self.assertLess(np.abs(opened_crop.astype(int) - expected_opened).mean(), 1.0)
+
+    def test_slots(self):
+        """
+        Test that the crops of a frame are cut into slots allocated once.
+        """
+        pool = BufferPool()
+        plain_raw, plain_opened = crop_capsules(self.image, self.opened, self.rects)
+        for _ in range(3):
+            raw, opened = crop_capsules(
+                self.image, self.opened, self.rects, buffers=pool, slot_length=410)
+        self.assertEqual(pool.allocations, 2)
+        slots = pool.get("crops_opened", (16, 410, 410))
+        for index, crop in enumerate(opened):
+            self.assertTrue(np.shares_memory(crop, slots[index]))
+            np.testing.assert_array_equal(crop, plain_opened[index])
+            np.testing.assert_array_equal(raw[index], plain_raw[index])
+
+    def test_bayer(self):
+        """
+        Test that the crops of a raw Bayer plane are demosaiced.
+        """
+        plane = bgr_to_bayer(self.image, "RGGB")
+        raw, opened = crop_capsules(plane, self.opened, self.rects, "RGGB", BufferPool())
+        for raw_crop, opened_crop in zip(raw, opened):
+            self.assertEqual(raw_crop.shape, opened_crop.shape + (3,))
+
+
+if __name__ == '__main__':
+    unittest.main()
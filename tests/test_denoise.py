@@ -0,0 +1,67 @@
+"""
+Test the denoising backends.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.striping import StripedExecutor
+from tests.synthetic import capsule_frame
+from utils.denoise import DENOISE_BACKENDS, denoise
+from utils.transform import get_img_opened
+
+
+class TestDenoise(unittest.TestCase):
+    """
+    TestDenoise class to test the filters standing in for the median blur.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Noisy synthetic frame of odd size with the background removed.
+        """
+        rng = np.random.default_rng(0)
+        self.image = capsule_frame(
+            (301, 455), [((120, 150), 30), ((330, 140), 90)], background=(0, 0, 0))
+        self.image[rng.random(self.image.shape[:2]) < 0.01] = 0
+        self.image[rng.random(self.image.shape[:2]) < 0.002] = 200
+
+    def test_backends(self):
+        """
+        Test that every backend keeps the shape, fills a reused array and, but for the mean
+        which spreads the bright specks, cleans the noise.
+        """
+        gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        for backend in DENOISE_BACKENDS:
+            with self.subTest(backend=backend):
+                dst = np.empty_like(self.image)
+                self.assertIs(denoise(self.image, 15, backend, dst=dst), dst)
+                self.assertEqual(denoise(gray, 15, backend).shape, gray.shape)
+                if backend == "box":
+                    continue
+                opened = get_img_opened(self.image, denoise_backend=backend)
+                self.assertEqual(len(cv2.findContours(
+                    opened, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[0]), 2)
+        with self.assertRaises(ValueError):
+            denoise(gray, 15, "bilateral")
+
+    def test_reach(self):
+        """
+        Test that every backend stays within the reach of the median, so that the stripes
+        give the result of the full frame.
+        """
+        executor = StripedExecutor(threads=4)
+        for backend in DENOISE_BACKENDS:
+            with self.subTest(backend=backend):
+                np.testing.assert_array_equal(
+                    executor.get_img_opened(self.image, denoise_backend=backend),
+                    get_img_opened(self.image, denoise_backend=backend))
+        executor.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
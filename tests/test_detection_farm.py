@@ -0,0 +1,99 @@
+"""
+Test the DetectionFarm class.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.detection import detect_frame
+from src.detection_farm import DetectionFarm
+from src.parameter import DefectDetectionParams
+from tests.synthetic import capsule_frame
+
+
+class TestDetectionFarm(unittest.TestCase):
+    """
+    TestDetectionFarm class to test the multi-process detection backend.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start a farm with two worker processes shared by the tests.
+        """
+        cls.farm = DetectionFarm(workers=2, frame_shape=(600, 1600, 3), output_size=8)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.farm.close()
+
+    def test_results_in_submission_order(self):
+        """
+        Test that results come back in submission order with their metadata
+        and the same outcome as an in-process detection.
+        """
+        params = DefectDetectionParams()
+        capsules = [((400, 150), 0), ((800, 420), 8), ((1200, 200), 175)]
+        frames = [
+            capsule_frame((600, 1600), capsules[:count], spots=[(1200, 200)])
+            for count in (3, 0, 1, 2, 3, 3)
+        ]
+        for index, frame in enumerate(frames):
+            self.farm.submit(frame, params, metadata=(index, 0.1 * index))
+        results = [self.farm.output.get(timeout=60.0) for _ in frames]
+        self.assertEqual([r.metadata for r in results], [(i, 0.1 * i) for i in range(6)])
+        sequences = [r.sequence for r in results]
+        self.assertEqual(sequences, sorted(sequences))
+        for frame, result in zip(frames, results):
+            image, capsule_centers, abnormal_centers = detect_frame(frame, params)
+            np.testing.assert_array_equal(result.image, image)
+            self.assertEqual(
+                result.capsule_centers, [tuple(map(float, c)) for c in capsule_centers])
+            self.assertEqual(
+                result.abnormal_centers, [tuple(map(float, c)) for c in abnormal_centers])
+        self.assertEqual([len(r.capsule_centers) for r in results], [3, 0, 1, 2, 3, 3])
+        self.assertTrue(any(r.abnormal_centers for r in results))
+
+    def test_worker_death(self):
+        """
+        Test that the frame of a dead worker is published and its slot recycled.
+        """
+        farm = DetectionFarm(workers=1, frame_shape=(600, 1600, 3), slots=2)
+        try:
+            farm.submit(
+                capsule_frame((600, 1600), [((800, 300), 0)]), DefectDetectionParams(),
+                metadata="lost")
+            # pylint: disable=protected-access
+            process = farm._processes[0]
+            self.assertTrue(farm.alive)
+            process.kill()
+            process.join()
+            self.assertFalse(farm.alive)
+            result = farm.output.get(timeout=60.0)
+            self.assertEqual(result.metadata, "lost")
+            with self.assertRaises(RuntimeError):
+                farm.submit(np.zeros((4, 4, 3), np.uint8), DefectDetectionParams())
+            self.assertEqual(farm._free_slots.qsize(), farm.slots)
+        finally:
+            farm.close()
+
+    def test_frame_too_large(self):
+        """
+        Test that a ValueError is raised for a frame larger than a slot.
+        """
+        with self.assertRaises(ValueError):
+            self.farm.submit(np.zeros((601, 1600, 3), np.uint8), DefectDetectionParams())
+
+    def test_invalid_workers(self):
+        """
+        Test that a ValueError is raised without any worker.
+        """
+        with self.assertRaises(ValueError):
+            DetectionFarm(workers=0, frame_shape=(4, 4, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
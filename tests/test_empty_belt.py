@@ -0,0 +1,68 @@
+"""
+Test the empty belt fast path of the detection.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.detection import belt_empty, detect_frame
+from src.inspection_band import InspectionBand
+from src.parameter import DefectDetectionParams
+from tests.synthetic import BELT_BGR, capsule_frame
+from utils.transform import bgr_to_bayer
+
+
+def belt_frame(*centers: tuple[int, int]) -> np.ndarray:
+    """
+    Synthetic belt frame with a capsule at each of the given centers.
+    """
+    return capsule_frame((1440, 2160), [(center, 0) for center in centers])
+
+
+class TestEmptyBelt(unittest.TestCase):
+    """
+    TestEmptyBelt class to test the occupancy test run before the detection.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_occupancy(self):
+        """
+        Test that a capsule in the inspected view is found in every pixel format.
+        """
+        params = DefectDetectionParams()
+        for centers, expected in (((), True), (((1000, 700),), False)):
+            image = belt_frame(*centers)
+            self.assertEqual(belt_empty(image, params), expected)
+            self.assertEqual(belt_empty(bgr_to_bayer(image, "RGGB"), params, "RGGB"), expected)
+            self.assertEqual(
+                belt_empty(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), params), expected)
+            removed = np.where(image == BELT_BGR, 0, image).astype(np.uint8)
+            self.assertEqual(belt_empty(removed, params, background_removed=True), expected)
+
+    def test_outside_band(self):
+        """
+        Test that a capsule outside the view of a narrow band leaves the belt empty.
+        """
+        params = DefectDetectionParams()
+        image = belt_frame((200, 700))
+        self.assertFalse(belt_empty(image, params))
+        self.assertTrue(belt_empty(image, params, band=InspectionBand(0.5, 0.7)))
+
+    def test_detection_skipped(self):
+        """
+        Test that the detection returns an empty belt frame without capsules.
+        """
+        params = DefectDetectionParams()
+        image = belt_frame()
+        result, centers, abnormal = detect_frame(image.copy(), params)
+        self.assertEqual((centers, abnormal), ([], []))
+        np.testing.assert_array_equal(result, image)
+        _, centers, _ = detect_frame(belt_frame((1000, 700)), params)
+        self.assertEqual(len(centers), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
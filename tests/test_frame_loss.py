@@ -0,0 +1,60 @@
+"""
+Test the FrameLossCounter class.
+"""
+
+import unittest
+
+from src.frame_loss import FrameLossCounter
+from src.frame_source import GrabbedFrame
+
+
+def frame(block_id=None, skipped_images=0) -> GrabbedFrame:
+    """
+    Frame without image carrying the grab result counters.
+    """
+    return GrabbedFrame(None, 0, 0.0, block_id=block_id, skipped_images=skipped_images)
+
+
+class TestFrameLossCounter(unittest.TestCase):
+    """
+    TestFrameLossCounter class to test the frame loss accounting.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        self.counter = FrameLossCounter()
+
+    def test_block_id_gaps(self):
+        """
+        Test that gaps in block IDs are counted and a wrap-around is not.
+        """
+        gaps = [self.counter.record(frame(block_id)) for block_id in (10, 11, 14, 65535, 1, 2)]
+        self.assertEqual(gaps, [0, 0, 2, 65520, 0, 0])
+        self.assertEqual(self.counter.stats(6, 0).missing_block_ids, 65522)
+
+    def test_unknown_block_ids(self):
+        """
+        Test that sources without block IDs only count the skipped images.
+        """
+        for skipped in (0, 4, 1):
+            self.assertEqual(self.counter.record(frame(skipped_images=skipped)), 0)
+        stats = self.counter.stats(inspected=3, dropped_by_queues=2)
+        self.assertEqual((stats.grabbed, stats.skipped_by_strategy), (3, 5))
+        self.assertEqual(stats.lost, 7)
+        self.assertAlmostEqual(stats.inspected_ratio, 0.3)
+
+    def test_stream_counters_baseline(self):
+        """
+        Test that stream grabber drops are counted from the first statistics received.
+        """
+        self.counter.update_stream({"failed_buffer_count": 5, "total_buffer_count": 100})
+        self.counter.update_stream({
+            "failed_buffer_count": 7, "buffer_underrun_count": 1, "total_buffer_count": 200})
+        self.assertEqual(self.counter.stats(0, 0).dropped_by_stream, 3)
+        self.counter.reset()
+        self.assertEqual(self.counter.stats(0, 0).dropped_by_stream, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
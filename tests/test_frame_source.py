@@ -0,0 +1,122 @@
+"""
+Test the ReplayFrameSource class.
+"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.frame_source import ReplayFrameSource, ReplayPacing
+
+
+class TestReplayFrameSource(unittest.TestCase):
+    """
+    TestReplayFrameSource class to test replaying an image directory.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Write three small frames with distinct intensities to a temporary directory.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        for index in range(3):
+            image = np.full((8, 12, 3), 10 * (index + 1), dtype=np.uint8)
+            cv2.imwrite(str(Path(self.directory.name) / f"{index:03d}.png"), image)
+        (Path(self.directory.name) / "notes.txt").write_text("not an image")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def grab_all(self, source: ReplayFrameSource, count: int) -> list:
+        """
+        Start the source and grab up to `count` frames.
+        """
+        source.start()
+        frames = []
+        while source.is_grabbing() and len(frames) < count:
+            frame = source.grab()
+            if frame is not None:
+                frames.append(frame)
+        source.stop()
+        return frames
+
+    def test_replays_directory_in_order(self):
+        """
+        Test that images are delivered in file name order and the replay ends without loop.
+        """
+        source = ReplayFrameSource(self.directory.name, ReplayPacing.FASTEST, loop=False)
+        frames = self.grab_all(source, 10)
+        self.assertEqual([int(f.image[0, 0, 0]) for f in frames], [10, 20, 30])
+        self.assertEqual(frames[0].image.shape, (8, 12, 3))
+        timestamps = [f.camera_timestamp for f in frames]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_loop(self):
+        """
+        Test that a looping replay restarts from the first image.
+        """
+        source = ReplayFrameSource(self.directory.name, ReplayPacing.FASTEST, loop=True)
+        frames = self.grab_all(source, 5)
+        self.assertEqual([int(f.image[0, 0, 0]) for f in frames], [10, 20, 30, 10, 20])
+
+    def test_fixed_pacing(self):
+        """
+        Test that the fixed pacing delivers frames no faster than the requested frame rate.
+        """
+        source = ReplayFrameSource(
+            self.directory.name, ReplayPacing.FIXED, frame_rate=50.0, loop=True)
+        start_time = time.monotonic()
+        self.grab_all(source, 6)
+        self.assertGreaterEqual(time.monotonic() - start_time, 5 / 50.0)
+
+    def test_set_frame_rate(self):
+        """
+        Test that changing the frame rate while replaying changes the pacing.
+        """
+        source = ReplayFrameSource(
+            self.directory.name, ReplayPacing.FIXED, frame_rate=1000.0, loop=True)
+        source.start()
+        source.grab()
+        self.assertEqual(source.set_frame_rate(40.0), 40.0)
+        start_time = time.monotonic()
+        for _ in range(5):
+            source.grab()
+        source.stop()
+        self.assertGreaterEqual(time.monotonic() - start_time, 4 / 40.0)
+        with self.assertRaises(ValueError):
+            source.set_frame_rate(0.0)
+
+    def test_pixel_mode(self):
+        """
+        Test that the single channel modes replay the planes a camera would deliver.
+        """
+        mono = self.grab_all(ReplayFrameSource(
+            self.directory.name, ReplayPacing.FASTEST, loop=False, pixel_mode="mono"), 1)
+        self.assertEqual(mono[0].image.shape, (8, 12))
+        self.assertIsNone(mono[0].cfa_pattern)
+        bayer = self.grab_all(ReplayFrameSource(
+            self.directory.name, ReplayPacing.FASTEST, loop=False, pixel_mode="bayer"), 1)
+        self.assertEqual(bayer[0].image.shape, (8, 12))
+        self.assertEqual(bayer[0].cfa_pattern, "RGGB")
+        with self.assertRaises(ValueError):
+            ReplayFrameSource(self.directory.name, pixel_mode="yuv")
+
+    def test_invalid_path(self):
+        """
+        Test that a ValueError is raised for a path without any frame.
+        """
+        with tempfile.TemporaryDirectory() as empty:
+            with self.assertRaises(ValueError):
+                ReplayFrameSource(empty)
+        with self.assertRaises(ValueError):
+            ReplayFrameSource(self.directory.name, frame_rate=0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Test the IncrementalSegmenter class.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.background import BackgroundClassifier
+from src.detection import MASK_BIN
+from src.contours import find_contours_img
+from src.incremental import IncrementalSegmenter
+from src.parameter import DefectDetectionParams
+from tests.synthetic import capsule_frame
+from utils.transform import get_img_opened
+
+
+def belt_frame(time: float, speed: float) -> np.ndarray:
+    """
+    Synthetic belt frame with capsules moving along +x at `speed` pixels per second.
+    """
+    return capsule_frame((600, 1600), [
+        ((start_x + speed * time, center_y), angle)
+        for start_x, center_y, angle in ((-400, 150, 0), (100, 420, 8), (600, 200, 175))])
+
+
+class TestIncrementalSegmenter(unittest.TestCase):
+    """
+    TestIncrementalSegmenter class to compare the incremental and full frame segmentation.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_matches_full_segmentation(self):
+        """
+        Test that every frame of a moving belt gives the same capsules as a full segmentation.
+        """
+        params = DefectDetectionParams()
+        length_range = (params.normal_length_lower, params.normal_length_upper)
+        classifier = BackgroundClassifier.from_params(params)
+        segmenter = IncrementalSegmenter(pixel_speed=1200.0, keyframe_interval=100)
+        for index in range(10):
+            time = 0.1 * index
+            image = classifier.remove_background(belt_frame(time, 1200.0))
+            expected = find_contours_img(
+                image, get_img_opened(image), MASK_BIN, length_range)
+            result = segmenter.segment(image, time, MASK_BIN, length_range)
+            self.assertEqual(len(result[2]), len(expected[2]))
+            np.testing.assert_allclose(
+                np.array(result[2]).reshape(-1, 2), np.array(expected[2]).reshape(-1, 2),
+                atol=1.0)
+            np.testing.assert_allclose(
+                np.array(result[3]).reshape(-1, 2), np.array(expected[3]).reshape(-1, 2),
+                atol=1.0)
+        self.assertEqual(segmenter.full_frames, 1)
+        self.assertEqual(segmenter.incremental_frames, 9)
+
+    def test_keyframes(self):
+        """
+        Test that a full frame is segmented every keyframe interval and after a reset.
+        """
+        segmenter = IncrementalSegmenter(pixel_speed=1200.0, keyframe_interval=3)
+        image = np.zeros((600, 1600, 3), np.uint8)
+        for index in range(6):
+            segmenter.segment(image, 0.1 * index, MASK_BIN, (310, 330))
+        self.assertEqual((segmenter.full_frames, segmenter.incremental_frames), (2, 4))
+        segmenter.reset()
+        segmenter.segment(image, 1.0, MASK_BIN, (310, 330))
+        self.assertEqual(segmenter.full_frames, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Test the detection restricted to an InspectionBand.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.detection import detect_frame, inspection_view
+from src.inspection_band import InspectionBand
+from src.parameter import DefectDetectionParams
+from tests.synthetic import capsule_frame
+from utils.transform import bgr_to_bayer
+
+
+def belt_frame() -> np.ndarray:
+    """
+    Synthetic belt frame with capsules inside and outside of a central lane,
+    one of them defective.
+    """
+    return capsule_frame(
+        (900, 2000), [((300, 200), 0), ((800, 450), 70), ((1150, 300), 10),
+                      ((1000, 720), 95), ((1700, 600), 30)],
+        spots=[(1150, 300)])
+
+
+class TestInspectionBand(unittest.TestCase):
+    """
+    TestInspectionBand class to compare the detection in a lane with the full frame detection.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        self.params = DefectDetectionParams()
+        self.band = InspectionBand(0.35, 0.65, 0.2, 0.7)
+
+    def assert_same_capsules(self, image, cfa_pattern=None):
+        """
+        Assert that the lane gives the capsules of the full frame centered in it.
+        """
+        _, centers, abnormal = detect_frame(
+            image, self.params, cfa_pattern=cfa_pattern, band=InspectionBand(0, 1, 0, 1))
+        left, right, top, bottom = self.band.centers(image.shape[1], image.shape[0])
+        expected = [c for c in centers if left <= c[0] <= right and top <= c[1] <= bottom]
+        result, band_centers, band_abnormal = detect_frame(
+            image, self.params, cfa_pattern=cfa_pattern, band=self.band)
+        self.assertEqual(len(expected), 2)
+        np.testing.assert_allclose(band_centers, expected, atol=1e-3)
+        self.assertEqual(len(band_abnormal), 1)
+        np.testing.assert_allclose(band_abnormal, [c for c in abnormal if c in expected],
+                                   atol=1e-3)
+        # Nothing is processed outside of the view
+        view_left, view_top, view_right, view_bottom = inspection_view(
+            image.shape, self.params, self.band)
+        self.assertGreater(view_left, 0)
+        self.assertFalse(result[:, :view_left].any() or result[:, view_right:].any())
+        self.assertFalse(result[:view_top].any() or result[view_bottom:].any())
+
+    def test_bgr(self):
+        """
+        Test the detection of a BGR frame in a lane.
+        """
+        self.assert_same_capsules(belt_frame())
+
+    def test_bayer(self):
+        """
+        Test the detection of a raw Bayer plane in a lane, the view keeps the colour filter
+        layout of the frame.
+        """
+        self.assertEqual(
+            [bound % 2 for bound in inspection_view((900, 2000), self.params, self.band)[:2]],
+            [0, 0])
+        self.assert_same_capsules(bgr_to_bayer(belt_frame(), "RGGB"), "RGGB")
+
+    def test_invalid_band(self):
+        """
+        Test that an empty band is rejected.
+        """
+        with self.assertRaises(ValueError):
+            InspectionBand(0.6, 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Test the bounded queues and stages of the detection pipeline.
+"""
+
+import threading
+import unittest
+
+from src.pipeline import BoundedQueue, DropPolicy, PipelineStage
+
+
+class TestBoundedQueue(unittest.TestCase):
+    """
+    TestBoundedQueue class to test the drop policies and occupancy counters.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_drop_oldest(self):
+        """
+        Test that a full DROP_OLDEST queue evicts the oldest item and reports it.
+        """
+        dropped: list[int] = []
+        queue = BoundedQueue("detect", 2, DropPolicy.DROP_OLDEST, dropped.append)
+        for item in range(4):
+            self.assertTrue(queue.put(item))
+        self.assertEqual(dropped, [0, 1])
+        self.assertEqual([queue.get(), queue.get()], [2, 3])
+        stats = queue.stats()
+        self.assertEqual((stats.put, stats.got, stats.dropped), (4, 2, 2))
+        self.assertEqual(stats.high_water, 2)
+        self.assertEqual(stats.occupancy, 0)
+
+    def test_drop_newest(self):
+        """
+        Test that a full DROP_NEWEST queue rejects the incoming item.
+        """
+        dropped: list[int] = []
+        queue = BoundedQueue("render", 1, DropPolicy.DROP_NEWEST, dropped.append)
+        self.assertTrue(queue.put(1))
+        self.assertFalse(queue.put(2))
+        self.assertEqual(dropped, [2])
+        self.assertEqual(queue.get(), 1)
+
+    def test_block_waits_for_consumer(self):
+        """
+        Test that a full BLOCK queue makes the producer wait until an item is consumed.
+        """
+        queue = BoundedQueue("detect", 1, DropPolicy.BLOCK)
+        queue.put(1)
+        self.assertFalse(queue.put(2, timeout=0.01))
+        consumer = threading.Timer(0.05, queue.get)
+        consumer.start()
+        self.assertTrue(queue.put(3, timeout=1.0))
+        consumer.join()
+        self.assertEqual(queue.get(), 3)
+
+    def test_close_wakes_consumer(self):
+        """
+        Test that closing a queue lets queued items drain and then returns None.
+        """
+        queue = BoundedQueue("detect", 2)
+        queue.put(1)
+        queue.close()
+        self.assertFalse(queue.put(2))
+        self.assertEqual(queue.get(), 1)
+        self.assertIsNone(queue.get(timeout=1.0))
+
+    def test_invalid_capacity(self):
+        """
+        Test that a ValueError is raised when the capacity is not greater than zero.
+        """
+        with self.assertRaises(ValueError):
+            BoundedQueue("detect", 0)
+
+
+class TestPipelineStage(unittest.TestCase):
+    """
+    TestPipelineStage class to test chaining of pipeline stages.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_stages_forward_in_order(self):
+        """
+        Test that results flow through chained stages in order and shutdown propagates.
+        """
+        inbox = BoundedQueue("double", 8, DropPolicy.BLOCK)
+        middle = BoundedQueue("increment", 8, DropPolicy.BLOCK)
+        outbox = BoundedQueue("out", 8, DropPolicy.BLOCK)
+        stages = [
+            PipelineStage("double", lambda x: 2 * x, inbox, middle),
+            PipelineStage("increment", lambda x: x + 1, middle, outbox)
+        ]
+        for stage in stages:
+            stage.start()
+        for item in range(5):
+            inbox.put(item)
+        inbox.close()
+        for stage in stages:
+            stage.join(timeout=5.0)
+        self.assertTrue(outbox.closed)
+        self.assertEqual([outbox.get() for _ in range(5)], [1, 3, 5, 7, 9])
+        self.assertEqual(stages[1].processed, 5)
+
+    def test_stage_survives_handler_error(self):
+        """
+        Test that an exception raised by the handler does not stop the stage.
+        """
+        inbox = BoundedQueue("invert", 4, DropPolicy.BLOCK)
+        outbox = BoundedQueue("out", 4, DropPolicy.BLOCK)
+        stage = PipelineStage("invert", lambda x: 1 / x, inbox, outbox)
+        stage.start()
+        for item in (0, 2):
+            inbox.put(item)
+        inbox.close()
+        stage.join(timeout=5.0)
+        self.assertEqual(outbox.get(), 0.5)
+        self.assertEqual(stage.processed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
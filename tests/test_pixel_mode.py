@@ -0,0 +1,97 @@
+"""
+Test the detection of single channel Mono8 and raw Bayer planes.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.background import BackgroundClassifier
+from src.contours import find_contours_img
+from src.detection import MASK_BIN, detect_frame
+from src.parameter import DefectDetectionParams
+from tests.synthetic import capsule_frame
+from utils.transform import bgr_to_bayer, cut_image_by_box, get_img_opened, gray_plane
+from utils.transform import plane_to_bgr
+
+
+def defective_frame() -> np.ndarray:
+    """
+    Synthetic belt frame with three capsules, the last one with a dark spot.
+    """
+    return capsule_frame(
+        (600, 1600), [((400, 150), 0), ((800, 420), 8), ((1200, 200), 175)],
+        spots=[(1200, 200)])
+
+
+class TestPixelMode(unittest.TestCase):
+    """
+    TestPixelMode class to compare the detection of planes with the detection of BGR frames.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        self.params = DefectDetectionParams()
+        self.image = defective_frame()
+
+    def test_background_removal(self):
+        """
+        Test that planes keep the foreground of the BGR background removal.
+        """
+        classifier = BackgroundClassifier.from_params(self.params)
+        expected = classifier.remove_background(self.image).any(axis=2)
+        mono = classifier.remove_background(cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY))
+        bayer = classifier.remove_background(bgr_to_bayer(self.image, "RGGB"), "RGGB")
+        # Bayer tiles are classified as a whole, edges may move by one pixel
+        self.assertLess(np.mean((mono > 0) != expected), 0.002)
+        self.assertLess(np.mean((bayer > 0) != expected), 0.005)
+
+    def test_demosaic_crop(self):
+        """
+        Test that a Bayer crop matches the same crop of the fully demosaiced plane.
+        """
+        plane = bgr_to_bayer(self.image, "RGGB")
+        box = np.int64(cv2.boxPoints(((801, 421), (350, 140), 8)))
+        expected = cut_image_by_box(plane_to_bgr(plane, "RGGB"), box)
+        crop = cut_image_by_box(plane, box, "RGGB")
+        self.assertEqual(crop.shape, expected.shape)
+        self.assertLessEqual(np.abs(crop.astype(int) - expected).max(), 1)
+
+    def test_gray_plane(self):
+        """
+        Test that every pixel mode gives the luminance plane the capsules are cropped from.
+        """
+        expected = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        bayer = gray_plane(bgr_to_bayer(self.image, "RGGB"), "RGGB")
+        self.assertLessEqual(np.abs(bayer.astype(int) - expected)[2:-2, 2:-2].mean(), 1.0)
+        mono = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        self.assertIs(gray_plane(mono), mono)
+
+        image = BackgroundClassifier.from_params(self.params).remove_background(self.image)
+        gray = gray_plane(image)
+        crops = find_contours_img(gray, get_img_opened(gray), MASK_BIN, (310, 330))[0]
+        self.assertEqual(len(crops), 3)
+        self.assertTrue(all(crop.ndim == 2 for crop in crops))
+
+    def test_same_detection(self):
+        """
+        Test that the capsules and defects found in planes are those found in the BGR frame.
+        """
+        _, centers, abnormal = detect_frame(self.image, self.params)
+        for plane, cfa_pattern in (
+            (cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY), None),
+            (bgr_to_bayer(self.image, "RGGB"), "RGGB")
+        ):
+            image, plane_centers, plane_abnormal = detect_frame(
+                plane, self.params, cfa_pattern=cfa_pattern)
+            self.assertEqual(image.ndim, 2)
+            np.testing.assert_allclose(
+                np.array(plane_centers).reshape(-1, 2), np.array(centers).reshape(-1, 2),
+                atol=2.0)
+            self.assertEqual(len(plane_abnormal), len(abnormal))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Test the coarse-to-fine segmentation of get_img_opened_pyramid.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.detection import detect_frame
+from src.parameter import DefectDetectionParams
+from tests.synthetic import capsule_frame
+from utils.transform import get_img_opened, get_img_opened_pyramid
+
+
+def noisy_frame(height: int, width: int) -> np.ndarray:
+    """
+    Synthetic frame with the background removed: capsules, some touching the border,
+    and isolated specks of noise.
+    """
+    return capsule_frame(
+        (height, width), [((200, 150), 30), ((520, 160), 95), ((width - 40, 300), 0),
+                          ((300, height - 20), 170)],
+        background=(0, 0, 0), specks=200, seed=1)
+
+
+class TestPyramid(unittest.TestCase):
+    """
+    TestPyramid class to compare the coarse-to-fine and the full frame segmentation.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_same_binary_image(self):
+        """
+        Test that both segmentations give the same binary image, including uneven sizes.
+        """
+        for height, width in ((480, 800), (483, 805)):
+            image = noisy_frame(height, width)
+            expected = get_img_opened(image)
+            for scale in (4, 8):
+                dst = np.full((height, width), 7, np.uint8)
+                result = get_img_opened_pyramid(image, scale, dst=dst)
+                self.assertIs(result, dst)
+                np.testing.assert_array_equal(result, expected)
+
+    def test_same_detection(self):
+        """
+        Test that detect_frame finds the same capsules in both modes.
+        """
+        params = DefectDetectionParams()
+        image = noisy_frame(480, 800)
+        _, centers, abnormal = detect_frame(image, params, background_removed=True)
+        _, pyramid_centers, pyramid_abnormal = detect_frame(
+            image, params, background_removed=True, pyramid_scale=4)
+        self.assertEqual(pyramid_centers, centers)
+        self.assertEqual(pyramid_abnormal, abnormal)
+
+
+if __name__ == '__main__':
+    unittest.main()
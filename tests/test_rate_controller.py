@@ -0,0 +1,60 @@
+"""
+Test the FrameRateController class.
+"""
+
+import unittest
+
+from src.rate_controller import FrameRateController
+
+
+class TestFrameRateController(unittest.TestCase):
+    """
+    TestFrameRateController class to test the adaptive frame rate decisions.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Capsules cross 100 mm at 100 mm/s and must be analysed in 10 frames: 10 fps.
+        """
+        self.controller = FrameRateController(
+            belt_speed=100.0, view_length=100.0, min_frames=10, headroom=1.0,
+            min_rate=2.0, max_rate=30.0, smoothing=1.0, interval=1.0)
+
+    def test_required_rate_when_detector_is_fast(self):
+        """
+        Test that a fast detector runs at the rate required by the belt.
+        """
+        point = self.controller.observe(0.02, now=0.0)
+        self.assertAlmostEqual(point.frame_rate, 10.0)
+        self.assertAlmostEqual(point.frames_per_capsule, 10.0)
+        self.assertFalse(point.limited)
+
+    def test_limited_by_detector(self):
+        """
+        Test that a slow detector caps the frame rate at its throughput.
+        """
+        point = self.controller.observe(0.2, now=0.0)
+        self.assertAlmostEqual(point.frame_rate, 5.0)
+        self.assertTrue(point.limited)
+        self.controller.parallelism = 4
+        point = self.controller.observe(0.2, now=1.0)
+        self.assertAlmostEqual(point.frame_rate, 10.0)
+        self.assertFalse(point.limited)
+
+    def test_decision_interval_and_bounds(self):
+        """
+        Test that decisions are taken once per interval and stay within the bounds.
+        """
+        self.assertIsNotNone(self.controller.observe(0.02, now=0.0))
+        self.assertIsNone(self.controller.observe(2.0, now=0.5))
+        point = self.controller.observe(2.0, now=1.0)
+        self.assertAlmostEqual(point.frame_rate, 2.0)
+        self.controller.belt_speed = 1000.0
+        point = self.controller.observe(0.001, now=2.0)
+        self.assertAlmostEqual(point.frame_rate, 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
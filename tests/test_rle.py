@@ -0,0 +1,75 @@
+"""
+Test the RunLengthMask class.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from tests.synthetic import capsule_frame
+from utils.rle import RunLengthMask
+from utils.transform import get_img_opened, remove_zero_rows
+
+
+class TestRunLengthMask(unittest.TestCase):
+    """
+    TestRunLengthMask class to test the run-length encoding of binary masks.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Opened image of a synthetic frame with capsules touching the frame borders.
+        """
+        image = capsule_frame(
+            (400, 600), [((150, 200), 30), ((420, 120), 90), ((560, 330), 0)],
+            background=(0, 0, 0), spots=[(150, 200)], spot_colour=(0, 0, 0))
+        self.opened = get_img_opened(image)
+
+    def test_round_trip(self):
+        """
+        Test that decoding the runs gives back the binary image, in a reused array too.
+        """
+        rle = RunLengthMask.from_image(self.opened)
+        np.testing.assert_array_equal(rle.to_image(), self.opened)
+        dst = np.full(self.opened.shape, 7, np.uint8)
+        self.assertIs(rle.to_image(dst), dst)
+        np.testing.assert_array_equal(dst, self.opened)
+        self.assertLess(rle.nbytes, self.opened.nbytes)
+        empty = RunLengthMask.from_image(np.zeros((5, 8), np.uint8))
+        self.assertEqual((empty.area, empty.bounding_box()), (0, (0, 0, 0, 0)))
+        self.assertFalse(empty.to_image().any())
+
+    def test_measurements(self):
+        """
+        Test the measurements from the runs against the pixel-wise computations.
+        """
+        rle = RunLengthMask.from_image(self.opened)
+        self.assertEqual(rle.area, cv2.countNonZero(self.opened))
+        self.assertEqual(rle.bounding_box(), cv2.boundingRect(cv2.findNonZero(self.opened)))
+        np.testing.assert_array_equal(rle.row_widths(), np.count_nonzero(self.opened, axis=1))
+        left, right = rle.row_extents()
+        np.testing.assert_array_equal(rle.row_spans(), right - left)
+        for row, (first, end) in enumerate(zip(left, right)):
+            columns = np.flatnonzero(self.opened[row])
+            expected = (columns[0], columns[-1] + 1) if columns.size else (-1, -1)
+            self.assertEqual((first, end), expected)
+
+    def test_rows(self):
+        """
+        Test the row ranges against the slicing of the binary image.
+        """
+        rle = RunLengthMask.from_image(self.opened)
+        np.testing.assert_array_equal(rle.crop_rows(50, 300).to_image(), self.opened[50:300])
+        np.testing.assert_array_equal(rle.crop_rows(-80, 1000).to_image(), self.opened[-80:])
+        np.testing.assert_array_equal(rle.trim_rows().to_image(), remove_zero_rows(self.opened))
+        top, bottom = rle.row_range()
+        np.testing.assert_array_equal(self.opened[top:bottom], remove_zero_rows(self.opened))
+        with self.assertRaises(ValueError):
+            RunLengthMask.from_image(np.zeros((5, 8), np.uint8)).trim_rows()
+
+
+if __name__ == '__main__':
+    unittest.main()
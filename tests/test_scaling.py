@@ -0,0 +1,72 @@
+"""
+Test the ProcessingScale class.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from src.detection import detect_frame
+from src.parameter import DefectDetectionParams
+from src.scaling import ProcessingScale
+from tests.synthetic import four_capsules_frame
+from utils.transform import bgr_to_bayer
+
+
+class TestProcessingScale(unittest.TestCase):
+    """
+    TestProcessingScale class to test the detection at a reduced resolution.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_thresholds(self):
+        """
+        Test that lengths, areas and kernels follow the factor and stay usable.
+        """
+        scale = ProcessingScale(0.25)
+        self.assertEqual(scale.length(330), 82)
+        self.assertEqual(scale.area(35000), 2188)
+        self.assertEqual(scale.kernel(21), 5)
+        self.assertEqual(scale.kernel(5), 3)
+        self.assertEqual(ProcessingScale().kernel(15), 15)
+        self.assertIs(ProcessingScale().params(params := DefectDetectionParams()), params)
+        with self.assertRaises(ValueError):
+            ProcessingScale(2.0)
+
+    def test_prepare(self):
+        """
+        Test that frames reach the processing scale, with the binning of the camera counted.
+        """
+        scale = ProcessingScale(0.5)
+        image = four_capsules_frame(480, 800)
+        prepared, cfa_pattern = scale.prepare(image)
+        self.assertEqual(prepared.shape, (240, 400, 3))
+        self.assertIsNone(cfa_pattern)
+        self.assertIs(scale.prepare(image, binning=2)[0], image)
+        prepared, cfa_pattern = scale.prepare(bgr_to_bayer(image, "RGGB"), "RGGB")
+        self.assertEqual(prepared.shape, (240, 400, 3))
+        self.assertIsNone(cfa_pattern)
+        self.assertEqual(ProcessingScale(0.25).prepare(
+            bgr_to_bayer(image, "RGGB"), "RGGB")[0].shape, (120, 200, 3))
+
+    def test_same_detection(self):
+        """
+        Test that a half resolution frame gives the capsules of the full resolution frame.
+        """
+        params = DefectDetectionParams()
+        image = four_capsules_frame(720, 1800)
+        _, centers, abnormal = detect_frame(image, params, background_removed=True)
+        scale = ProcessingScale(0.5)
+        _, half_centers, half_abnormal = detect_frame(
+            scale.prepare(image)[0], params, background_removed=True, scale=scale)
+        self.assertEqual(len(centers), 4)
+        self.assertEqual(len(half_centers), len(centers))
+        np.testing.assert_allclose(
+            np.array(half_centers) / scale.factor, np.array(centers), atol=2.0)
+        self.assertEqual(len(half_abnormal), len(abnormal))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Test the DetectionSnapshot class.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.camera_thread import CameraThread
+from src.detection import detect_frame
+from src.frame_source import ReplayFrameSource
+from src.parameter import DefectDetectionParams
+from src.scaling import ProcessingScale
+from src.snapshot import DetectionSnapshot
+from tests.synthetic import four_capsules_frame
+
+
+class TestDetectionSnapshot(unittest.TestCase):
+    """
+    TestDetectionSnapshot class to test the parameter snapshots read by the detector.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_derived_constants(self):
+        """
+        Test that the constants follow the scale and that the snapshot owns its parameters.
+        """
+        params = DefectDetectionParams()
+        snapshot = DetectionSnapshot.build(params, ProcessingScale(0.5))
+        self.assertEqual(snapshot.normal_area_range, (7625, 8750))
+        self.assertEqual(snapshot.normal_width_range, (50, 75))
+        self.assertEqual(snapshot.frame_width, 1080)
+        self.assertEqual(snapshot.scaled.local_defect_length, 38)
+        np.testing.assert_array_equal(snapshot.classifier.upper, (220, 190, 120))
+        params.B_val_upper = 10
+        self.assertEqual(snapshot.params.B_val_upper, 120)
+        self.assertIsNot(DetectionSnapshot.build(params).params, params)
+
+    def test_same_detection(self):
+        """
+        Test that a frame detected with a snapshot gives the result of the plain parameters.
+        """
+        params = DefectDetectionParams()
+        scale = ProcessingScale(0.5)
+        image = scale.prepare(four_capsules_frame(720, 1800))[0]
+        _, centers, abnormal = detect_frame(
+            image.copy(), params, background_removed=True, scale=scale)
+        _, snapshot_centers, snapshot_abnormal = detect_frame(
+            image.copy(), DetectionSnapshot.build(params, scale), background_removed=True)
+        self.assertEqual(len(centers), 4)
+        self.assertEqual(snapshot_centers, centers)
+        self.assertEqual(snapshot_abnormal, abnormal)
+
+    def test_parameter_update(self):
+        """
+        Test that a parameter change replaces the snapshot of the camera thread as a whole.
+        """
+        thread = CameraThread(DefectDetectionParams(), source=ReplayFrameSource("data/Figs_14"))
+        first = thread.snapshot
+        params = DefectDetectionParams(normal_length_lower=300)
+        thread.set_detection_params(params)
+        self.assertEqual(thread.snapshot.version, first.version + 1)
+        self.assertEqual(thread.detection_params.normal_length_lower, 300)
+        self.assertEqual(first.params.normal_length_lower, 310)
+        params.normal_length_lower = 200
+        self.assertEqual(thread.detection_params.normal_length_lower, 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
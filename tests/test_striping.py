@@ -0,0 +1,71 @@
+"""
+Test the striped preprocessing of StripedExecutor.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.background import BackgroundClassifier
+from src.detection import detect_frame
+from src.parameter import DefectDetectionParams
+from src.striping import StripedExecutor
+from tests.synthetic import BELT_BGR, capsule_frame
+from utils.transform import bgr_to_bayer, get_img_opened
+
+
+def striped_frame(height: int, width: int) -> np.ndarray:
+    """
+    Synthetic frame with the background removed: capsules crossing the stripe boundaries,
+    one of them touching the bottom border, and specks of noise.
+    """
+    return capsule_frame(
+        (height, width), [((200, 160), 80), ((520, 240), 10), ((300, height - 30), 170)],
+        background=(0, 0, 0), specks=100, seed=2)
+
+
+class TestStripedExecutor(unittest.TestCase):
+    """
+    TestStripedExecutor class to compare the striped and the full frame preprocessing.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_same_as_full_frame(self):
+        """
+        Test that the stripes give the full frame result for every pixel mode and size.
+        """
+        classifier = BackgroundClassifier.from_params(DefectDetectionParams())
+        for height, width in ((480, 800), (483, 805)):
+            rng = np.random.default_rng(height)
+            image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+            image[np.all(striped_frame(height, width) == 0, axis=2)] = BELT_BGR
+            for threads in (1, 3, 4, 7):
+                executor = StripedExecutor(threads)
+                for frame, cfa_pattern in ((image, None), (image[..., 1].copy(), None),
+                                           (bgr_to_bayer(image, "RGGB"), "RGGB")):
+                    expected = classifier.remove_background(frame, cfa_pattern)
+                    removed = executor.remove_background(classifier, frame, cfa_pattern)
+                    np.testing.assert_array_equal(removed, expected)
+                    dst = np.full(frame.shape[:2], 7, np.uint8)
+                    self.assertIs(executor.get_img_opened(removed, dst=dst), dst)
+                    np.testing.assert_array_equal(dst, get_img_opened(expected))
+                executor.close()
+
+    def test_same_detection(self):
+        """
+        Test that detect_frame finds the same capsules with and without stripes.
+        """
+        params = DefectDetectionParams()
+        image = striped_frame(480, 800)
+        executor = StripedExecutor(4)
+        _, centers, abnormal = detect_frame(image, params, background_removed=True)
+        _, striped_centers, striped_abnormal = detect_frame(
+            image, params, background_removed=True, striper=executor)
+        executor.close()
+        self.assertEqual(striped_centers, centers)
+        self.assertEqual(striped_abnormal, abnormal)
+
+
+if __name__ == '__main__':
+    unittest.main()
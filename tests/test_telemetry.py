@@ -0,0 +1,70 @@
+"""
+Test the TelemetrySampler class.
+"""
+
+import unittest
+
+from src.frame_source import ReplayFrameSource
+from src.telemetry import TelemetrySampler
+from src.params import DATA_DIR
+
+
+class FailingSource(ReplayFrameSource):
+    """
+    Replay source whose temperature cannot be read.
+    """
+
+    def temperature_status(self) -> str:
+        raise RuntimeError("node not readable")
+
+
+class TestTelemetrySampler(unittest.TestCase):
+    """
+    TestTelemetrySampler class to test the low rate telemetry sampling.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def test_samples_at_interval(self):
+        """
+        Test that the sampler publishes a snapshot after every interval until stopped.
+        """
+        source = ReplayFrameSource(DATA_DIR / "Figs_14")
+        samples, waits = [], []
+
+        def wait(interval: float) -> bool:
+            waits.append(interval)
+            return len(waits) == 4
+
+        sampler = TelemetrySampler(
+            source, interval=0.05, on_sample=samples.append, wait=wait)
+        sampler.start()
+        sampler.join(timeout=10.0)
+        self.assertFalse(sampler.is_alive())
+        self.assertEqual(waits, [0.05] * 4)
+        self.assertEqual(len(samples), 4)
+        self.assertIs(sampler.latest, samples[-1])
+        self.assertEqual(sampler.latest.temperature_status, "Ok")
+        self.assertEqual(sampler.latest.stream_statistics, {"total_buffer_count": 0})
+
+    def test_stop(self):
+        """
+        Test that stopping interrupts the wait and ends the sampler thread.
+        """
+        sampler = TelemetrySampler(ReplayFrameSource(DATA_DIR / "Figs_14"), interval=60.0)
+        sampler.start()
+        sampler.stop()
+        self.assertFalse(sampler.is_alive())
+        self.assertGreaterEqual(sampler.latest.sample_time, 0.0)
+
+    def test_failed_sample_keeps_previous(self):
+        """
+        Test that a failing source does not replace the latest snapshot.
+        """
+        sampler = TelemetrySampler(FailingSource(DATA_DIR / "Figs_14"))
+        previous = sampler.latest
+        self.assertIs(sampler.sample(), previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
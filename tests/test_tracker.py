@@ -0,0 +1,71 @@
+"""
+Test the CapsuleTracker class.
+"""
+
+import unittest
+
+from src.tracker import CapsuleTracker
+
+
+class TestCapsuleTracker(unittest.TestCase):
+    """
+    TestCapsuleTracker class to test the cross-frame capsule tracking.
+    Args:
+        unittest: Super class for unit testing.
+    """
+
+    def setUp(self):
+        """
+        Belt moving at 1000 px/s in a 2000 px wide field of view, frames every 0.1 s.
+        """
+        self.tracker = CapsuleTracker(
+            pixel_speed=1000.0, gate=40.0, max_age=0.25, frame_width=2000)
+
+    def test_single_actuation_per_defective_capsule(self):
+        """
+        Test that a defective capsule seen in many frames keeps its ID and is reported once.
+        """
+        reported = []
+        for frame in range(10):
+            time = 0.1 * frame
+            good, bad = (300.0 + 1000.0 * time, 200.0), (100.0 + 1000.0 * time, 600.0)
+            track_ids, new_defects = self.tracker.update(time, [good, bad], [bad])
+            self.assertEqual(track_ids, [1, 2])
+            reported.extend(new_defects)
+        self.assertEqual(reported, [(100.0, 600.0)])
+
+    def test_late_defect_flag(self):
+        """
+        Test that a capsule flagged in a later frame is reported at that frame.
+        """
+        self.assertEqual(self.tracker.update(0.0, [(100.0, 100.0)], []), ([1], []))
+        self.assertEqual(
+            self.tracker.update(0.1, [(205.0, 98.0)], [(205.0, 98.0)]),
+            ([1], [(205.0, 98.0)]))
+
+    def test_missed_frames_and_expiry(self):
+        """
+        Test that a capsule survives a missed frame but is forgotten after max_age.
+        """
+        self.tracker.update(0.0, [(100.0, 100.0)], [])
+        self.assertEqual(self.tracker.update(0.2, [(300.0, 100.0)], [])[0], [1])
+        self.assertEqual(self.tracker.update(0.6, [(700.0, 100.0)], [])[0], [2])
+
+    def test_capsule_leaving_the_view(self):
+        """
+        Test that tracks predicted beyond the frame width are dropped.
+        """
+        self.tracker.update(0.0, [(1950.0, 100.0)], [])
+        self.tracker.update(0.1, [], [])
+        self.assertEqual(self.tracker.tracks, [])
+
+    def test_new_capsule_outside_gate(self):
+        """
+        Test that a detection far from every prediction starts a new track.
+        """
+        self.tracker.update(0.0, [(100.0, 100.0)], [])
+        self.assertEqual(self.tracker.update(0.1, [(100.0, 100.0)], [])[0], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
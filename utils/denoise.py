@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Denoising filters standing in for the median blur of the detection.
+
+The segmentation (`get_img_opened`) and the local defect check (`detect_defects`) both
+smooth their input with a median blur of a large kernel, which is costly on three channel
+images. Every backend takes the kernel size of the median it replaces and keeps its reach
+within half the kernel, so that the halos of the stripes and of the inspection view hold
+for all of them:
+
+- "median": the median blur itself, the reference.
+- "box": the mean over the kernel, a separable filter whose cost does not depend on the
+  kernel size. It spreads bright specks instead of removing them, which the threshold of
+  the segmentation keeps.
+- "closing": a morphological closing filling the dark specks, with half the kernel.
+- "half_median": the median of half the kernel on the image reduced by 2, expanded back.
+
+`scripts/benchmark_denoise.py` reports the speed of each backend and the detection
+decisions it changes on recorded frames.
+"""
+
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+from numpy.typing import NDArray
+
+# Filter of an image by the kernel size of the median blur it replaces, into an optional dst
+DenoiseFilter = Callable[[NDArray[np.uint8], int, Optional[NDArray[np.uint8]]], NDArray[np.uint8]]
+
+
+def median_denoise(
+    img: NDArray[np.uint8], kernel_size: int, dst: Optional[NDArray[np.uint8]] = None
+) -> NDArray[np.uint8]:
+    """
+    Median blur of the image.
+
+    Args:
+        img (NDArray[np.uint8]): BGR image or single channel plane.
+        kernel_size (int): Odd size of the median blur.
+        dst (Optional[NDArray[np.uint8]]): Array receiving the result, shaped like img.
+
+    Returns:
+        NDArray[np.uint8]: The filtered image.
+    """
+    return cv2.medianBlur(img, kernel_size, dst=dst)
+
+
+def box_denoise(
+    img: NDArray[np.uint8], kernel_size: int, dst: Optional[NDArray[np.uint8]] = None
+) -> NDArray[np.uint8]:
+    """
+    Mean of the image over the kernel, with the borders of the median blur.
+
+    Args:
+        img (NDArray[np.uint8]): BGR image or single channel plane.
+        kernel_size (int): Odd size of the median blur replaced.
+        dst (Optional[NDArray[np.uint8]]): Array receiving the result, shaped like img.
+
+    Returns:
+        NDArray[np.uint8]: The filtered image.
+    """
+    return cv2.blur(img, (kernel_size, kernel_size), dst=dst, borderType=cv2.BORDER_REPLICATE)
+
+
+def closing_denoise(
+    img: NDArray[np.uint8], kernel_size: int, dst: Optional[NDArray[np.uint8]] = None
+) -> NDArray[np.uint8]:
+    """
+    Morphological closing of the image by a square of half the kernel. The bright specks
+    are left to the opening that follows the threshold of the segmentation.
+
+    Args:
+        img (NDArray[np.uint8]): BGR image or single channel plane.
+        kernel_size (int): Odd size of the median blur replaced.
+        dst (Optional[NDArray[np.uint8]]): Array receiving the result, shaped like img.
+
+    Returns:
+        NDArray[np.uint8]: The filtered image.
+    """
+    size: int = kernel_size // 2 | 1
+    return cv2.morphologyEx(
+        img, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (size, size)),
+        dst=dst, borderType=cv2.BORDER_REPLICATE)
+
+
+def half_median_denoise(
+    img: NDArray[np.uint8], kernel_size: int, dst: Optional[NDArray[np.uint8]] = None
+) -> NDArray[np.uint8]:
+    """
+    Median blur on the image reduced by 2, each result pixel expanded back to the 2x2
+    pixels it covers. A last odd row or column takes the row or column before.
+
+    Args:
+        img (NDArray[np.uint8]): BGR image or single channel plane.
+        kernel_size (int): Odd size of the median blur replaced.
+        dst (Optional[NDArray[np.uint8]]): Array receiving the result, shaped like img.
+
+    Returns:
+        NDArray[np.uint8]: The filtered image.
+
+    >>> img = np.zeros((40, 41), dtype=np.uint8)
+    >>> img[8:32, 8:33] = 200
+    >>> img[20, 20] = 0
+    >>> filtered = half_median_denoise(img, 7)
+    >>> filtered.shape, int(filtered[20, 20]), int(filtered[2, 2]), int(filtered[20, 40])
+    ((40, 41), 200, 0, 0)
+    """
+    height, width = img.shape[:2]
+    if height < 2 or width < 2:
+        return median_denoise(img, kernel_size, dst)
+    if dst is None:
+        dst = np.empty_like(img)
+    reduced: NDArray[np.uint8] = cv2.resize(
+        img[:height // 2 * 2, :width // 2 * 2], (width // 2, height // 2),
+        interpolation=cv2.INTER_AREA)
+    cv2.medianBlur(reduced, kernel_size // 2 | 1, dst=reduced)
+    expanded: NDArray[np.uint8] = dst[:height // 2 * 2, :width // 2 * 2]
+    cv2.resize(reduced, (expanded.shape[1], expanded.shape[0]), dst=expanded,
+               interpolation=cv2.INTER_NEAREST)
+    if height % 2:
+        dst[-1] = dst[-2]
+    if width % 2:
+        dst[:, -1] = dst[:, -2]
+    return dst
+
+
+# Denoising backends by name
+DENOISE_BACKENDS: dict[str, DenoiseFilter] = {
+    "median": median_denoise,
+    "box": box_denoise,
+    "closing": closing_denoise,
+    "half_median": half_median_denoise,
+}
+
+
+def denoise(
+    img: NDArray[np.uint8], kernel_size: int, backend: str = "median",
+    dst: Optional[NDArray[np.uint8]] = None
+) -> NDArray[np.uint8]:
+    """
+    Filter an image with a denoising backend.
+
+    Args:
+        img (NDArray[np.uint8]): BGR image or single channel plane.
+        kernel_size (int): Odd size of the median blur the backend stands in for.
+        backend (str): Name of the backend in DENOISE_BACKENDS.
+        dst (Optional[NDArray[np.uint8]]): Array receiving the result, shaped like img.
+
+    Raises:
+        ValueError: If the backend is unknown.
+
+    Returns:
+        NDArray[np.uint8]: The filtered image.
+
+    >>> img = np.zeros((6, 6), dtype=np.uint8)
+    >>> img[2, 2] = 255
+    >>> [int(denoise(img, 5, name).max()) for name in DENOISE_BACKENDS]
+    [0, 10, 255, 0]
+    """
+    if backend not in DENOISE_BACKENDS:
+        raise ValueError(
+            f"Unknown denoising backend {backend!r}, expected one of {list(DENOISE_BACKENDS)}.")
+    return DENOISE_BACKENDS[backend](img, kernel_size, dst)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Run-length encoding of binary masks.
+
+The opened images and the capsule masks are mostly zero. A mask is stored as the runs of
+foreground pixels of its rows: the row, first column and past-the-end column of every
+run. Encoding is a single vectorized pass over the flattened mask, decoding only writes
+the runs, and the row extents, row spans, row widths, area and bounding box are computed
+from the runs without touching the background pixels.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+# Comparing or hashing the run arrays element-wise is not meaningful, hence eq=False
+@dataclass(slots=True, frozen=True, eq=False)
+class RunLengthMask:
+    """
+    Binary mask stored as horizontal runs of foreground pixels, in row-major order.
+
+    Attributes:
+        shape (tuple[int, int]): Height and width of the mask.
+        rows (NDArray[np.int32]): Row of every run.
+        starts (NDArray[np.int32]): First column of every run.
+        ends (NDArray[np.int32]): Past-the-end column of every run.
+
+    Example:
+        >>> mask = np.zeros((4, 6), dtype=np.uint8)
+        >>> mask[1, 1:3] = mask[1, 4] = mask[2, 2:5] = 255
+        >>> rle = RunLengthMask.from_image(mask)
+        >>> rle.rows.tolist(), rle.starts.tolist(), rle.ends.tolist()
+        ([1, 1, 2], [1, 4, 2], [3, 5, 5])
+        >>> rle.area, rle.bounding_box()
+        (6, (1, 1, 4, 2))
+        >>> rle.row_widths().tolist()
+        [0, 3, 3, 0]
+        >>> np.array_equal(rle.to_image(), mask)
+        True
+    """
+    shape: tuple[int, int]
+    rows: NDArray[np.int32]
+    starts: NDArray[np.int32]
+    ends: NDArray[np.int32]
+
+    @staticmethod
+    def from_image(mask: NDArray[np.uint8]) -> "RunLengthMask":
+        """
+        Encode the nonzero pixels of a single channel image.
+
+        Args:
+            mask (NDArray[np.uint8]): Binary image, every nonzero pixel is foreground.
+
+        Returns:
+            RunLengthMask: The runs of the foreground pixels.
+        """
+        height, width = mask.shape
+        # Zero columns around the rows turn every run into a rising and a falling edge
+        # of the flattened mask, and keep the edges of consecutive rows apart
+        padded: NDArray[np.bool_] = np.zeros((height, width + 2), dtype=np.bool_)
+        np.not_equal(mask, 0, out=padded[:, 1:-1])
+        flat: NDArray[np.bool_] = padded.ravel()
+        edges: NDArray[np.intp] = np.flatnonzero(flat[1:] != flat[:-1])
+        rows, columns = np.divmod(edges, width + 2)
+        return RunLengthMask(
+            (height, width), rows[0::2].astype(np.int32), columns[0::2].astype(np.int32),
+            columns[1::2].astype(np.int32))
+
+    @property
+    def area(self) -> int:
+        """
+        Number of foreground pixels.
+        """
+        return int(np.sum(self.ends - self.starts))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the runs, to compare with the height times width of the image.
+        """
+        return self.rows.nbytes + self.starts.nbytes + self.ends.nbytes
+
+    def to_image(self, dst: Optional[NDArray[np.uint8]] = None) -> NDArray[np.uint8]:
+        """
+        Decode the runs to a binary image.
+
+        Args:
+            dst (Optional[NDArray[np.uint8]]): Array of the mask shape receiving the image.
+
+        Returns:
+            NDArray[np.uint8]: 255 on the foreground, 0 on the background.
+        """
+        if dst is None:
+            dst = np.empty(self.shape, dtype=np.uint8)
+        dst[...] = 0
+        # A mask has far fewer runs than pixels
+        for row, start, end in zip(self.rows.tolist(), self.starts.tolist(), self.ends.tolist()):
+            dst[row, start:end] = 255
+        return dst
+
+    def row_extents(self) -> tuple[NDArray[np.int32], NDArray[np.int32]]:
+        """
+        Leftmost and rightmost foreground pixel of every row.
+
+        Returns:
+            tuple[NDArray[np.int32], NDArray[np.int32]]: First column and past-the-end
+            column of the foreground of every row, -1 on rows without foreground.
+
+        >>> mask = np.zeros((3, 6), dtype=np.uint8)
+        >>> mask[0, 1] = mask[0, 4] = mask[2, 2:4] = 1
+        >>> [extent.tolist() for extent in RunLengthMask.from_image(mask).row_extents()]
+        [[1, -1, 2], [5, -1, 4]]
+        """
+        left: NDArray[np.int32] = np.full(self.shape[0], -1, dtype=np.int32)
+        right: NDArray[np.int32] = np.full(self.shape[0], -1, dtype=np.int32)
+        if self.rows.size:
+            rows, first = np.unique(self.rows, return_index=True)
+            last: NDArray = np.append(first[1:], self.rows.size) - 1
+            left[rows] = self.starts[first]
+            right[rows] = self.ends[last]
+        return left, right
+
+    def row_spans(self) -> NDArray[np.int32]:
+        """
+        Distance from the leftmost to past the rightmost foreground pixel of every row.
+
+        Returns:
+            NDArray[np.int32]: Span of the foreground of every row, 0 on rows without
+            foreground.
+
+        >>> mask = np.zeros((3, 6), dtype=np.uint8)
+        >>> mask[0, 1] = mask[0, 4] = mask[2, 2:4] = 1
+        >>> RunLengthMask.from_image(mask).row_spans().tolist()
+        [4, 0, 2]
+        """
+        left, right = self.row_extents()
+        return right - left
+
+    def row_widths(self) -> NDArray[np.int64]:
+        """
+        Number of foreground pixels of every row.
+
+        Returns:
+            NDArray[np.int64]: Foreground pixel count of every row.
+        """
+        return np.bincount(
+            self.rows, weights=self.ends - self.starts, minlength=self.shape[0]
+        ).astype(np.int64)
+
+    def bounding_box(self) -> tuple[int, int, int, int]:
+        """
+        Upright bounding rectangle of the foreground, as given by `cv2.boundingRect`.
+
+        Returns:
+            tuple[int, int, int, int]: Left, top, width and height, all zero on an empty mask.
+        """
+        if not self.rows.size:
+            return 0, 0, 0, 0
+        left: int = int(self.starts.min())
+        top: int = int(self.rows[0])
+        return left, top, int(self.ends.max()) - left, int(self.rows[-1]) + 1 - top
+
+    def crop_rows(self, top: int, bottom: int) -> "RunLengthMask":
+        """
+        The runs of a range of rows, as a mask of its own.
+
+        Args:
+            top (int): First row of the range.
+            bottom (int): Past-the-end row of the range.
+
+        Returns:
+            RunLengthMask: Mask of bottom - top rows.
+        """
+        top, bottom, _ = slice(top, bottom).indices(self.shape[0])
+        bottom = max(bottom, top)
+        first, last = np.searchsorted(self.rows, (top, bottom))
+        return RunLengthMask(
+            (bottom - top, self.shape[1]), self.rows[first:last] - top,
+            self.starts[first:last], self.ends[first:last])
+
+    def row_range(self) -> tuple[int, int]:
+        """
+        First row and past-the-end row of the foreground, the rows kept by
+        `utils.transform.remove_zero_rows`.
+
+        Raises:
+            ValueError: If the mask has no foreground.
+
+        Returns:
+            tuple[int, int]: Top and bottom of the rows with foreground.
+        """
+        if not self.rows.size:
+            raise ValueError("The input binary image is a zero matrix.")
+        return int(self.rows[0]), int(self.rows[-1]) + 1
+
+    def trim_rows(self) -> "RunLengthMask":
+        """
+        The mask without its leading and trailing rows without foreground.
+
+        Raises:
+            ValueError: If the mask has no foreground.
+
+        Returns:
+            RunLengthMask: Mask from the first to the last row with foreground.
+        """
+        return self.crop_rows(*self.row_range())
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
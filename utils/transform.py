@@ -6,49 +6,322 @@ Module contains helper Functions to transform an image.
 """
 
 
+from typing import Optional
+
 import cv2
 import numpy as np
 
+from utils.denoise import denoise
+
+# Size of the median blur and of the opening in get_img_opened at full resolution
+DENOISE_KERNEL_PX: int = 15
+# Structuring element of the morphological opening in get_img_opened
+OPENING_KERNEL: np.ndarray = cv2.getStructuringElement(
+    cv2.MORPH_RECT, (DENOISE_KERNEL_PX, DENOISE_KERNEL_PX))
 
-def generate_background_mask(image_rgb: np.ndarray, bgc_ranges: dict) -> np.ndarray:
+
+def opened_halo(kernel_size: int = DENOISE_KERNEL_PX) -> int:
+    """
+    Reach of get_img_opened, pixels further away do not affect a result pixel:
+    half the kernel for the median blur and twice that for the opening.
+
+    >>> opened_halo(15)
+    21
+    """
+    return 3 * (kernel_size // 2)
+
+
+# Reach of get_img_opened at full resolution
+OPENED_HALO_PX: int = opened_halo()
+
+# Demosaicing of a raw Bayer plane to BGR, by colour filter array layout
+# (channels of the 2x2 tile in row order)
+DEMOSAIC_CODES: dict[str, int] = {
+    "RGGB": cv2.COLOR_BayerRGGB2BGR,
+    "BGGR": cv2.COLOR_BayerBGGR2BGR,
+    "GRBG": cv2.COLOR_BayerGRBG2BGR,
+    "GBRG": cv2.COLOR_BayerGBRG2BGR,
+}
+# Demosaicing of a raw Bayer plane straight to its luminance, by colour filter array layout
+DEMOSAIC_GRAY_CODES: dict[str, int] = {
+    "RGGB": cv2.COLOR_BayerRGGB2GRAY,
+    "BGGR": cv2.COLOR_BayerBGGR2GRAY,
+    "GRBG": cv2.COLOR_BayerGRBG2GRAY,
+    "GBRG": cv2.COLOR_BayerGBRG2GRAY,
+}
+
+
+def generate_background_mask(
+    image_rgb: np.ndarray, bgc_ranges: dict, dst: Optional[np.ndarray] = None
+) -> np.ndarray:
     """
     Generates a combined background mask for the specified RGB ranges.
 
     Parameters:
         image_rgb (np.ndarray): RGB image.
         bgc_ranges (dict): Dictionary of color names to (lower, upper) RGB range tuples.
+        dst (Optional[np.ndarray]): Single channel array receiving the mask.
 
     Returns:
         np.ndarray: Combined binary mask for all specified background ranges.
     """
-    combined_mask: np.ndarray = np.zeros(image_rgb.shape[:2], dtype=np.uint8)
-    for lower, upper in bgc_ranges.values():
+    combined_mask: Optional[np.ndarray] = dst
+    for index, (lower, upper) in enumerate(bgc_ranges.values()):
         lower_np = np.array(lower, dtype=np.uint8)
         upper_np = np.array(upper, dtype=np.uint8)
-        mask = cv2.inRange(image_rgb, lower_np, upper_np)
-        combined_mask = cv2.bitwise_or(combined_mask, mask)
+        if index == 0:
+            combined_mask = cv2.inRange(image_rgb, lower_np, upper_np, dst=combined_mask)
+        else:
+            mask = cv2.inRange(image_rgb, lower_np, upper_np)
+            combined_mask = cv2.bitwise_or(combined_mask, mask, dst=combined_mask)
+    if combined_mask is None:
+        combined_mask = np.zeros(image_rgb.shape[:2], dtype=np.uint8)
+    elif not bgc_ranges:
+        combined_mask[...] = 0
     return combined_mask
 
 
-def remove_background(img_bgr: np.ndarray, bgc_ranges: dict) -> np.ndarray:
+def remove_background(
+    img_bgr: np.ndarray, bgc_ranges: dict, dst: Optional[np.ndarray] = None,
+    img_rgb: Optional[np.ndarray] = None, mask: Optional[np.ndarray] = None
+) -> np.ndarray:
     """
     Removes background colors from an image using specified RGB ranges.
 
     Parameters:
         img_bgr (np.ndarray): Original BGR image.
         bgc_ranges (dict): Dictionary mapping color names to (lower, upper) RGB tuples.
+        dst (Optional[np.ndarray]): Array receiving the result, shaped like img_bgr.
+        img_rgb (Optional[np.ndarray]): Scratch array for the RGB copy, shaped like img_bgr.
+        mask (Optional[np.ndarray]): Single channel scratch array for the masks.
 
     Returns:
         np.ndarray: BGR image with background pixels set to black.
+
+    >>> img = np.array([[[100, 100, 100], [250, 250, 250]]], dtype=np.uint8)
+    >>> out = np.full_like(img, 7)
+    >>> remove_background(img, {"bgc": ([0, 30, 60], [120, 190, 220])}, dst=out)[0].tolist()
+    [[0, 0, 0], [250, 250, 250]]
     """
-    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-    background_mask = generate_background_mask(img_rgb, bgc_ranges)
-    foreground_mask = cv2.bitwise_not(background_mask)
-    img_bgr_no_bg = cv2.bitwise_and(img_bgr, img_bgr, mask=foreground_mask)
+    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB, dst=img_rgb)
+    background_mask = generate_background_mask(img_rgb, bgc_ranges, dst=mask)
+    foreground_mask = cv2.bitwise_not(background_mask, dst=background_mask)
+    # Pixels outside the mask are left untouched in a reused array
+    if dst is not None:
+        dst[...] = 0
+    img_bgr_no_bg = cv2.bitwise_and(img_bgr, img_bgr, dst=dst, mask=foreground_mask)
     return img_bgr_no_bg
 
 
-def cut_image_by_box(img: cv2.typing.MatLike, points: np.ndarray) -> cv2.typing.MatLike:
+def bayer_superpixels(plane: np.ndarray, cfa_pattern: str) -> np.ndarray:
+    """
+    Builds a half resolution BGR image from the 2x2 tiles of a raw Bayer plane,
+    taking the first green sample of each tile.
+
+    Parameters:
+        plane (np.ndarray): Raw Bayer plane.
+        cfa_pattern (str): Colour filter array layout, a key of DEMOSAIC_CODES.
+
+    Returns:
+        np.ndarray: BGR image of half the height and width of the plane.
+
+    >>> plane = np.array([[10, 20], [30, 40]], dtype=np.uint8)
+    >>> bayer_superpixels(plane, "RGGB").tolist()
+    [[[40, 20, 10]]]
+    """
+    height, width = plane.shape[0] // 2 * 2, plane.shape[1] // 2 * 2
+    channels: list[np.ndarray] = []
+    for colour in "BGR":
+        row, column = divmod(cfa_pattern.index(colour), 2)
+        channels.append(plane[row:height:2, column:width:2])
+    return cv2.merge(channels)
+
+
+def bgr_to_bayer(img_bgr: np.ndarray, cfa_pattern: str) -> np.ndarray:
+    """
+    Samples a BGR image through a colour filter array, as a Bayer sensor would.
+
+    Parameters:
+        img_bgr (np.ndarray): BGR image.
+        cfa_pattern (str): Colour filter array layout, a key of DEMOSAIC_CODES.
+
+    Returns:
+        np.ndarray: Raw Bayer plane.
+
+    >>> img = np.zeros((2, 2, 3), dtype=np.uint8)
+    >>> img[..., 0], img[..., 1], img[..., 2] = 1, 2, 3
+    >>> bgr_to_bayer(img, "RGGB").tolist()
+    [[3, 2], [2, 1]]
+    """
+    plane: np.ndarray = np.empty(img_bgr.shape[:2], dtype=img_bgr.dtype)
+    for index, colour in enumerate(cfa_pattern):
+        row, column = divmod(index, 2)
+        plane[row::2, column::2] = img_bgr[row::2, column::2, "BGR".index(colour)]
+    return plane
+
+
+def plane_to_bgr(
+    plane: np.ndarray, cfa_pattern: Optional[str] = None, dst: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Converts a Mono8 or raw Bayer plane to a BGR image.
+
+    Parameters:
+        plane (np.ndarray): Mono8 or raw Bayer plane.
+        cfa_pattern (Optional[str]): Colour filter array layout of a Bayer plane,
+            None for a Mono8 plane.
+        dst (Optional[np.ndarray]): Array receiving the BGR image.
+
+    Returns:
+        np.ndarray: BGR image.
+    """
+    code: int = cv2.COLOR_GRAY2BGR if cfa_pattern is None else DEMOSAIC_CODES[cfa_pattern]
+    return cv2.cvtColor(plane, code, dst=dst)
+
+
+def gray_plane(
+    img: np.ndarray, cfa_pattern: Optional[str] = None, dst: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Converts a frame to its grayscale plane, computed once and shared by the steps of the
+    detection that only need the luminance.
+
+    Parameters:
+        img (np.ndarray): BGR image, Mono8 plane or raw Bayer plane.
+        cfa_pattern (Optional[str]): Colour filter array layout of a Bayer plane.
+        dst (Optional[np.ndarray]): Single channel array receiving the plane,
+            unused for a Mono8 plane, which is returned as it is.
+
+    Returns:
+        np.ndarray: Grayscale plane of the frame.
+
+    >>> gray_plane(np.array([[[0, 0, 255]]], dtype=np.uint8)).tolist()
+    [[76]]
+    >>> gray_plane(np.full((4, 4), 50, dtype=np.uint8), "RGGB")[1:3, 1:3].tolist()
+    [[50, 50], [50, 50]]
+    """
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=dst)
+    if cfa_pattern is None:
+        return img
+    return cv2.cvtColor(img, DEMOSAIC_GRAY_CODES[cfa_pattern], dst=dst)
+
+
+def sample_tiles(img: np.ndarray, step: int) -> np.ndarray:
+    """
+    Decimates an image by keeping a 2x2 tile every `step` pixels along both axes,
+    so that a raw Bayer plane keeps complete colour filter tiles.
+
+    Parameters:
+        img (np.ndarray): BGR image, Mono8 plane or raw Bayer plane.
+        step (int): Even distance between two sampled tiles.
+
+    Returns:
+        np.ndarray: The sampled tiles, side by side.
+
+    >>> sample_tiles(np.arange(64, dtype=np.uint8).reshape(8, 8), 4).tolist()
+    [[0, 1, 4, 5], [8, 9, 12, 13], [32, 33, 36, 37], [40, 41, 44, 45]]
+    """
+    rows: np.ndarray = (np.arange(0, img.shape[0] - 1, step)[:, None] + (0, 1)).ravel()
+    cols: np.ndarray = (np.arange(0, img.shape[1] - 1, step)[:, None] + (0, 1)).ravel()
+    return img[np.ix_(rows, cols)]
+
+
+def bayer_window(shape: tuple[int, ...], points: np.ndarray) -> tuple[int, int, int, int]:
+    """
+    Part of a raw Bayer plane to demosaic for a crop: the bounding rectangle of the points
+    plus a border for the interpolation, starting on an even pixel so that the rectangle
+    keeps the colour filter layout.
+
+    Args:
+        shape (tuple[int, ...]): Shape of the plane.
+        points (np.ndarray): Corners of the crop in the plane.
+
+    Returns:
+        tuple[int, int, int, int]: Left, top, right and bottom bounds of the window.
+
+    >>> bayer_window((8, 8), np.array([[1, 1], [6, 1], [6, 4], [1, 4]]))
+    (0, 0, 8, 6)
+    """
+    left, top = (np.maximum(np.floor(points.min(axis=0)).astype(int) - 2, 0) // 2) * 2
+    right, bottom = np.ceil(points.max(axis=0)).astype(int) + 2
+    right = min(left + max(right - left + 1, 2) // 2 * 2, shape[1] // 2 * 2)
+    bottom = min(top + max(bottom - top + 1, 2) // 2 * 2, shape[0] // 2 * 2)
+    return int(left), int(top), int(right), int(bottom)
+
+
+def upright_crop_transform(points: np.ndarray) -> tuple[np.ndarray, tuple[int, int]]:
+    """
+    Affine transform from a rectangular box to an upright crop, the longer side vertical.
+
+    The box corners are mapped as by `cut_image_by_box`, and a crop wider than it is high
+    is turned a quarter counterclockwise within the same transform, as `cv2.rotate` would.
+
+    Args:
+        points (np.ndarray): A 4x2 array of the corners of the box in clockwise order,
+            as given by `cv2.boxPoints`.
+
+    Returns:
+        tuple[np.ndarray, tuple[int, int]]: The 2x3 transform matrix and the width and
+        height of the crop.
+
+    >>> box = np.array([[10, 20], [40, 20], [40, 30], [10, 30]], dtype=np.float32)
+    >>> matrix, size = upright_crop_transform(box)
+    >>> size, [round(float(value)) for value in matrix @ np.array([40, 20, 1])]
+    ((10, 30), [0, 0])
+    """
+    points = points.astype(np.float32)
+    width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    height = int(max(np.linalg.norm(points[1] - points[2]), np.linalg.norm(points[3] - points[0])))
+    if height < width:
+        # (x, y) of the crop goes to (y, width - 1 - x)
+        output_points = np.array([[0, width - 1], [0, 0], [height - 1, 0]], dtype=np.float32)
+        size = (height, width)
+    else:
+        output_points = np.array(
+            [[0, 0], [width - 1, 0], [width - 1, height - 1]], dtype=np.float32)
+        size = (width, height)
+    return cv2.getAffineTransform(points[:3], output_points), size
+
+
+def warp_crop(
+    img: cv2.typing.MatLike, points: np.ndarray, matrix: np.ndarray, size: tuple[int, int],
+    cfa_pattern: Optional[str] = None, dst: Optional[np.ndarray] = None
+) -> cv2.typing.MatLike:
+    """
+    Extract a crop of an image with the transform of `upright_crop_transform`.
+    Only the destination pixels are computed, whatever the size of the image.
+
+    Args:
+        img (cv2.typing.MatLike): The input image.
+        points (np.ndarray): Corners of the box the transform maps to the crop.
+        matrix (np.ndarray): The 2x3 transform matrix.
+        size (tuple[int, int]): Width and height of the crop.
+        cfa_pattern (Optional[str]): Colour filter array layout if img is a raw Bayer plane.
+            Only the window of the box is then demosaiced.
+        dst (Optional[np.ndarray]): Array receiving the crop, of its shape, may be a view.
+
+    Returns:
+        cv2.typing.MatLike: The crop.
+
+    >>> plane = np.full((8, 8), 50, dtype=np.uint8)
+    >>> box = np.array([[1, 1], [6, 1], [6, 4], [1, 4]], dtype=np.float32)
+    >>> warp_crop(plane, box, *upright_crop_transform(box), "RGGB").shape
+    (5, 3, 3)
+    """
+    if cfa_pattern is not None:
+        left, top, right, bottom = bayer_window(img.shape, points)
+        img = plane_to_bgr(img[top:bottom, left:right], cfa_pattern)
+        matrix = matrix.copy()
+        matrix[:, 2] += matrix[:, :2] @ np.array([left, top], dtype=np.float64)
+    if dst is None:
+        return cv2.warpAffine(img, matrix, size)
+    return cv2.warpAffine(img, matrix, size, dst=dst)
+
+
+def cut_image_by_box(
+    img: cv2.typing.MatLike, points: np.ndarray, cfa_pattern: Optional[str] = None
+) -> cv2.typing.MatLike:
     """
     Extracts a region from the input image based on a given quadrilateral box
     (four points in clockwise order).
@@ -57,18 +330,30 @@ def cut_image_by_box(img: cv2.typing.MatLike, points: np.ndarray) -> cv2.typing.
         img (np.ndarray): The input image.
         points (np.ndarray): A 4x2 array of float32 representing the quadrilateral's corner points
                              in clockwise order [[x1, y1], [x2, y2], [x3, y3], [x4, y4]].
+        cfa_pattern (Optional[str]): Colour filter array layout if img is a raw Bayer plane.
+                             Only the bounding rectangle of the box is then demosaiced.
 
     Returns:
         np.ndarray: The extracted and transformed region of interest.
 
     Raises:
         ValueError: If the input points do not form a (4, 2) array.
+
+    >>> plane = np.full((8, 8), 50, dtype=np.uint8)
+    >>> box = np.array([[1, 1], [6, 1], [6, 4], [1, 4]])
+    >>> cut_image_by_box(plane, box, "RGGB").shape
+    (3, 5, 3)
     """
     points = points.astype(np.float32)  # Ensure correct dtype
     if points.shape != (4, 2):
         raise ValueError(
             "Points must be a 4x2 array representing four corners of a quadrilateral.")
 
+    if cfa_pattern is not None:
+        left, top, right, bottom = bayer_window(img.shape, points)
+        img = plane_to_bgr(img[top:bottom, left:right], cfa_pattern)
+        points = points - np.array([left, top], dtype=np.float32)
+
     # Calculate the width and height of the transformed rectangle
     width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))  # type: ignore
     height = int(max(np.linalg.norm(points[1] - points[2]), np.linalg.norm(points[3] - points[0])))  # type: ignore
@@ -91,7 +376,11 @@ def cut_image_by_box(img: cv2.typing.MatLike, points: np.ndarray) -> cv2.typing.
     return transformed_image
 
 
-def get_img_opened(img_raw: cv2.typing.MatLike) -> cv2.typing.MatLike:
+def get_img_opened(
+    img_raw: cv2.typing.MatLike, dst: Optional[np.ndarray] = None,
+    img_gray: Optional[np.ndarray] = None, img_blurred: Optional[np.ndarray] = None,
+    kernel_size: int = DENOISE_KERNEL_PX, denoise_backend: str = "median"
+) -> cv2.typing.MatLike:
     """
     Applies a series of image processing operations to the input image.
 
@@ -99,26 +388,96 @@ def get_img_opened(img_raw: cv2.typing.MatLike) -> cv2.typing.MatLike:
     and then performs morphological closing followed by morphological opening.
 
     Args:
-        img_raw (cv2.typing.MatLike): The raw input image.
+        img_raw (cv2.typing.MatLike): The raw BGR image, or a Mono8 or raw Bayer plane.
+        dst (Optional[np.ndarray]): Single channel array receiving the result.
+        img_gray (Optional[np.ndarray]): Single channel scratch array for the grayscale image.
+        img_blurred (Optional[np.ndarray]): Single channel scratch array for the median filter.
+        kernel_size (int): Odd size of the median blur and of the opening.
+        denoise_backend (str): Filter standing in for the median blur, see utils.denoise.
 
     Returns:
         cv2.typing.MatLike: The processed image after applying the morphological operations.
     """
-    # Step 1: Grayscale image
-    img_gray: cv2.typing.MatLike = cv2.cvtColor(img_raw, cv2.COLOR_BGR2GRAY)
+    # Step 1: Grayscale image, a single channel plane is used as it is
+    if img_raw.ndim == 2:
+        plane = img_raw
+    else:
+        plane = img_gray = cv2.cvtColor(img_raw, cv2.COLOR_BGR2GRAY, dst=img_gray)
     # Step2: Median filtering: removing salt and pepper noise while preserving edges
-    img_gray = cv2.medianBlur(img_gray, 15)
-    # Step 3: Binary image to highlight capsules
-    img_binary = cv2.inRange(img_gray, 1, 255)  # type: ignore
+    img_blurred = denoise(plane, kernel_size, denoise_backend, dst=img_blurred)
+    # Step 3: Binary image to highlight capsules, the grayscale image is left for the caller
+    img_binary = cv2.inRange(img_blurred, 1, 255, dst=img_blurred)  # type: ignore
 
     # Step 4: Morphological open operation: first corrode and dilate expand, remove small noise points
     # kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
     # img_binary: cv2.typing.MatLike = cv2.morphologyEx(img_binary, cv2.MORPH_CLOSE, kernel, iterations=1)
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+    kernel: np.ndarray = OPENING_KERNEL if kernel_size == DENOISE_KERNEL_PX \
+        else cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
     img_opened: cv2.typing.MatLike = cv2.morphologyEx(
-        img_binary, cv2.MORPH_OPEN, kernel, iterations=1)
+        img_binary, cv2.MORPH_OPEN, kernel, dst=dst, iterations=1)
     return img_opened
 
+
+def get_img_opened_pyramid(
+    img_raw: cv2.typing.MatLike, scale: int = 4, dst: Optional[np.ndarray] = None,
+    img_gray: Optional[np.ndarray] = None, kernel_size: int = DENOISE_KERNEL_PX,
+    denoise_backend: str = "median"
+) -> cv2.typing.MatLike:
+    """
+    Coarse-to-fine variant of `get_img_opened`.
+
+    The foreground blobs are found on an image reduced by `scale`. The full resolution
+    median filter, threshold and opening then run only inside the bounding rectangles of
+    the blobs, widened by the reach of the filters, and the rest of the result is black.
+    Blobs closer than twice the reach share a rectangle.
+
+    Args:
+        img_raw (cv2.typing.MatLike): The raw BGR image, or a Mono8 or raw Bayer plane.
+        scale (int): Reduction factor of the coarse image, e.g. 4 or 8.
+        dst (Optional[np.ndarray]): Single channel array receiving the result.
+        img_gray (Optional[np.ndarray]): Single channel scratch array for the grayscale image.
+        kernel_size (int): Odd size of the median blur and of the opening.
+        denoise_backend (str): Filter standing in for the median blur, see utils.denoise.
+
+    Returns:
+        cv2.typing.MatLike: The processed image after applying the morphological operations.
+
+    >>> img = np.zeros((200, 300, 3), dtype=np.uint8)
+    >>> _ = cv2.rectangle(img, (40, 50), (140, 120), (200, 200, 200), -1)
+    >>> np.array_equal(get_img_opened_pyramid(img, 4), get_img_opened(img))
+    True
+    """
+    if img_raw.ndim == 2:
+        plane = img_raw
+    else:
+        plane = cv2.cvtColor(img_raw, cv2.COLOR_BGR2GRAY, dst=img_gray)
+    height, width = plane.shape[:2]
+    if dst is None:
+        dst = np.zeros((height, width), dtype=np.uint8)
+    else:
+        dst[...] = 0
+
+    coarse_size: tuple[int, int] = (max(width // scale, 1), max(height // scale, 1))
+    coarse = cv2.inRange(
+        cv2.resize(plane, coarse_size, interpolation=cv2.INTER_AREA), 1, 255)  # type: ignore
+    # Widen the blobs by the reach of the filters, plus a coarse pixel for the rounding
+    reach: int = -(-opened_halo(kernel_size) // scale) + 1
+    coarse = cv2.dilate(coarse, cv2.getStructuringElement(
+        cv2.MORPH_RECT, (2 * reach + 1, 2 * reach + 1)))
+    _, _, stats, _ = cv2.connectedComponentsWithStats(coarse, connectivity=8)
+
+    for left, top, box_width, box_height, _ in stats[1:]:
+        # The last coarse pixels also cover the columns and rows left over by the reduction
+        right: int = width if left + box_width >= coarse_size[0] else (left + box_width) * scale
+        bottom: int = height if top + box_height >= coarse_size[1] \
+            else (top + box_height) * scale
+        region = dst[top * scale:bottom, left * scale:right]
+        cv2.bitwise_or(region, get_img_opened(
+            plane[top * scale:bottom, left * scale:right], kernel_size=kernel_size,
+            denoise_backend=denoise_backend), dst=region)
+    return dst
+
+
 def remove_zero_rows(binary_img: cv2.typing.MatLike) -> cv2.typing.MatLike:
     """
     Removes rows that are entirely zero from the binary image.